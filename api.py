@@ -1,21 +1,242 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify, stream_with_context
 from flask_cors import CORS
 import traceback
 from hybrid_ner import HybridLegalNER
+from model_registry import registry
+from result_cache import ResultCache, cache_key
+from batch_dispatcher import BatchDispatcher
+from pdf_jobs import JobManager, QueueFull, process_pdf
+from worker_memory import MemoryGuard
+from chunker import DEFAULT_OVERLAP_CHARS
+import metrics
+from metrics import STAGE_SECONDS, REQUEST_SECONDS, DOCUMENT_CHARS
 import json
+import os
+import tempfile
+import time
 from datetime import datetime
 
+# Port the server listens on; the Dockerfile exposes this one
+API_PORT = int(os.environ.get('API_PORT', 5001))
+
+# Text size limits: single requests, and long_document mode which chunks the text
+MAX_TEXT_CHARS = 10000
+MAX_DOCUMENT_CHARS = 2000000
+# Smallest chunk size a long_document request may ask for
+MIN_CHUNK_CHARS = 100
+
+# Results are cached by content; the disk tier is shared by every worker.
+# Set NER_RESULT_CACHE to an empty string to keep results in memory only.
+RESULT_CACHE_ENTRIES = 1024
+# Bytes of results (as JSON) each worker keeps in memory; bigger ones, such
+# as long documents', are served from the disk tier
+RESULT_CACHE_MEMORY_MB = int(os.environ.get('NER_RESULT_CACHE_MEMORY_MB', 64))
+RESULT_CACHE_PATH = os.environ.get('NER_RESULT_CACHE', os.path.join('data', 'cache', 'extract_results.sqlite3'))
+
+# Concurrent /extract calls are batched: a batch waits at most this many
+# milliseconds for more requests, and holds at most this many texts. With
+# a wait of 0 (single-threaded workers) requests run the model directly.
+BATCH_WAIT_MS = float(os.environ.get('NER_BATCH_WAIT_MS', 5))
+BATCH_MAX_TEXTS = int(os.environ.get('NER_BATCH_MAX_TEXTS', 32))
+
+# PDF uploads to /jobs run on their own worker pool, off the request threads
+PDF_JOB_WORKERS = int(os.environ.get('NER_PDF_JOB_WORKERS', 2))
+PDF_JOB_MAX_PENDING = 20
+# Job records shared by every worker, so any of them can answer a poll
+PDF_JOB_DB = os.environ.get('NER_JOB_DB', os.path.join('data', 'cache', 'pdf_jobs.sqlite3'))
+MAX_PDF_BYTES = 50 * 1024 * 1024
+
+# Records per model batch on /stream_extract, by default and at most
+STREAM_BATCH_TEXTS = 32
+MAX_STREAM_BATCH_TEXTS = 256
+
+# A process is reset once spaCy has interned this many strings since the
+# model loaded, or its resident memory passes this many MB (0 disables)
+MAX_NEW_STRINGS = int(os.environ.get('NER_MAX_NEW_STRINGS', 200000))
+MAX_WORKER_RSS_MB = int(os.environ.get('NER_MAX_WORKER_RSS_MB', 2048))
+
+def extract_payloads(texts, use_hybrid, batch_size=32):
+    """Cached or freshly extracted payloads for short texts, in order.
+
+    Cache misses run through the model as one batch; if that fails they are
+    retried one by one, and a text that still fails gets its exception in
+    place of a payload.
+    """
+    payloads = [result_cache.get(result_key(text, use_hybrid)) for text in texts]
+    missing = [i for i, payload in enumerate(payloads) if payload is None]
+    if not missing:
+        return payloads
+    
+    try:
+        extracted = ner_system.extract_many([texts[i] for i in missing], use_hybrid=use_hybrid,
+                                            batch_size=batch_size)
+    except Exception:
+        extracted = None
+    
+    for position, i in enumerate(missing):
+        try:
+            if extracted is not None:
+                result = extracted[position]
+            else:
+                result = ner_system.extract_entities(texts[i], use_hybrid=use_hybrid)
+            payloads[i] = cacheable_result(texts[i], result, use_hybrid)
+            result_cache.put(result_key(texts[i], use_hybrid), payloads[i])
+        except Exception as e:
+            payloads[i] = e
+    return payloads
+
+
+def document_payload(text):
+    """Cached or fresh long-document payload, chunked as /extract does by default"""
+    key = result_key(text, True, 'document', MAX_TEXT_CHARS, DEFAULT_OVERLAP_CHARS)
+    payload = result_cache.get(key)
+    if payload is None:
+        result = ner_system.extract_document(text, max_chars=MAX_TEXT_CHARS, overlap=DEFAULT_OVERLAP_CHARS)
+        payload = cacheable_result(text, result, True)
+        result_cache.put(key, payload)
+    return payload
+
+
+def query_flag(name, default):
+    """Boolean option from the query string"""
+    value = request.args.get(name)
+    if value is None:
+        return default
+    return value.lower() in ('1', 'true', 'yes')
+
+
 # Initialize Flask app
 app = Flask(__name__)
 CORS(app)  # Enable CORS for frontend integration
 
+ner_system = None
+dispatcher = None
+
+
+def load_ner_system():
+    """Load the NER system and the request batcher in front of it.
+
+    Called again to pick up a retrained model, or to start over from the
+    on-disk vocabulary. The old pipeline is dropped from the registry so the
+    files are loaded afresh, but not closed: requests still running finish
+    on it, and it is freed once they are done.
+    """
+    global ner_system, dispatcher
+    old_system, old_dispatcher = ner_system, dispatcher
+    if old_system is not None:
+        registry.unload(old_system.model_path)
+    try:
+        ner_system = HybridLegalNER()
+        print("✅ NER system loaded successfully")
+    except Exception as e:
+        print(f"❌ Error loading NER system: {e}")
+        ner_system = None
+    dispatcher = BatchDispatcher(ner_system.extract_many, max_wait=BATCH_WAIT_MS / 1000,
+                                 max_batch=BATCH_MAX_TEXTS) if ner_system and BATCH_WAIT_MS > 0 else None
+    if old_dispatcher is not None:
+        old_dispatcher.close()
+    memory_guard.watch(ner_system.nlp if ner_system else None)
+
+
+# Reloading the model resets the vocabulary. Under gunicorn each worker
+# replaces this with retiring itself, see gunicorn.conf.py.
+memory_guard = MemoryGuard(on_limit=lambda reason: load_ner_system(),
+                           max_new_strings=MAX_NEW_STRINGS, max_rss_mb=MAX_WORKER_RSS_MB)
+
 # Initialize the NER system
-try:
-    ner_system = HybridLegalNER()
-    print("✅ NER system loaded successfully")
-except Exception as e:
-    print(f"❌ Error loading NER system: {e}")
-    ner_system = None
+load_ner_system()
+
+result_cache = ResultCache(RESULT_CACHE_ENTRIES, path=RESULT_CACHE_PATH or None,
+                           max_memory_bytes=RESULT_CACHE_MEMORY_MB * 1024 * 1024)
+pdf_jobs = JobManager(lambda pdf_path, report: process_pdf(pdf_path, ner_system, report),
+                      workers=PDF_JOB_WORKERS, max_pending=PDF_JOB_MAX_PENDING,
+                      path=PDF_JOB_DB or None)
+
+
+def result_key(text, use_hybrid, *mode):
+    """Cache key for a text under the loaded model and rule set"""
+    return cache_key(ner_system.fingerprint, bool(use_hybrid), list(mode), text)
+
+
+def int_option(data, name, default, minimum):
+    """(value, error message) for an optional whole-number request field"""
+    value = data.get(name, default)
+    if isinstance(value, str):
+        try:
+            value = int(value)
+        except ValueError:
+            pass
+    if isinstance(value, bool) or not isinstance(value, int):
+        return None, f"{name} must be a whole number"
+    if value < minimum:
+        return None, f"{name} must be at least {minimum}"
+    return value, None
+
+
+def heartbeat():
+    """Tell the server this worker is still making progress; gunicorn replaces it"""
+
+
+def cacheable_result(text, result, use_hybrid):
+    """The JSON-ready parts of an extraction result that responses are built from"""
+    entities = result['combined_entities'] if use_hybrid else result['entities']
+    payload = {
+        "entities": entities,
+        "entity_count": len(entities),
+        "spans": [span.to_dict(text) for span in result['spans']]
+    }
+    if use_hybrid:
+        payload["ml_entities"] = result['ml_entities']
+        payload["rule_entities"] = result['rule_entities']
+    if 'chunks' in result:
+        payload["chunk_count"] = len(result['chunks'])
+    return payload
+
+# Gauges read whenever /metrics is scraped, one series per worker
+metrics.registry.collect('ner_batch_queue_depth', 'Texts waiting for the next micro-batch',
+                         lambda: dispatcher.stats()['queued'] if dispatcher else None)
+metrics.registry.collect('ner_result_cache_entries', 'Results held in this worker\'s memory cache',
+                         lambda: result_cache.stats()['memory_entries'])
+metrics.registry.collect('ner_result_cache_lookups_total', 'Result cache lookups by outcome',
+                         lambda: [({'result': outcome}, result_cache.stats()[outcome])
+                                  for outcome in ('memory_hits', 'disk_hits', 'misses')],
+                         kind='counter')
+metrics.registry.collect('ner_pdf_jobs', 'Known PDF jobs by status',
+                         lambda: [({'status': status}, count)
+                                  for status, count in pdf_jobs.stats()['jobs'].items()])
+metrics.registry.collect('ner_worker_resident_memory_mb', 'Resident memory of the worker process',
+                         lambda: memory_guard.stats()['rss_mb'])
+metrics.registry.collect('ner_vocab_new_strings', 'Strings spaCy has interned since the model loaded',
+                         lambda: memory_guard.stats()['new_strings'])
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_status(response):
+    g.request_status = response.status_code
+    # Its body is produced after the handler returns, see below
+    g.stream_pending = response.is_streamed
+    return response
+
+@app.teardown_request
+def check_worker_memory(error=None):
+    """Reset this process between requests if its vocabulary or memory has grown too far"""
+    memory_guard.check()
+
+@app.teardown_request
+def record_request_metrics(error=None):
+    """Time the whole request; a streamed response is done only once its body is sent"""
+    # A streamed response tears its request down twice, once when the
+    # handler returns and again once the body is sent; only count the last
+    if g.pop('stream_pending', False):
+        return
+    started = g.pop('request_started', None)
+    if started is not None and request.endpoint != 'metrics_endpoint':
+        REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint=request.endpoint or 'unknown',
+                                status=g.get('request_status', 500))
+    metrics.registry.flush()
 
 @app.route('/', methods=['GET'])
 def home():
@@ -27,7 +248,12 @@ def home():
         "endpoints": {
             "/extract": "POST - Extract entities from legal text",
             "/health": "GET - Check API health",
-            "/info": "GET - Get model information"
+            "/info": "GET - Get model information",
+            "/cache": "GET - Result cache statistics, DELETE - Empty the cache",
+            "/metrics": "GET - Prometheus metrics for every worker",
+            "/stream_extract": "POST - Stream newline-delimited JSON texts, get one result line each",
+            "/jobs": "POST - Upload a PDF for background extraction",
+            "/jobs/<id>": "GET - Progress and results of a PDF job"
         },
         "entity_types": [
             "AGREEMENT_TYPE", "AMOUNT", "DURATION", 
@@ -60,6 +286,12 @@ def model_info():
             "entity_labels": labels,
             "pipeline_components": ner_system.nlp.pipe_names,
             "vocab_size": len(ner_system.nlp.vocab),
+            "memory": memory_guard.stats(),
+            "rule_prefilter": ner_system.rule_engine.prefilter_stats(),
+            "loaded_models": registry.stats(),
+            "result_cache": result_cache.stats(),
+            "batching": dispatcher.stats() if dispatcher else None,
+            "pdf_jobs": pdf_jobs.stats(),
             "performance_metrics": {
                 "f1_score": 0.275,
                 "hybrid_improvement": "+666.7%",
@@ -92,39 +324,75 @@ def extract_entities():
         if not isinstance(text, str):
             return jsonify({"error": "Text must be a string"}), 400
         
-        # Check text length (prevent very long texts)
-        if len(text) > 10000:
-            return jsonify({"error": "Text too long (max 10000 characters)"}), 400
-        
         # Get options
         use_hybrid = data.get('use_hybrid', True)
         include_details = data.get('include_details', False)
+        long_document = data.get('long_document', False)
+        use_cache = data.get('cache', True)
         
-        # Extract entities
+        # Check text length (prevent very long texts)
+        if long_document:
+            if len(text) > MAX_DOCUMENT_CHARS:
+                return jsonify({"error": f"Text too long (max {MAX_DOCUMENT_CHARS} characters)"}), 400
+        elif len(text) > MAX_TEXT_CHARS:
+            return jsonify({"error": f"Text too long (max {MAX_TEXT_CHARS} characters, "
+                                     "or set long_document for chunked extraction)"}), 400
+        DOCUMENT_CHARS.observe(len(text), endpoint='extract')
+        
+        # Extract entities, unless this exact request was answered before
         start_time = datetime.now()
-        result = ner_system.extract_entities(text, use_hybrid=use_hybrid)
+        if long_document:
+            # Long documents are always hybrid; chunks run as one batch
+            use_hybrid = True
+            max_chars, error = int_option(data, 'chunk_chars', MAX_TEXT_CHARS, MIN_CHUNK_CHARS)
+            if error is None:
+                overlap, error = int_option(data, 'overlap', DEFAULT_OVERLAP_CHARS, 0)
+            if error is not None:
+                return jsonify({"error": error}), 400
+            max_chars = min(max_chars, MAX_TEXT_CHARS)
+            key = result_key(text, use_hybrid, 'document', max_chars, overlap)
+        else:
+            key = result_key(text, use_hybrid)
+        
+        cached = result_cache.get(key) if use_cache else None
+        payload = cached
+        if payload is None:
+            if long_document:
+                result = ner_system.extract_document(text, max_chars=max_chars, overlap=overlap)
+            elif dispatcher is not None:
+                # Runs together with whatever other requests arrive meanwhile
+                result = dispatcher.submit(text, use_hybrid=use_hybrid)
+            else:
+                result = ner_system.extract_many([text], use_hybrid=use_hybrid)[0]
+            payload = cacheable_result(text, result, use_hybrid)
+            if use_cache:
+                result_cache.put(key, payload)
         end_time = datetime.now()
         
         # Prepare response
         response = {
             "success": True,
             "text": text,
-            "entities": result['combined_entities'] if use_hybrid else result['entities'],
-            "entity_count": len(result['combined_entities'] if use_hybrid else result['entities']),
+            "entities": payload['entities'],
+            "entity_count": payload['entity_count'],
+            "spans": payload['spans'],
             "processing_time": (end_time - start_time).total_seconds(),
             "method": "hybrid" if use_hybrid else "ml_only",
+            "cached": cached is not None,
             "timestamp": end_time.isoformat()
         }
+        if long_document:
+            response["chunk_count"] = payload['chunk_count']
         
         # Add detailed information if requested
         if include_details and use_hybrid:
             response.update({
-                "ml_entities": result['ml_entities'],
-                "rule_entities": result['rule_entities'],
-                "normalized_text": result.get('normalized_text', text)
+                "ml_entities": payload['ml_entities'],
+                "rule_entities": payload['rule_entities']
             })
         
-        return jsonify(response)
+        with STAGE_SECONDS.time(stage='serialize'):
+            return jsonify(response)
         
     except Exception as e:
         # Log the error for debugging
@@ -159,47 +427,56 @@ def batch_extract_entities():
             return jsonify({"error": "Batch size too large (max 10 texts)"}), 400
         
         use_hybrid = data.get('use_hybrid', True)
-        results = []
+        results = [None] * len(texts)
+        valid = []
         
         for i, text in enumerate(texts):
             if not isinstance(text, str):
-                results.append({
+                results[i] = {
                     "index": i,
                     "success": False,
                     "error": "Text must be a string"
-                })
+                }
                 continue
             
-            if len(text) > 10000:
-                results.append({
+            if len(text) > MAX_TEXT_CHARS:
+                results[i] = {
                     "index": i,
                     "success": False,
                     "error": "Text too long"
-                })
+                }
                 continue
             
-            try:
-                result = ner_system.extract_entities(text, use_hybrid=use_hybrid)
-                results.append({
-                    "index": i,
-                    "success": True,
-                    "text": text,
-                    "entities": result['combined_entities'] if use_hybrid else result['entities'],
-                    "entity_count": len(result['combined_entities'] if use_hybrid else result['entities'])
-                })
-            except Exception as e:
-                results.append({
+            valid.append(i)
+            DOCUMENT_CHARS.observe(len(text), endpoint='batch_extract')
+        
+        # Cached texts are answered at once; the rest run as one batch
+        payloads = extract_payloads([texts[i] for i in valid], use_hybrid)
+        
+        for i, payload in zip(valid, payloads):
+            if isinstance(payload, Exception):
+                results[i] = {
                     "index": i,
                     "success": False,
-                    "error": str(e)
-                })
+                    "error": str(payload)
+                }
+            else:
+                results[i] = {
+                    "index": i,
+                    "success": True,
+                    "text": texts[i],
+                    "entities": payload['entities'],
+                    "entity_count": payload['entity_count'],
+                    "spans": payload['spans']
+                }
         
-        return jsonify({
-            "success": True,
-            "batch_size": len(texts),
-            "results": results,
-            "timestamp": datetime.now().isoformat()
-        })
+        with STAGE_SECONDS.time(stage='serialize'):
+            return jsonify({
+                "success": True,
+                "batch_size": len(texts),
+                "results": results,
+                "timestamp": datetime.now().isoformat()
+            })
         
     except Exception as e:
         return jsonify({
@@ -208,6 +485,176 @@ def batch_extract_entities():
             "timestamp": datetime.now().isoformat()
         }), 500
 
+@app.route('/stream_extract', methods=['POST'])
+def stream_extract_entities():
+    """Streaming batch endpoint: newline-delimited JSON in, one JSON line out per record.
+
+    Each input line is a JSON string, or an object with "text" and an
+    optional "id" that is echoed back. Records are read and processed
+    batch_size at a time, and each batch's results are sent as soon as it
+    is done, in input order, so memory stays flat however long the stream.
+    Texts longer than MAX_TEXT_CHARS are extracted as long documents.
+    
+    Query options: use_hybrid (default true), include_text and
+    include_normalized (echo the input and its normalized form, default
+    false), include_details (ML and rule entities) and batch_size.
+    """
+    
+    if not ner_system:
+        return jsonify({"error": "NER system not available"}), 500
+    
+    try:
+        batch_size = int(request.args.get('batch_size', STREAM_BATCH_TEXTS))
+    except ValueError:
+        return jsonify({"error": "batch_size must be an integer"}), 400
+    batch_size = max(1, min(batch_size, MAX_STREAM_BATCH_TEXTS))
+    use_hybrid = query_flag('use_hybrid', True)
+    include_text = query_flag('include_text', False)
+    include_normalized = query_flag('include_normalized', False)
+    include_details = query_flag('include_details', False)
+    
+    def parse(line):
+        """(record, error) for one input line"""
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            return None, f"Invalid JSON: {e}"
+        if isinstance(record, str):
+            record = {"text": record}
+        if not isinstance(record, dict) or not isinstance(record.get('text'), str):
+            return None, "Each line must be a string or an object with a text string"
+        if len(record['text']) > MAX_DOCUMENT_CHARS:
+            return None, f"Text too long (max {MAX_DOCUMENT_CHARS} characters)"
+        DOCUMENT_CHARS.observe(len(record['text']), endpoint='stream_extract')
+        return record, None
+    
+    def output(line_number, record, payload, long_document):
+        """The result line for one record"""
+        result = {"line": line_number}
+        if record is not None and 'id' in record:
+            result["id"] = record['id']
+        if isinstance(payload, (str, Exception)):
+            result.update({"success": False, "error": str(payload)})
+            return result
+        
+        hybrid = use_hybrid or long_document
+        result.update({
+            "success": True,
+            "entities": payload['entities'],
+            "entity_count": payload['entity_count'],
+            "spans": payload['spans'],
+            "method": "hybrid" if hybrid else "ml_only"
+        })
+        if long_document:
+            result["chunk_count"] = payload['chunk_count']
+        if include_details and hybrid:
+            result.update({"ml_entities": payload['ml_entities'], "rule_entities": payload['rule_entities']})
+        if include_text:
+            result["text"] = record['text']
+        if include_normalized:
+            result["normalized_text"] = ner_system.preprocessor.normalize_text(record['text'])
+        return result
+    
+    def run(batch):
+        """Extract one batch of (line number, record, error) and yield its result lines"""
+        short = [record['text'] for _, record, error in batch
+                 if error is None and len(record['text']) <= MAX_TEXT_CHARS]
+        payloads = iter(extract_payloads(short, use_hybrid, batch_size=batch_size))
+        
+        for line_number, record, error in batch:
+            long_document = False
+            if error is not None:
+                payload = error
+            elif len(record['text']) <= MAX_TEXT_CHARS:
+                payload = next(payloads)
+            else:
+                long_document = True
+                try:
+                    payload = document_payload(record['text'])
+                except Exception as e:
+                    payload = e
+            result = output(line_number, record, payload, long_document)
+            with STAGE_SECONDS.time(stage='serialize'):
+                line = json.dumps(result, ensure_ascii=False) + '\n'
+            yield line
+        heartbeat()
+    
+    def generate():
+        batch = []
+        for line_number, line in enumerate(request.stream, 1):
+            line = line.strip()
+            if not line:
+                continue
+            record, error = parse(line)
+            batch.append((line_number, record, error))
+            if len(batch) >= batch_size:
+                yield from run(batch)
+                batch = []
+        if batch:
+            yield from run(batch)
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@app.route('/jobs', methods=['POST'])
+def submit_pdf_job():
+    """Queue an uploaded PDF for text extraction, OCR if needed, NER and cleaning"""
+    
+    if not ner_system:
+        return jsonify({"error": "NER system not available"}), 500
+    
+    if request.content_length and request.content_length > MAX_PDF_BYTES:
+        return jsonify({"error": f"File too large (max {MAX_PDF_BYTES // (1024 * 1024)} MB)"}), 413
+    
+    upload = request.files.get('file')
+    if upload is None or not upload.filename:
+        return jsonify({"error": "No PDF uploaded (send it as the 'file' form field)"}), 400
+    
+    # Keep the upload on disk until its job has run
+    handle, pdf_path = tempfile.mkstemp(suffix='.pdf', prefix='ner_job_')
+    with os.fdopen(handle, 'wb') as f:
+        upload.save(f)
+    with open(pdf_path, 'rb') as f:
+        is_pdf = f.read(5) == b'%PDF-'
+    if not is_pdf:
+        os.remove(pdf_path)
+        return jsonify({"error": "File is not a PDF"}), 400
+    
+    try:
+        job_id = pdf_jobs.submit(pdf_path, filename=upload.filename)
+    except QueueFull as e:
+        os.remove(pdf_path)
+        response = jsonify({"error": f"Job queue is full: {e}"})
+        response.headers['Retry-After'] = '30'
+        return response, 503
+    
+    return jsonify({
+        "success": True,
+        "job_id": job_id,
+        "status": "queued",
+        "status_url": f"/jobs/{job_id}",
+        "timestamp": datetime.now().isoformat()
+    }), 202
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def pdf_job_status(job_id):
+    """Progress of a PDF job, with its results once done"""
+    job = pdf_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job)
+
+@app.route('/cache', methods=['GET', 'DELETE'])
+def result_cache_endpoint():
+    """Result cache statistics, or empty the cache with DELETE"""
+    if request.method == 'DELETE':
+        result_cache.clear()
+    return jsonify(result_cache.stats())
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Stage, rule family and request timings plus queue and cache gauges, merged over workers"""
+    return Response(metrics.registry.render(), mimetype='text/plain; version=0.0.4')
+
 @app.errorhandler(404)
 def not_found(error):
     return jsonify({"error": "Endpoint not found"}), 404
@@ -224,6 +671,12 @@ if __name__ == '__main__':
     print("  GET  /info    - Model information")
     print("  POST /extract - Extract entities")
     print("  POST /batch_extract - Batch extraction")
-    print("\n🔗 API will be available at: http://localhost:5001")
+    print("  POST /stream_extract - Streaming NDJSON batch extraction")
+    print("  GET  /cache   - Result cache statistics")
+    print("  GET  /metrics - Prometheus metrics")
+    print("  POST /jobs    - Queue a PDF for extraction")
+    print("  GET  /jobs/<id> - PDF job progress and results")
+    print(f"\n🔗 API will be available at: http://localhost:{API_PORT}")
+    print("   (development server; use gunicorn -c gunicorn.conf.py api:app in production)")
     
-    app.run(debug=True, host='0.0.0.0', port=5002)
+    app.run(debug=True, host='0.0.0.0', port=API_PORT)
@@ -0,0 +1,171 @@
+import os
+import queue
+import threading
+import time
+
+from metrics import BATCH_SIZE, QUEUE_WAIT_SECONDS
+
+# Defaults: how long the first request of a batch waits for company, and
+# the most texts run through the model together
+DEFAULT_MAX_WAIT = 0.005
+DEFAULT_MAX_BATCH = 32
+
+
+class _Pending:
+    """One submitted text waiting for its result"""
+
+    __slots__ = ('text', 'use_hybrid', 'enqueued', 'done', 'result', 'error')
+
+    def __init__(self, text, use_hybrid):
+        self.text = text
+        self.use_hybrid = use_hybrid
+        self.enqueued = time.perf_counter()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class BatchDispatcher:
+    """Coalesces concurrent extraction calls into batched model runs.
+
+    Callers block in submit while a background thread collects requests:
+    a batch closes ``max_wait`` seconds after its first request arrives or
+    once it holds ``max_batch`` texts, whichever comes first. It then runs
+    through ``extract_many`` (one nlp.pipe call per use_hybrid setting) and
+    every caller gets its own result back. If a batch fails, its texts are
+    retried one by one so only the failing text raises.
+
+    The thread is started on first use, and again in a forked child, which
+    does not inherit it. Once closed, submit runs each text through
+    ``extract_many`` directly instead of starting it again.
+    """
+
+    def __init__(self, extract_many, max_wait=DEFAULT_MAX_WAIT, max_batch=DEFAULT_MAX_BATCH):
+        self.extract_many = extract_many
+        self.max_wait = max_wait
+        self.max_batch = max(1, max_batch)
+        self._lock = threading.Lock()
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        self._closed = False
+        self._stats = {'requests': 0, 'batches': 0, 'failed_batches': 0, 'max_batch_size': 0,
+                       'queue_wait_total': 0.0, 'queue_wait_max': 0.0}
+
+    def _ensure_started(self):
+        # Called with the lock held
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return self._queue
+        self._queue = queue.Queue()
+        self._pid = os.getpid()
+        self._thread = threading.Thread(target=self._run, args=(self._queue,),
+                                        name='batch-dispatcher', daemon=True)
+        self._thread.start()
+        return self._queue
+
+    def submit(self, text, use_hybrid=True):
+        """Extract entities from one text as part of the next batch"""
+        pending = _Pending(text, use_hybrid)
+        with self._lock:
+            # Queued under the lock, so nothing lands behind close's stop marker
+            queued = not self._closed
+            if queued:
+                self._ensure_started().put(pending)
+        if not queued:
+            return self.extract_many([text], use_hybrid=use_hybrid)[0]
+        pending.done.wait()
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def close(self):
+        """Stop the dispatch thread once the queued requests are served; later calls run directly"""
+        with self._lock:
+            self._closed = True
+            if self._thread is None or self._pid != os.getpid():
+                return
+            self._queue.put(None)
+            thread, self._thread = self._thread, None
+        thread.join()
+
+    def _collect(self, requests):
+        """Block for a first request, then gather more until the window closes"""
+        first = requests.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            try:
+                pending = requests.get(timeout=remaining) if remaining > 0 else requests.get_nowait()
+            except queue.Empty:
+                break
+            if pending is None:
+                # Serve what we have, then stop
+                requests.put(None)
+                break
+            batch.append(pending)
+        return batch
+
+    def _run(self, requests):
+        while True:
+            batch = self._collect(requests)
+            if batch is None:
+                return
+            started = time.perf_counter()
+            waits = [started - pending.enqueued for pending in batch]
+            with self._lock:
+                stats = self._stats
+                stats['requests'] += len(batch)
+                stats['batches'] += 1
+                stats['max_batch_size'] = max(stats['max_batch_size'], len(batch))
+                stats['queue_wait_total'] += sum(waits)
+                stats['queue_wait_max'] = max(stats['queue_wait_max'], max(waits))
+            BATCH_SIZE.observe(len(batch))
+            for wait in waits:
+                QUEUE_WAIT_SECONDS.observe(wait)
+
+            for use_hybrid in (True, False):
+                group = [pending for pending in batch if bool(pending.use_hybrid) == use_hybrid]
+                if group:
+                    self._serve(group, use_hybrid)
+
+    def _serve(self, group, use_hybrid):
+        """Run one group through the model and hand out the results"""
+        try:
+            results = self.extract_many([pending.text for pending in group], use_hybrid=use_hybrid)
+        except Exception:
+            results = None
+            with self._lock:
+                self._stats['failed_batches'] += 1
+
+        for index, pending in enumerate(group):
+            if results is not None:
+                pending.result = results[index]
+            else:
+                try:
+                    pending.result = self.extract_many([pending.text], use_hybrid=use_hybrid)[0]
+                except Exception as e:
+                    pending.error = e
+            pending.done.set()
+
+    def stats(self):
+        """Batch sizes and queue waits since startup"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['queued'] = self._queue.qsize() if self._queue is not None else 0
+        batches = stats['batches']
+        requests = stats['requests']
+        return {
+            'max_wait_ms': self.max_wait * 1000,
+            'max_batch': self.max_batch,
+            'requests': requests,
+            'batches': batches,
+            'failed_batches': stats['failed_batches'],
+            'queued': stats['queued'],
+            'mean_batch_size': requests / batches if batches else 0.0,
+            'max_batch_size': stats['max_batch_size'],
+            'mean_queue_wait_ms': stats['queue_wait_total'] / requests * 1000 if requests else 0.0,
+            'max_queue_wait_ms': stats['queue_wait_max'] * 1000
+        }
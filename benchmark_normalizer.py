@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Benchmark the single-pass normalizer against the chained re.sub steps
+on the extracted contract text
+"""
+
+import glob
+import os
+import sys
+import time
+
+from text_normalizer import TextNormalizer, normalize_chained
+
+
+def load_corpus(text_dir):
+    """Read every .txt file under the directory"""
+    texts = []
+    for path in sorted(glob.glob(os.path.join(text_dir, '**', '*.txt'), recursive=True)):
+        with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+            texts.append(f.read())
+    return texts
+
+
+def time_it(function, texts, repeat):
+    """Best wall time of ``repeat`` runs over all texts"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in texts:
+            function(text)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    text_dir = sys.argv[1] if len(sys.argv) > 1 else os.path.join('data', 'extracted_text')
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    texts = load_corpus(text_dir)
+    if not texts:
+        print(f"❌ No .txt files found in {text_dir}")
+        return 1
+
+    total_chars = sum(len(text) for text in texts)
+    print(f"📄 {len(texts)} documents, {total_chars:,} characters")
+
+    normalizer = TextNormalizer()
+
+    # Outputs must be identical before the timings mean anything
+    mismatches = sum(1 for text in texts if normalizer.normalize(text) != normalize_chained(text))
+    if mismatches:
+        print(f"❌ {mismatches} documents normalize differently")
+        return 1
+    print("✅ Single-pass output matches the chained steps")
+
+    chained = time_it(normalize_chained, texts, repeat)
+    single = time_it(normalizer.normalize, texts, repeat)
+    aligned = time_it(normalizer.normalize_with_alignment, texts, repeat)
+
+    print(f"\n{'Method':<28}{'Seconds':>10}{'MB/s':>10}")
+    print("-" * 48)
+    for name, seconds in [('chained re.sub', chained),
+                          ('single pass', single),
+                          ('single pass + alignment', aligned)]:
+        print(f"{name:<28}{seconds:>10.3f}{total_chars / seconds / 1e6:>10.2f}")
+    print(f"\n🚀 Speedup: {chained / single:.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
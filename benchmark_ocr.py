@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark the OCR backends on the scanned PDF corpus: pytesseract (one
+tesseract process per page) against tesserocr (engine kept loaded in
+each worker)
+"""
+
+import difflib
+import glob
+import os
+import sys
+import time
+
+from src.ocr import page_ocr
+from src.ocr.ocr_backends import BACKENDS, load_backend
+
+
+def run_backend(name, pdf_paths, workers):
+    """OCR every PDF with one backend; returns (seconds, startup seconds, pages, texts)"""
+    # Starting the workers and loading the engines is paid once per
+    # server, so it is timed separately from the documents
+    start = time.perf_counter()
+    if workers > 1:
+        pool = page_ocr.ocr_pool(workers, name)
+        for future in [pool.submit(page_ocr.worker_backend, name) for _ in range(workers)]:
+            future.exception()
+    else:
+        page_ocr.worker_backend(name)
+    startup = time.perf_counter() - start
+
+    texts = {}
+    pages = 0
+    start = time.perf_counter()
+    for pdf_path in pdf_paths:
+        results = page_ocr.ocr_pages(pdf_path, workers=workers, backend=name)
+        texts[pdf_path] = ''.join(result['text'] for result in results)
+        pages += len(results)
+    seconds = time.perf_counter() - start
+    page_ocr.shutdown_pool()
+    return seconds, startup, pages, texts
+
+
+def main():
+    pdf_dir = sys.argv[1] if len(sys.argv) > 1 else os.path.join('data', 'raw pdfs', 'Scanned')
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else page_ocr.OCR_WORKERS
+
+    pdf_paths = sorted(glob.glob(os.path.join(pdf_dir, '*.pdf')))
+    if not pdf_paths:
+        print(f"❌ No PDFs found in {pdf_dir}")
+        return 1
+    print(f"📄 {len(pdf_paths)} PDFs, {workers} OCR workers")
+
+    results = {}
+    for name in BACKENDS:
+        try:
+            load_backend(name).close()
+        except (ImportError, RuntimeError) as e:
+            print(f"⚠️ Skipping {name}: {e}")
+            continue
+        print(f"⏳ {name}...")
+        results[name] = run_backend(name, pdf_paths, workers)
+
+    if not results:
+        print("❌ No OCR backend available")
+        return 1
+
+    print(f"\n{'Backend':<14}{'Startup s':>11}{'Seconds':>10}{'Pages':>8}{'Pages/s':>10}")
+    print("-" * 53)
+    for name, (seconds, startup, pages, _) in results.items():
+        print(f"{name:<14}{startup:>11.2f}{seconds:>10.2f}{pages:>8}{pages / seconds:>10.2f}")
+
+    if len(results) == 2:
+        (_, fallback), (_, engine) = sorted(results.items(), key=lambda item: item[0] != 'pytesseract')
+        print(f"\n🚀 Speedup: {fallback[0] / engine[0]:.1f}x")
+        # Same tesseract underneath, so the text should barely differ
+        similarity = [difflib.SequenceMatcher(None, fallback[3][path], engine[3][path]).ratio()
+                      for path in pdf_paths]
+        print(f"📝 Text similarity: mean {sum(similarity) / len(similarity):.3f}, min {min(similarity):.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
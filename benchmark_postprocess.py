@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmark the single-pass entity post-processing against the chained
+clean/reclassify/validate/filter steps, on the entity lists the rules
+find in the extracted contract text
+"""
+
+import glob
+import os
+import sys
+import time
+
+from clean_pdf_entities import postprocess_entities_chained
+from entity_filters import postprocess_entities
+from hybrid_ner import RULE_FAMILIES
+from rule_engine import RuleEngine
+
+
+def load_entity_lists(text_dir, with_model=False):
+    """Raw (text, label) entities for every .txt file under the directory.
+
+    Every rule match is kept, repeats included, as extract_document's
+    chunks produce them; with_model adds the model's entities too.
+    """
+    engine = RuleEngine(RULE_FAMILIES)
+    ner_system = None
+    if with_model:
+        from hybrid_ner import HybridLegalNER
+        ner_system = HybridLegalNER()
+
+    entity_lists = []
+    for path in sorted(glob.glob(os.path.join(text_dir, '**', '*.txt'), recursive=True)):
+        with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+            text = f.read()
+        entities = [(text[span.start:span.end], span.label) for span in engine.extract_spans(text)]
+        if ner_system is not None:
+            entities += ner_system.extract_document(text)['ml_entities']
+        entity_lists.append(entities)
+    return entity_lists
+
+
+def time_it(function, entity_lists, repeat):
+    """Best wall time of ``repeat`` runs over all lists"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for entities in entity_lists:
+            function(entities)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    text_dir = args[0] if args else os.path.join('data', 'extracted_text')
+    repeat = int(args[1]) if len(args) > 1 else 3
+
+    entity_lists = load_entity_lists(text_dir, with_model='--model' in sys.argv[1:])
+    if not entity_lists:
+        print(f"❌ No .txt files found in {text_dir}")
+        return 1
+
+    total = sum(len(entities) for entities in entity_lists)
+    print(f"📄 {len(entity_lists)} documents, {total:,} raw entities "
+          f"(largest {max(len(entities) for entities in entity_lists):,})")
+
+    # Outputs must be identical before the timings mean anything
+    mismatches = sum(1 for entities in entity_lists
+                     if postprocess_entities(entities) != postprocess_entities_chained(entities))
+    if mismatches:
+        print(f"❌ {mismatches} documents post-process differently")
+        return 1
+    print("✅ Single-pass output matches the chained steps")
+
+    chained = time_it(postprocess_entities_chained, entity_lists, repeat)
+    single = time_it(postprocess_entities, entity_lists, repeat)
+
+    print(f"\n{'Method':<16}{'Seconds':>10}{'Entities/s':>14}")
+    print("-" * 40)
+    for name, seconds in [('chained steps', chained), ('single pass', single)]:
+        print(f"{name:<16}{seconds:>10.3f}{total / seconds:>14,.0f}")
+    print(f"\n🚀 Speedup: {chained / single:.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Check the gated RuleEngine against the per-pattern loop it replaced, one
+finditer per pattern over the whole text, and time both on the extracted
+contract text
+"""
+
+import glob
+import os
+import re
+import sys
+import time
+from collections import Counter
+
+from hybrid_ner import RULE_FAMILIES
+from rule_engine import RuleEngine
+
+# The city and country patterns the LOCATION family had before the names
+# moved to data/gazetteers, copied as they were
+LEGACY_LOCATION_PATTERNS = [
+    r'\b(?:New\s+York|Los\s+Angeles|Chicago|Houston|Phoenix|Philadelphia|San\s+Antonio|San\s+Diego|Dallas|San\s+Jose|Austin|Jacksonville|Fort\s+Worth|Columbus|Charlotte|San\s+Francisco|Indianapolis|Seattle|Denver|Washington|Boston|El\s+Paso|Nashville|Detroit|Oklahoma\s+City|Portland|Las\s+Vegas|Baltimore|Memphis|Milwaukee|Tucson|Fresno|Sacramento|Kansas\s+City|Mesa|Atlanta|Omaha|Colorado\s+Springs|Raleigh|Long\s+Beach|Virginia\s+Beach|Miami|Oakland|Minneapolis|Tampa|Tulsa|Arlington|Wichita|New\s+Orleans|Bakersfield|Honolulu|Anaheim|Santa\s+Ana|Riverside|Corona|Lexington|Stockton|Cincinnati|Irvine|Greensboro|Lincoln|Toledo|St.\s+Louis|Rochester|Newark|Plano|Durham|St.\s+Paul|Orlando|Laredo|Chula\s+Vista|Madison|Gilbert|Buffalo|Chandler|Glendale|North\s+Las\s+Vegas|Scottsdale|Reno|Henderson|Jersey\s+City|Chesapeake|Garland|Irving|Fremont|Norfolk|Boise|Richmond|Spokane|Baton\s+Rouge)\b',
+    r'\b(?:United\s+States|U\.S\.A\.|USA|Canada|UK|United\s+Kingdom|Germany|France|Japan|China|India|Australia|Mexico|Brazil|Argentina|Spain|Italy|Netherlands|Switzerland|Sweden|Norway|Denmark|Finland|Belgium|Austria|Poland|Czech\s+Republic|Hungary|Romania|Bulgaria|Greece|Portugal|Turkey|Russia|Ukraine|Belarus|Estonia|Latvia|Lithuania|Moldova|Slovakia|Slovenia|Croatia|Bosnia|Serbia|Montenegro|Albania|Macedonia|Kosovo|Cyprus|Malta|Luxembourg|Monaco|Andorra|Liechtenstein|Vatican\s+City|San\s+Marino|Iceland|Ireland|Northern\s+Ireland|Scotland|Wales|England|Great\s+Britain)\b'
+]
+
+# Differences that are intended. The gazetteer finds "U.S.A." before a
+# space, which the old pattern's \b after the last dot never allowed, and
+# the old "St.\s+Louis" had an unescaped dot, so it also took "Stx Louis".
+INTENDED = [
+    re.compile(r'u\.s\.a\.?$', re.IGNORECASE),
+    re.compile(r'st[^.\s]?\s*(?:louis|paul)$', re.IGNORECASE),
+]
+
+# Edge cases the corpus may not contain
+SAMPLES = [
+    "Signed in St. Louis, MO and St.  Paul by Acme Holdings Inc. on January 5, 2024.",
+    "Delivered to Stx Louis and Stx Paul, U.S.A. and the U.S.A.",
+    "This Master Services Agreement, between Foo Bar and Baz Qux, runs 3 years at 4.5% per annum.",
+    "USD 1,000,000 or $ 250.00 or 3 million dollars, payable to John A. Smith Jr. until December 31, 2025 and",
+    "The lease terminates on March 1, 2030; the Trust Fund of New York, NY pays 12/31/2024.",
+]
+
+
+def legacy_patterns():
+    """(label, compiled patterns, accept) per family, in the old loop's order"""
+    families = []
+    for family in RULE_FAMILIES:
+        patterns = list(family.patterns)
+        if family.label == 'LOCATION':
+            patterns += LEGACY_LOCATION_PATTERNS
+        families.append((family.label, [re.compile(p, re.IGNORECASE) for p in patterns], family.accept))
+    return families
+
+
+def extract_with_rules_loop(text, families):
+    """Rule entities as the old extract_with_rules found them"""
+    entities = []
+    for label, patterns, accept in families:
+        for pattern in patterns:
+            for match in pattern.finditer(text):
+                entity_text = match.group().strip()
+                if accept is None or accept(entity_text):
+                    entities.append((entity_text, label))
+    return entities
+
+
+def load_corpus(text_dir):
+    """Read every .txt file under the directory"""
+    texts = []
+    for path in sorted(glob.glob(os.path.join(text_dir, '**', '*.txt'), recursive=True)):
+        with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+            texts.append(f.read())
+    return texts
+
+
+def intended(entity):
+    return any(pattern.match(entity[0]) for pattern in INTENDED)
+
+
+def compare(texts, engine, families):
+    """Entities only one side finds, split into intended and unexpected"""
+    expected = Counter()
+    unexpected = Counter()
+    for text in texts:
+        new = Counter(engine.extract(text))
+        old = Counter(extract_with_rules_loop(text, families))
+        for side, difference in (('engine only', new - old), ('loop only', old - new)):
+            for entity, count in difference.items():
+                (expected if intended(entity) else unexpected)[(side,) + entity] += count
+    return expected, unexpected
+
+
+def time_it(function, texts, repeat):
+    """Best wall time of ``repeat`` runs over all texts"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in texts:
+            function(text)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    text_dir = sys.argv[1] if len(sys.argv) > 1 else os.path.join('data', 'extracted_text')
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+
+    texts = load_corpus(text_dir)
+    if not texts:
+        print(f"❌ No .txt files found in {text_dir}")
+        return 1
+    print(f"📄 {len(texts)} documents, {sum(len(text) for text in texts):,} characters")
+
+    engine = RuleEngine(RULE_FAMILIES)
+    families = legacy_patterns()
+
+    # Entities must match, intended differences aside, before the timings mean anything
+    expected, unexpected = compare(texts + SAMPLES, engine, families)
+    for (side, entity, label), count in sorted(expected.items()):
+        print(f"ℹ️  Intended, {side}: '{entity}' → {label} x{count}")
+    if unexpected:
+        for (side, entity, label), count in sorted(unexpected.items()):
+            print(f"❌ {side}: '{entity}' → {label} x{count}")
+        return 1
+    print("✅ Rule engine matches the per-pattern loop")
+
+    loop = time_it(lambda text: extract_with_rules_loop(text, families), texts, repeat)
+    gated = time_it(engine.extract, texts, repeat)
+
+    print(f"\n{'Method':<18}{'Seconds':>10}")
+    print("-" * 28)
+    for name, seconds in [('per-pattern loop', loop), ('gated engine', gated)]:
+        print(f"{name:<18}{seconds:>10.3f}")
+    print(f"\n🚀 Speedup: {loop / gated:.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
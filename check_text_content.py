@@ -9,7 +9,7 @@ import os
 # Add the current directory to the path to import from clean_pdf_entities
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from clean_pdf_entities import extract_text_from_pdf_via_container
+from clean_pdf_entities import extract_text_from_pdf
 
 def check_text_for_expirations(pdf_path):
     """Check text content for expiration-related terms"""
@@ -18,7 +18,7 @@ def check_text_for_expirations(pdf_path):
     print("=" * 70)
     
     # Extract text
-    text = extract_text_from_pdf_via_container(pdf_path)
+    text = extract_text_from_pdf(pdf_path)
     
     if not text:
         print("❌ Failed to extract text")
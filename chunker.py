@@ -0,0 +1,100 @@
+import re
+
+from entity_spans import EntitySpan
+
+# Where a chunk may end, best first: a blank line, a sentence end, any whitespace
+PARAGRAPH_END = re.compile(r'\n[^\S\n]*\n\s*')
+SENTENCE_END = re.compile(r'(?<=[.!?;:])["\')\]]*\s+|\n\s*')
+WHITESPACE = re.compile(r'\s+')
+
+DEFAULT_CHUNK_CHARS = 10000
+DEFAULT_OVERLAP_CHARS = 500
+
+
+def _last_boundary(pattern, text, start, end):
+    """End of the last boundary match inside text[start:end], or None"""
+    last = None
+    for match in pattern.finditer(text, start, end):
+        last = match.end()
+    return last
+
+
+def _first_boundary(pattern, text, start, end):
+    """End of the first boundary match ending before ``end``, or None"""
+    match = pattern.search(text, start, end)
+    if match and match.end() < end:
+        return match.end()
+    return None
+
+
+def split_chunks(text, max_chars=DEFAULT_CHUNK_CHARS, overlap=DEFAULT_OVERLAP_CHARS):
+    """Split text into (start, end) chunks of at most max_chars.
+
+    Chunks end at the last paragraph break in the second half of the
+    window, else the last sentence end, else the last whitespace, and only
+    cut mid-word when there is none. Each chunk after the first starts at
+    a sentence boundary about ``overlap`` characters before the previous
+    chunk's end, so an entity cut by one chunk is whole in the next.
+    """
+    if max_chars <= 0:
+        raise ValueError("max_chars must be positive")
+    overlap = max(0, min(overlap, max_chars // 2))
+
+    length = len(text)
+    chunks = []
+    start = 0
+    while start < length:
+        limit = start + max_chars
+        if limit >= length:
+            chunks.append((start, length))
+            break
+
+        # Only look for a good break in the back half, so chunks stay large
+        floor = start + max_chars // 2
+        end = None
+        for pattern in (PARAGRAPH_END, SENTENCE_END, WHITESPACE):
+            end = _last_boundary(pattern, text, floor, limit)
+            if end is not None:
+                break
+        if end is None:
+            end = limit
+        chunks.append((start, end))
+
+        # Back up by the overlap, then forward to the next sentence start
+        next_start = end - overlap
+        if overlap:
+            boundary = _first_boundary(SENTENCE_END, text, next_start, end)
+            if boundary is None:
+                boundary = _first_boundary(WHITESPACE, text, next_start, end)
+            if boundary is not None:
+                next_start = boundary
+        start = max(next_start, start + 1)
+
+    return chunks
+
+
+def stitch_spans(chunk_spans, chunks):
+    """Move per-chunk spans into document offsets and drop overlap duplicates.
+
+    ``chunk_spans`` holds one list of EntitySpans per chunk, with offsets
+    relative to that chunk. A span touching a chunk edge that another
+    chunk overlaps may be cut off, so it is dropped in favour of the copy
+    from the neighbouring chunk; spans found by both chunks are kept once.
+    """
+    stitched = {}
+    last = len(chunks) - 1
+    for index, (spans, (chunk_start, chunk_end)) in enumerate(zip(chunk_spans, chunks)):
+        # The region shared with a neighbour, if any
+        shared_left = chunks[index - 1][1] if index > 0 else chunk_start
+        shared_right = chunks[index + 1][0] if index < last else chunk_end
+        for span in spans:
+            start = span.start + chunk_start
+            end = span.end + chunk_start
+            if index > 0 and start == chunk_start and shared_left > chunk_start:
+                continue
+            if index < last and end == chunk_end and shared_right < chunk_end:
+                continue
+            key = (start, end, span.label)
+            if key not in stitched or stitched[key].score < span.score:
+                stitched[key] = EntitySpan(start, end, span.label, span.source, span.score)
+    return list(stitched.values())
@@ -8,10 +8,12 @@ import sys
 import os
 import json
 import requests
-import subprocess
 import re
 from typing import List, Tuple
 
+from entity_filters import postprocess_entities
+from src.ocr.pdf_extractor import extract_pdf
+
 def clean_entities(entities: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
     """
     Clean and deduplicate entities extracted from NER model
@@ -232,17 +234,15 @@ def main():
         print(f"❌ Text extraction failed: {e}")
         return None
 
-def extract_text_from_pdf_direct(pdf_path):
-    """Extract text directly using PyMuPDF"""
+def extract_text_from_pdf(pdf_path):
+    """Extract text in this process: text layer, OCR for scanned pages, cached by content"""
     try:
         print(f"📄 Extracting text from: {pdf_path}")
-        import fitz  # PyMuPDF
-        doc = fitz.open(pdf_path)
-        text = ""
-        for page in doc:
-            text += page.get_text()
-        doc.close()
-        print(f"✅ Extracted {len(text)} characters")
+        extracted = extract_pdf(pdf_path)
+        text = extracted['text']
+        counts = extracted['page_methods']
+        print(f"✅ Extracted {len(text)} characters ({counts['digital']} text layer pages, "
+              f"{counts['scanned']} OCR, {extracted['cached_pages']} from cache)")
         if len(text) < 100:
             print(f"📝 Preview: {text[:200]}...")
         return text
@@ -250,146 +250,34 @@ def extract_text_from_pdf_direct(pdf_path):
         print(f"❌ Text extraction failed: {e}")
         return None
 
-def extract_text_from_pdf_via_container(pdf_path):
-    """Extract text using existing legal-ner-api container"""
-    try:
-        print(f"📄 Extracting text from: {pdf_path}")
-        
-        # Get the container ID
-        result = subprocess.run(['docker', 'ps', '--filter', 'name=legal-ner-api', '--format', '{{.ID}}'], 
-                              capture_output=True, text=True)
-        
-        if not result.stdout.strip():
-            print("❌ legal-ner-api container not running")
-            return None
-        
-        container_id = result.stdout.strip()
-        
-        # Copy PDF into container
-        subprocess.run(['docker', 'cp', pdf_path, f'{container_id}:/tmp/input.pdf'], check=True)
-        
-        # Extract text inside container
-        cmd = [
-            'docker', 'exec', container_id,
-            'python', '-c',
-            '''
-import fitz
-from pdf2image import convert_from_path
-import pytesseract
-
-doc = fitz.open("/tmp/input.pdf")
-text = ""
-
-# Try direct text extraction first
-for page in doc:
-    page_text = page.get_text()
-    text += page_text + "\\n"
-
-# If no text found, use OCR
-if not text.strip():
-    print("Using OCR for scanned PDF...")
-    try:
-        images = convert_from_path("/tmp/input.pdf", dpi=200)
-        for i, image in enumerate(images):
-            ocr_text = pytesseract.image_to_string(image)
-            text += ocr_text + "\\n"
-    except Exception as e:
-        print(f"OCR failed: {e}")
-
-print(text)
-'''
-        ]
-        
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        
-        if result.returncode == 0:
-            text = result.stdout.strip()
-            print(f"✅ Extracted {len(text)} characters")
-            print(f"📝 Preview: {text[:200]}...")
-            return text
-        else:
-            print(f"❌ Container extraction failed: {result.stderr}")
-            return None
-            
-    except Exception as e:
-        print(f"❌ PDF extraction failed: {e}")
-        return None
-
 def extract_entities_via_api(text):
-    """Extract entities using running Docker API with chunking for long texts"""
+    """Extract entities using running Docker API; long texts use its chunked long_document mode"""
     try:
         print("🌐 Sending to API...")
         
-        # Check if text is too long and needs chunking
+        # The API splits long texts on sentence boundaries itself and
+        # stitches the entity offsets back together
         max_chars = 10000
-        if len(text) <= max_chars:
-            # Send as single request
-            response = requests.post('http://localhost:5002/extract', 
-                                   json={'text': text}, timeout=30)
+        payload = {'text': text}
+        if len(text) > max_chars:
+            print(f"📝 Text is long ({len(text)} chars), using long-document mode...")
+            payload['long_document'] = True
+        
+        response = requests.post('http://localhost:5002/extract', 
+                               json=payload, timeout=max(30, len(text) // 2000))
+        
+        if response.status_code == 200:
+            result = response.json()
+            entity_count = result.get('entity_count', 0)
             
-            if response.status_code == 200:
-                result = response.json()
-                entity_count = result.get('entity_count', 0)
-                entities = result.get('entities', [])
-                
-                print(f"✅ Extracted {entity_count} entities")
-                return result
-            else:
-                print(f"❌ API error: {response.status_code}")
-                return None
+            if 'chunk_count' in result:
+                print(f"📊 Processed {result['chunk_count']} chunks")
+            print(f"✅ Extracted {entity_count} entities")
+            return result
         else:
-            # Split text into chunks
-            print(f"📝 Text too long ({len(text)} chars), splitting into chunks...")
-            chunks = []
-            for i in range(0, len(text), max_chars):
-                chunk = text[i:i + max_chars]
-                chunks.append(chunk)
-            
-            print(f"📊 Processing {len(chunks)} chunks...")
-            all_entities = []
-            total_processing_time = 0
-            
-            for i, chunk in enumerate(chunks):
-                print(f"🔄 Processing chunk {i+1}/{len(chunks)} ({len(chunk)} chars)...")
-                
-                response = requests.post('http://localhost:5002/extract', 
-                                       json={'text': chunk}, timeout=30)
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    entities = result.get('entities', [])
-                    processing_time = result.get('processing_time', 0.0)
-                    
-                    all_entities.extend(entities)
-                    total_processing_time += processing_time
-                    
-                    print(f"✅ Chunk {i+1}: {len(entities)} entities")
-                else:
-                    print(f"❌ Chunk {i+1} failed: {response.status_code}")
-                    print(f"📝 Error: {response.text}")
-                    continue
-            
-            # Remove duplicates across chunks
-            print("🧹 Removing duplicates across chunks...")
-            unique_entities = []
-            seen = set()
-            
-            for entity_text, entity_type in all_entities:
-                key = (entity_text.strip().lower(), entity_type)
-                if key not in seen:
-                    seen.add(key)
-                    unique_entities.append((entity_text, entity_type))
-            
-            print(f"✅ Total unique entities: {len(unique_entities)}")
-            
-            # Return combined result
-            return {
-                'entities': unique_entities,
-                'entity_count': len(unique_entities),
-                'processing_time': total_processing_time,
-                'success': True,
-                'timestamp': ''
-            }
+            print(f"❌ API error: {response.status_code}")
+            print(f"📝 Error: {response.text}")
+            return None
             
     except Exception as e:
         print(f"❌ API connection failed: {e}")
@@ -535,20 +423,18 @@ def filter_important_entities(entities: List[Tuple[str, str]]) -> List[Tuple[str
     
     return final_entities
 
-def save_results(result, output_path, pdf_path):
-    """Save results to JSON file with entity cleaning and importance filtering"""
-    if result is None:
-        print("❌ No results to save")
-        return
-    
-    raw_entities = result.get('entities', [])
-    
+def postprocess_entities_chained(raw_entities):
+    """Clean, validate and filter raw entities down to the important ones.
+
+    Returns a dict with the final entities (important ones plus expiration
+    dates, deduplicated), the important entities and the expiration dates.
+    Runs each step over the whole list in turn, as a reference for the
+    single-pass entity_filters.postprocess_entities used everywhere else.
+    """
     # Clean and validate entities
-    print(f"🧹 Cleaning {len(raw_entities)} raw entities...")
     cleaned_entities = clean_entities(raw_entities)
     
     # Reclassify misidentified entities
-    print("🔄 Reclassifying misidentified entities...")
     reclassified_entities = reclassify_misidentified_entities(cleaned_entities)
     
     # Additional quality validation
@@ -558,11 +444,9 @@ def save_results(result, output_path, pdf_path):
             validated_entities.append((entity_text, entity_type))
     
     # Filter for most important entities
-    print("⭐ Filtering for most important entities...")
     important_entities = filter_important_entities(validated_entities)
     
     # Extract expiration dates from the original entities
-    print("📅 Extracting expiration dates...")
     expiration_dates = extract_expiration_dates(validated_entities)
     
     # Add expiration dates to the important entities
@@ -578,6 +462,29 @@ def save_results(result, output_path, pdf_path):
             seen.add(key)
             final_entities.append((entity_text, entity_type))
     
+    return {
+        'entities': final_entities,
+        'important_entities': important_entities,
+        'expiration_dates': expiration_dates
+    }
+
+def save_results(result, output_path, pdf_path):
+    """Save results to JSON file with entity cleaning and importance filtering"""
+    if result is None:
+        print("❌ No results to save")
+        return
+    
+    raw_entities = result.get('entities', [])
+    
+    print(f"🧹 Cleaning {len(raw_entities)} raw entities...")
+    print("🔄 Reclassifying misidentified entities...")
+    print("⭐ Filtering for most important entities...")
+    print("📅 Extracting expiration dates...")
+    processed = postprocess_entities(raw_entities)
+    final_entities = processed['entities']
+    important_entities = processed['important_entities']
+    expiration_dates = processed['expiration_dates']
+    
     entity_count = len(final_entities)
     removed_count = len(raw_entities) - entity_count
     
@@ -643,7 +550,7 @@ def main():
         return
     
     # Extract text from PDF using direct method
-    text = extract_text_from_pdf_direct(pdf_path)
+    text = extract_text_from_pdf(pdf_path)
     if not text:
         print("❌ Failed to extract text from PDF")
         return
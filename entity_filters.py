@@ -0,0 +1,240 @@
+import re
+
+# The word lists and patterns of clean_pdf_entities' cleaning, validation,
+# reclassification, filtering and expiration steps, built once. Keyword
+# lists matched as substrings become one alternation; case-insensitive
+# pattern lists, one IGNORECASE alternation.
+
+
+def _any_of(words, flags=0):
+    """Regex that finds any of the literal words, anywhere"""
+    return re.compile('|'.join(re.escape(word) for word in words), flags)
+
+
+# clean_entities
+CLEAN_BLACKLIST = frozenset({
+    'to', 'of', 'and', 'in', 'with', 'as', 'by', 'for', 'on', 'at', 'from',
+    'the', 'a', 'an', 'or', 'but', 'not', 'be', 'is', 'are', 'was', 'were',
+    'that', 'this', 'these', 'those', 'it', 'they', 'them', 'their', 'its',
+    'certain', 'add', 'secure', 'support', 'facilitate', 'production', 'health',
+    'necessary', 'assistance', 'testing', 'evaluation', 'acquisition', 'drugs',
+    'excipients', 'components', 'activities', 'development', 'agreement',
+    'both', 'parties'
+})
+STOP_WORDS = frozenset({'to', 'of', 'and', 'in', 'with', 'as', 'by', 'for'})
+WHITESPACE = re.compile(r'\s+')
+
+# reclassify_misidentified_entities
+PERSON_OR_COMPANY = re.compile('|'.join([
+    r',\s*(President|Vice|CEO|Director|Manager|Attorney|Counsel)',
+    r'\b(Ltd|Inc|Corp|LLC|Company|Laboratories|Pharma|Funding|Finance|Commercial|Acquisition|Recovery|Solutions)\b',
+    r'^[A-Z][a-z]+,\s+[A-Z][a-z]+',
+    r'\b(Manager|By)\s+[A-Z]',
+    r'\b(ACQUISITION|COMPUTER|ASTA|OPTION|PALISADES|RECOVERY)\s+[A-Z]+',
+    r'\bFunding\b',
+    r'\bFinance\b',
+    r'\bCommercial\b'
+]), re.IGNORECASE)
+AGREEMENT_KEYWORDS = _any_of(['agreement', 'contract', 'terms', 'conditions', 'protocol', 'memorandum',
+                              'letter', 'commitment', 'loan', 'security'])
+
+# validate_entity_quality
+MAX_ENTITY_CHARS = 200
+DATE_LIKE = re.compile('|'.join([
+    r'\d{1,2}[/\-\.]\d{1,2}[/\-\.]\d{2,4}',
+    r'\d{1,2}\s+(January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{4}',
+    # Also finds everything the stricter 'Month day, year' pattern did
+    r'(January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{1,2},?',
+    r'\d{1,2}\s+(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+\d{4}'
+]), re.IGNORECASE)
+GENERIC_LOCATION_WORDS = _any_of(['assistance', 'testing', 'evaluation', 'acquisition', 'development', 'terms',
+                                  'conditions', 'covenants', 'rights', 'duties', 'obligations', 'guaranties',
+                                  'assurances', 'promises'])
+
+# filter_important_entities
+IMPORTANT_BLACKLIST = frozenset({
+    'representations', 'warranties', 'such', 'letters', 'numbers', 'hypothecated', 'assigned',
+    'conveyed', 'transferred', 'lost', 'stolen', 'including', 'without', 'that',
+    'whether', 'such', 'upon', 'shall', 'not', 'this', 'foregoing', 'than',
+    'give', 'if', 'refusal', 'which', 'than', 'that', 'give', 'timely', 'basis',
+    'counter', 'then', 'partnership', 'limited', 'liability', 'company', 'joint',
+    'venture', 'trust', 'organization', 'business', 'individual', 'government',
+    'requests', 'waivers', 'certified', 'mail', 'postage', 'prepaid', 'return',
+    'receipt', 'requested', 'addressed', 'supplements', 'amendments', 'related',
+    'definitions', 'all', 'county', 'any', 'action', 'suit', 'contemplated',
+    'herein', 'except', 'terms', 'thereof', 'hurdle', 'or', 'less',
+    'offered', 'shares', 'fair', 'otherwise', 'requires', 'comparable', 'section',
+    'pursuant', 'hereto', 'respect', 'any', 'thereof', 'in', 'pursuant',
+    'unconditionally', 'submits', 'for', 'itself', 'its', 'property', 'to',
+    'judgment', 'each', 'such', 'action', 'proceeding', 'unconditionally',
+    'waives', 'do', 'so', 'any', 'objection', 'irrevocably', 'waives',
+    'accordance', 'lexington', 'evidenced', 'hereby', 'there', 'transfer',
+    'taxes', 'authorization', 'execution', 'delivery', 'violation', 'constitute',
+    'with', 'or', 'any', 'lien', 'charge', 'impairment', 'forfeiture',
+    'material', 'permit', 'license', 'accordingly', 'purchased', 'hereunder',
+    'when', 'issued', 'sold', 'expressed', 'will', 'offer', 'sale', 'change',
+    'whatsoever', 'must', 'witness', 'whereof', 'parties', 'security',
+    'exemption', 'from', 'or', 'in', 'subject', 'to', 'the', 'registration',
+    'such', 'effect', 'the', 'substance', 'certificate', 'conditions', 'of',
+    'and', 'may', 'exercise', 'price', 'at', 'surrendered', 'value',
+    'received', 'foregoing', 'warrant', 'execute', 'alteration'
+})
+YEAR_DIGITS = re.compile(r'\d{4}')
+COMPANY_INDICATORS = _any_of(['LLC', 'Inc', 'Corp', 'Ltd', 'Company', 'Corporation', 'Group', 'Brothers',
+                              'Funding', 'Finance'])
+PERSON_INDICATORS = re.compile(r',\s*(President|Vice|CEO|Director|Manager|Attorney|Counsel|Esq)'
+                               r'|\b(Manager|By)\s+[A-Z]', re.IGNORECASE)
+FRAGMENT_STARTS = ('to ', 'of ', 'and ', 'in ', 'with ', 'as ', 'by ', 'for')
+KEY_AGREEMENTS = _any_of(['agreement', 'contract', 'warrant', 'security', 'loan', 'letter'])
+GENERIC_AGREEMENTS = frozenset({'terms', 'conditions', 'provisions'})
+LOCATION_INDICATORS = _any_of(['NY', 'NJ', 'USA', 'New York', 'California', 'Texas', 'Florida', 'Avenue',
+                               'Street', 'Bay Shore'])
+GENERIC_LOCATION_TERMS = _any_of(['terms', 'conditions', 'provisions', 'pursuant', 'accordance'])
+# '$' then a digit or comma is all that '\$[\d,]+\.?\d*' needs to be found
+MONEY = re.compile(r'\$[\d,]')
+PERIOD = re.compile(r'\d+\s+(days|months|years)', re.IGNORECASE)
+
+# extract_expiration_dates; the date patterns are tried in order, case-sensitively
+EXPIRATION_KEYWORDS = _any_of(['expire', 'expiration', 'expiring'])
+EXPIRATION_DATES = [re.compile(pattern) for pattern in [
+    r'\d{1,2}[/\-\.]\d{1,2}[/\-\.]\d{2,4}',
+    r'\d{1,2}\s+(january|february|march|april|may|june|july|august|september|october|november|december)\s+\d{4}',
+    r'(january|february|march|april|may|june|july|august|september|october|november|december)\s+\d{1,2},?\s+\d{4}',
+    r'\d{1,2}\s+(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)\s+\d{4}',
+    r'\b\d{4}\b'
+]]
+
+
+def _clean(entity_text, entity_type):
+    """(cleaned text, lowercased, its words) as clean_entities keeps it, or None"""
+    if not entity_text:
+        return None
+    stripped = entity_text.strip()
+    if len(stripped) < 3:
+        return None
+    cleaned = WHITESPACE.sub(' ', stripped)
+    lower = cleaned.lower()
+    words = lower.split()
+    if words[0] in STOP_WORDS or (len(words) == 1 and words[0] in CLEAN_BLACKLIST):
+        return None
+    if ((entity_type == 'PARTY' and len(words) <= 2) or (entity_type == 'LOCATION' and len(words) <= 3)) \
+            and not CLEAN_BLACKLIST.isdisjoint(words):
+        return None
+    return cleaned, lower, words
+
+
+def _reclassify(text, lower, entity_type):
+    """The type reclassify_misidentified_entities gives an entity"""
+    if entity_type == 'LOCATION':
+        if PERSON_OR_COMPANY.search(text):
+            return 'PARTY'
+        if AGREEMENT_KEYWORDS.search(lower):
+            return 'AGREEMENT_TYPE'
+    elif entity_type == 'PARTY' and AGREEMENT_KEYWORDS.search(lower):
+        return 'AGREEMENT_TYPE'
+    return entity_type
+
+
+def _valid(text, lower, entity_type):
+    """validate_entity_quality for a cleaned and reclassified entity.
+
+    Cleaning leaves at least three characters and no leading stop word,
+    and any LOCATION still matching a person or company pattern was
+    reclassified as a PARTY, so those checks cannot fail here.
+    """
+    if len(text) > MAX_ENTITY_CHARS:
+        return False
+    if entity_type == 'EFFECTIVE_DATE':
+        return DATE_LIKE.search(text) is not None
+    if entity_type == 'LOCATION':
+        return GENERIC_LOCATION_WORDS.search(lower) is None
+    if entity_type == 'AGREEMENT_TYPE':
+        return AGREEMENT_KEYWORDS.search(lower) is not None
+    return True
+
+
+def _important(text, lower, words, entity_type):
+    """Whether filter_important_entities keeps a validated entity"""
+    if not IMPORTANT_BLACKLIST.isdisjoint(words):
+        return False
+    if entity_type == 'EFFECTIVE_DATE':
+        return len(text) > 8 and YEAR_DIGITS.search(text) is not None
+    if entity_type == 'PARTY':
+        if COMPANY_INDICATORS.search(text) or PERSON_INDICATORS.search(text):
+            return True
+        return (len(words) <= 3 and not lower.startswith(FRAGMENT_STARTS)
+                and any(word.isupper() for word in text.split() if len(word) > 2))
+    if entity_type == 'AGREEMENT_TYPE':
+        return len(text) > 5 and lower not in GENERIC_AGREEMENTS and KEY_AGREEMENTS.search(lower) is not None
+    if entity_type == 'LOCATION':
+        return (len(words) <= 4 and LOCATION_INDICATORS.search(text) is not None
+                and GENERIC_LOCATION_TERMS.search(lower) is None)
+    if entity_type == 'AMOUNT':
+        return MONEY.search(text) is not None
+    if entity_type == 'DURATION':
+        return PERIOD.search(text) is not None
+    return False
+
+
+def _expiration_date(text, lower):
+    """The date an expiration-related entity names, or None"""
+    if EXPIRATION_KEYWORDS.search(lower) is None:
+        return None
+    for pattern in EXPIRATION_DATES:
+        match = pattern.search(text)
+        if match:
+            return match.group()
+    return None
+
+
+def postprocess_entities(raw_entities):
+    """clean_pdf_entities' post-processing chain in one pass over the entities.
+
+    Each entity is cleaned, reclassified, validated, checked for an
+    expiration date and filtered in turn, cheap set and length tests
+    before regexes, and dropped at the first step that rejects it. The
+    result is the same as running the steps one list at a time
+    (clean_pdf_entities.postprocess_entities_chained): a dict with the final entities, the
+    important ones and the expiration dates.
+    """
+    cleaned_seen = set()
+    important_seen = set()
+    important_entities = []
+    expiration_dates = []
+
+    for entity_text, entity_type in raw_entities:
+        cleaned = _clean(entity_text, entity_type)
+        if cleaned is None:
+            continue
+        text, lower, words = cleaned
+        key = (lower, entity_type)
+        if key in cleaned_seen:
+            continue
+        cleaned_seen.add(key)
+
+        entity_type = _reclassify(text, lower, entity_type)
+        if not _valid(text, lower, entity_type):
+            continue
+
+        date = _expiration_date(text, lower)
+        if date is not None:
+            expiration_dates.append((date, 'EXPIRATION_DATE'))
+
+        if _important(text, lower, words, entity_type):
+            key = (lower, entity_type)
+            if key not in important_seen:
+                important_seen.add(key)
+                important_entities.append((text, entity_type))
+
+    final_entities = list(important_entities)
+    for date in expiration_dates:
+        key = (date[0].strip().lower(), date[1])
+        if key not in important_seen:
+            important_seen.add(key)
+            final_entities.append(date)
+
+    return {
+        'entities': final_entities,
+        'important_entities': important_entities,
+        'expiration_dates': expiration_dates
+    }
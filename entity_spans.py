@@ -0,0 +1,97 @@
+from bisect import bisect_left
+
+# Confidence given to each source when spans overlap; ML wins ties with
+# rules, as the old text-based deduplication did
+ML_SCORE = 1.0
+RULE_SCORE = 0.8
+
+
+class EntitySpan:
+    """An entity as a character range of the original text"""
+
+    __slots__ = ('start', 'end', 'label', 'source', 'score')
+
+    def __init__(self, start, end, label, source, score):
+        self.start = start
+        self.end = end
+        self.label = label
+        self.source = source
+        self.score = score
+
+    def __repr__(self):
+        return f"EntitySpan({self.start}, {self.end}, {self.label!r}, {self.source!r}, {self.score})"
+
+    def __eq__(self, other):
+        if not isinstance(other, EntitySpan):
+            return NotImplemented
+        return (self.start, self.end, self.label, self.source, self.score) == \
+               (other.start, other.end, other.label, other.source, other.score)
+
+    def __hash__(self):
+        return hash((self.start, self.end, self.label, self.source, self.score))
+
+    def overlaps(self, other):
+        return self.start < other.end and other.start < self.end
+
+    def text(self, document):
+        return document[self.start:self.end]
+
+    def to_dict(self, document=None):
+        """JSON-friendly form, with the covered text if the document is given"""
+        span = {
+            'start': self.start,
+            'end': self.end,
+            'label': self.label,
+            'source': self.source,
+            'score': self.score
+        }
+        if document is not None:
+            span['text'] = document[self.start:self.end]
+        return span
+
+
+def _priority(span):
+    # Higher score first, then the longer span, then the earlier one
+    return (-span.score, span.start - span.end, span.start, span.label, span.source)
+
+
+def _resolve_cluster(cluster, kept):
+    """Greedily keep the best spans of one overlapping group"""
+    starts = []
+    ends = []
+    for span in sorted(cluster, key=_priority):
+        index = bisect_left(starts, span.start)
+        # Accepted spans never overlap, so only the neighbours can clash
+        if index > 0 and ends[index - 1] > span.start:
+            continue
+        if index < len(starts) and starts[index] < span.end:
+            continue
+        starts.insert(index, span.start)
+        ends.insert(index, span.end)
+        kept.append(span)
+
+
+def resolve_overlaps(spans):
+    """Return non-overlapping spans in document order.
+
+    A sorted sweep splits the spans into groups of transitively overlapping
+    ones; inside a group the highest scoring, then longest, span wins and
+    anything overlapping it is dropped. Identical inputs always give the
+    same result, whatever order they come in.
+    """
+    spans = sorted((span for span in spans if span.end > span.start), key=lambda span: (span.start, span.end))
+    kept = []
+    cluster = []
+    cluster_end = -1
+    for span in spans:
+        if cluster and span.start >= cluster_end:
+            _resolve_cluster(cluster, kept)
+            cluster = []
+        cluster.append(span)
+        cluster_end = max(cluster_end, span.end) if len(cluster) > 1 else span.end
+
+    if cluster:
+        _resolve_cluster(cluster, kept)
+
+    kept.sort(key=lambda span: (span.start, span.end))
+    return kept
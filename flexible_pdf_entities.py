@@ -8,88 +8,48 @@ import sys
 import os
 import json
 import requests
-import subprocess
 from collections import defaultdict
 
-def extract_text_from_pdf_via_container(pdf_path):
-    """Extract text using existing legal-ner-api container"""
-    try:
-        print(f"📄 Extracting text from: {pdf_path}")
-        
-        # Get the container ID
-        result = subprocess.run(['docker', 'ps', '--filter', 'name=legal-ner-api', '--format', '{{.ID}}'], 
-                              capture_output=True, text=True)
-        
-        if not result.stdout.strip():
-            print("❌ legal-ner-api container not running")
-            return None
-        
-        container_id = result.stdout.strip()
-        
-        # Copy PDF into container
-        subprocess.run(['docker', 'cp', pdf_path, f'{container_id}:/tmp/input.pdf'], check=True)
-        
-        # Extract text inside container
-        cmd = [
-            'docker', 'exec', container_id,
-            'python', '-c',
-            '''
-import fitz
-from pdf2image import convert_from_path
-import pytesseract
+from src.ocr.pdf_extractor import ExtractionPool
+from stage_pipeline import Stage, StagePipeline
 
-doc = fitz.open("/tmp/input.pdf")
-text = ""
+# Requests the API stage keeps open at once
+API_WORKERS = 4
 
-# Try direct text extraction first
-for page in doc:
-    page_text = page.get_text()
-    text += page_text + "\\n"
+def report_extraction(pdf_path, extracted):
+    """Print what extraction found and return the text"""
+    text = extracted['text']
+    counts = extracted['page_methods']
+    print(f"✅ Extracted {len(text)} characters from {pdf_path} ({counts['digital']} text layer pages, "
+          f"{counts['scanned']} OCR, {extracted['cached_pages']} from cache)")
+    print(f"📝 Preview: {text[:200]}...")
+    return text
 
-# If no text found, use OCR
-if not text.strip():
-    print("Using OCR for scanned PDF...")
+def extract_entities_via_api(text, verbose=True):
+    """Extract entities using running Docker API; long texts use its chunked long_document mode"""
     try:
-        images = convert_from_path("/tmp/input.pdf", dpi=200)
-        for i, image in enumerate(images):
-            ocr_text = pytesseract.image_to_string(image)
-            text += ocr_text + "\\n"
-    except Exception as e:
-        print(f"OCR failed: {e}")
-
-print(text)
-'''
-        ]
+        if verbose:
+            print("🌐 Sending to API...")
         
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        
-        if result.returncode == 0:
-            text = result.stdout.strip()
-            print(f"✅ Extracted {len(text)} characters")
-            print(f"📝 Preview: {text[:200]}...")
-            return text
-        else:
-            print(f"❌ Container extraction failed: {result.stderr}")
-            return None
-            
-    except Exception as e:
-        print(f"❌ PDF extraction failed: {e}")
-        return None
-
-def extract_entities_via_api(text):
-    """Extract entities using running Docker API"""
-    try:
-        print("🌐 Sending to API...")
+        # The API splits long texts on sentence boundaries itself and
+        # stitches the entity offsets back together
+        max_chars = 10000
+        payload = {'text': text}
+        if len(text) > max_chars:
+            if verbose:
+                print(f"📝 Text is long ({len(text)} chars), using long-document mode...")
+            payload['long_document'] = True
         
         response = requests.post('http://localhost:5001/extract', 
-                               json={'text': text}, timeout=30)
+                               json=payload, timeout=max(30, len(text) // 2000))
         
         if response.status_code == 200:
             result = response.json()
             entity_count = result.get('entity_count', 0)
             entities = result.get('entities', [])
             
-            print(f"✅ Extracted {entity_count} entities")
+            if verbose:
+                print(f"✅ Extracted {entity_count} entities")
             return result
         else:
             print(f"❌ API error: {response.status_code}")
@@ -130,38 +90,68 @@ def save_results(result, output_path, pdf_path):
     for entity, label in entities:
         print(f"  {entity} → {label}")
 
-def process_multiple_pdfs(pdf_files):
-    """Process multiple PDFs and combine results"""
+def build_api_pipeline(pool):
+    """Extraction and API calls as overlapping stages"""
+    def extract(pdf_path):
+        extracted = pool.extract(pdf_path)
+        if not extracted['text'].strip():
+            raise ValueError('no text found')
+        return {'pdf_path': pdf_path, 'extracted': extracted}
+
+    def call_api(document):
+        result = extract_entities_via_api(document['extracted']['text'], verbose=False)
+        if not result:
+            raise RuntimeError('API request failed')
+        document['result'] = {'combined_entities': result.get('entities', [])}
+        return document
+
+    return StagePipeline([
+        Stage('extract', extract, workers=pool.workers),
+        Stage('api', call_api, workers=API_WORKERS)
+    ])
+
+def process_multiple_pdfs(pdf_files, local=False, workers=None):
+    """Process multiple PDFs and combine results
+
+    Files go through a staged pipeline: while one is at the API (or, with
+    ``local``, in the model loaded here) the next ones are being
+    extracted by warm worker processes.
+    """
     all_results = []
     combined_entities = defaultdict(list)
     
-    for i, pdf_path in enumerate(pdf_files, 1):
-        print(f"\n📄 Processing PDF {i}/{len(pdf_files)}: {pdf_path}")
-        
-        # Extract text from PDF
-        text = extract_text_from_pdf_via_container(pdf_path)
-        if not text:
-            print(f"❌ Failed to extract text from {pdf_path}")
-            continue
-        
-        # Extract entities
-        result = extract_entities_via_api(text)
-        if not result:
-            print(f"❌ Failed to extract entities from {pdf_path}")
-            continue
-        
-        entities = result.get('entities', [])
-        
-        # Add to combined results
-        for entity, label in entities:
-            combined_entities[label].append(entity)
+    workers = workers or min(len(pdf_files), os.cpu_count() or 1)
+    with ExtractionPool(workers=workers) as pool:
+        if local:
+            from hybrid_ner import HybridLegalNER
+            from pdf_pipeline import build_pdf_pipeline
+            pipeline = build_pdf_pipeline(HybridLegalNER(), pool)
+        else:
+            pipeline = build_api_pipeline(pool)
         
-        all_results.append({
-            "pdf_file": pdf_path,
-            "entities": entities,
-            "entity_count": len(entities),
-            "entity_types": list(set(label for _, label in entities))
-        })
+        for i, (pdf_path, document, error) in enumerate(pipeline.run(pdf_files), 1):
+            print(f"\n📄 Processing PDF {i}/{len(pdf_files)}: {pdf_path}")
+            
+            if error is not None:
+                print(f"❌ Failed to process {pdf_path}: {error}")
+                continue
+            report_extraction(pdf_path, document['extracted'])
+            
+            entities = document['result']['combined_entities']
+            print(f"✅ Extracted {len(entities)} entities")
+            
+            # Add to combined results
+            for entity, label in entities:
+                combined_entities[label].append(entity)
+            
+            all_results.append({
+                "pdf_file": pdf_path,
+                "entities": entities,
+                "entity_count": len(entities),
+                "entity_types": list(set(label for _, label in entities))
+            })
+    
+    print(f"\n⏱️  Pipeline stages:\n{pipeline.format_stats()}")
     
     # Create combined output
     output = {
@@ -190,13 +180,19 @@ def process_multiple_pdfs(pdf_files):
 
 def main():
     if len(sys.argv) < 2:
-        print("Usage: python flexible_pdf_entities.py <pdf1> [pdf2] ...")
+        print("Usage: python flexible_pdf_entities.py [--local] [--workers=N] <pdf1> [pdf2] ...")
         print("\nExamples:")
         print("  python flexible_pdf_entities.py pdf1.pdf pdf2.pdf")
         print("  python flexible_pdf_entities.py 'data/raw pdfs/Digital/digital_pdf16.pdf' 'data/raw pdfs/Scanned/scanned_pdf4.pdf'")
+        print("  python flexible_pdf_entities.py --local pdf1.pdf pdf2.pdf   # model loaded here, no API")
         return
     
-    pdf_files = sys.argv[1:]
+    local = "--local" in sys.argv[1:]
+    workers = None
+    for arg in sys.argv[1:]:
+        if arg.startswith("--workers="):
+            workers = int(arg.split("=", 1)[1])
+    pdf_files = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
     
     if not pdf_files:
         print("❌ No PDF files provided")
@@ -205,21 +201,22 @@ def main():
     print("🚀 FLEXIBLE PDF to Entity Extraction Pipeline")
     print("=" * 55)
     
-    # Check if API is running
-    try:
-        health_response = requests.get('http://localhost:5001/health', timeout=5)
-        if health_response.status_code != 200:
+    if not local:
+        # Check if API is running
+        try:
+            health_response = requests.get('http://localhost:5001/health', timeout=5)
+            if health_response.status_code != 200:
+                print("❌ API is not running. Start Docker container first:")
+                print("   docker start legal-ner-api")
+                return
+            print("✅ API is running")
+        except:
             print("❌ API is not running. Start Docker container first:")
             print("   docker start legal-ner-api")
             return
-        print("✅ API is running")
-    except:
-        print("❌ API is not running. Start Docker container first:")
-        print("   docker start legal-ner-api")
-        return
     
     # Process all PDFs
-    all_results = process_multiple_pdfs(pdf_files)
+    all_results = process_multiple_pdfs(pdf_files, local=local, workers=workers)
     
     if all_results:
         print(f"\n🎉 SUCCESS! Processed {len(all_results)} PDFs")
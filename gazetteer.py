@@ -0,0 +1,138 @@
+import os
+import re
+from itertools import accumulate
+
+GAZETTEER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'gazetteers')
+
+# A word, or any other non-space character, with the whitespace before it
+TOKEN_PATTERN = re.compile(r'\s*(?:\w+|[^\w\s])')
+
+
+class TokenStream:
+    """Lowercased tokens of a text, with enough bookkeeping to recover offsets"""
+
+    __slots__ = ('words', 'pieces', 'ends')
+
+    def __init__(self, words, pieces, ends):
+        self.words = words
+        self.pieces = pieces
+        self.ends = ends
+
+    def __len__(self):
+        return len(self.words)
+
+    def start(self, index):
+        return self.ends[index] - len(self.pieces[index].lstrip())
+
+    def follows_space(self, index):
+        return self.pieces[index][:1].isspace()
+
+
+def tokenize(text):
+    """Split text into a TokenStream of lowercase words and punctuation"""
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        pieces = TOKEN_PATTERN.findall(lowered)
+        words = [piece.lstrip() for piece in pieces]
+    else:
+        # Some characters expand when lowercased, so offsets into the
+        # lowered copy would drift; lowercase token by token instead.
+        pieces = TOKEN_PATTERN.findall(text)
+        words = [piece.lstrip().lower() for piece in pieces]
+    return TokenStream(words, pieces, list(accumulate(map(len, pieces))))
+
+
+class Gazetteer:
+    """Token-level trie over a list of phrases.
+
+    Matching walks the trie from each token and keeps the longest phrase,
+    so the cost is linear in the number of tokens and bounded by the
+    longest phrase, not by how many phrases are in the list. Phrases match
+    case-insensitively on whole tokens; a space in a phrase matches any run
+    of whitespace, and tokens written without a space must be adjacent.
+    """
+
+    def __init__(self, entries=(), name=None):
+        self.name = name
+        self._root = {}
+        self._size = 0
+        for entry in entries:
+            self.add(entry)
+
+    @classmethod
+    def from_file(cls, path, name=None):
+        """Load one phrase per line, skipping blanks and # comments"""
+        with open(path, 'r', encoding='utf-8') as f:
+            entries = [line.strip() for line in f]
+        entries = [entry for entry in entries if entry and not entry.startswith('#')]
+        return cls(entries, name=name or os.path.splitext(os.path.basename(path))[0])
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        """Every phrase in the trie, in no particular order"""
+        stack = list(self._root.values())
+        while stack:
+            children, entry = stack.pop()
+            if entry is not None:
+                yield entry
+            stack.extend(children.values())
+
+    def add(self, entry):
+        """Add a phrase to the trie"""
+        tokens = tokenize(entry)
+        if not len(tokens):
+            return
+
+        # The first token is keyed on its text alone; later tokens also
+        # record whether whitespace separates them from the previous one.
+        node = self._root.setdefault(tokens.words[0], [{}, None])
+        for index in range(1, len(tokens)):
+            key = (tokens.words[index], tokens.follows_space(index))
+            node = node[0].setdefault(key, [{}, None])
+
+        if node[1] is None:
+            self._size += 1
+        node[1] = entry
+
+    def find_tokens(self, tokens):
+        """Return (start, end, entry) for leftmost-longest, non-overlapping matches"""
+        matches = []
+        root = self._root
+        words = tokens.words
+        count = len(words)
+        i = 0
+
+        while i < count:
+            node = root.get(words[i])
+            if node is None:
+                i += 1
+                continue
+
+            best_end, best_entry = (i, node[1]) if node[1] is not None else (None, None)
+            j = i + 1
+            while j < count and node[0]:
+                node = node[0].get((words[j], tokens.follows_space(j)))
+                if node is None:
+                    break
+                if node[1] is not None:
+                    best_end, best_entry = j, node[1]
+                j += 1
+
+            if best_end is None:
+                i += 1
+                continue
+            matches.append((tokens.start(i), tokens.ends[best_end], best_entry))
+            i = best_end + 1
+
+        return matches
+
+    def find(self, text):
+        """Return (start, end, entry) for every phrase found in the text"""
+        return self.find_tokens(tokenize(text))
+
+
+def load_gazetteer(name):
+    """Load a bundled list from data/gazetteers, e.g. load_gazetteer('company_suffixes')"""
+    return Gazetteer.from_file(os.path.join(GAZETTEER_DIR, name + '.txt'), name=name)
@@ -0,0 +1,96 @@
+"""
+Gunicorn settings for serving the NER API in production:
+
+    gunicorn -c gunicorn.conf.py api:app
+
+The app, and with it the spaCy model, is loaded once in the master before
+any worker is forked, so workers share the model's memory copy-on-write
+instead of each loading a copy. Workers are recycled after a number of
+requests, or once their interned strings or resident memory pass the
+limits in api.py, and finish the requests they are serving first; the
+replacement starts from the master's clean vocabulary. ``kill -HUP
+<master pid>`` reloads the model in the master and replaces the workers
+the same graceful way.
+"""
+
+import gc
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('API_PORT', 5001)}"
+
+# One single-threaded process per core. NER_WORKER_THREADS above 1 turns
+# these into gthread workers, whose concurrent short /extract requests
+# api.py's BatchDispatcher coalesces into one model batch; other requests
+# and PDF jobs still run the model on their own threads. Sync stays the
+# default because gunicorn 21's gthread worker resets connections it has
+# accepted but not read when it recycles: with max_requests at 20, 8 and 9
+# of 400 concurrent /extract calls failed under gthread, none under sync.
+workers = int(os.environ.get('NER_WORKERS', multiprocessing.cpu_count()))
+threads = int(os.environ.get('NER_WORKER_THREADS', 1))
+worker_class = 'gthread' if threads > 1 else 'sync'
+
+# A sync worker has no concurrent requests to batch with; api.py then
+# runs each request straight through the model
+if threads == 1:
+    os.environ.setdefault('NER_BATCH_WAIT_MS', '0')
+
+# Every worker that OCRs a PDF job starts its own pool of OCR processes;
+# split the cores between them rather than giving each worker all of them
+os.environ.setdefault('OCR_WORKERS', str(max(1, multiprocessing.cpu_count() // workers)))
+
+# Each worker writes its metrics here so /metrics on any of them covers all
+os.environ.setdefault('NER_METRICS_DIR', os.path.join('data', 'cache', 'metrics'))
+
+preload_app = True
+timeout = 120
+graceful_timeout = 60
+
+# Recycle workers after this many requests, jittered so they don't all
+# restart at once
+max_requests = int(os.environ.get('NER_MAX_REQUESTS', 5000))
+max_requests_jitter = max_requests // 10
+
+
+def when_ready(server):
+    # Everything loaded so far lives as long as the master. Moving it out of
+    # the collector's reach stops collections in the workers from writing
+    # to, and so copying, the shared pages.
+    gc.freeze()
+    # Start counting afresh rather than adding to a previous run's totals
+    import metrics
+    metrics.registry.clear_directory()
+    server.log.info("Model loaded in master; forking %s workers", server.cfg.workers)
+
+
+def on_reload(server):
+    """On HUP, load the model again before the new workers are forked"""
+    import api
+
+    gc.unfreeze()
+    api.load_ner_system()
+    gc.freeze()
+    server.log.info("Model reloaded")
+
+
+def post_fork(server, worker):
+    """Over its memory limits, a worker retires instead of reloading the model"""
+    import api
+
+    def retire(reason):
+        worker.log.info("Worker %s recycling: %s", worker.pid, reason)
+        worker.alive = False
+
+    api.memory_guard.on_limit = retire
+    # Long /stream_extract responses report progress after every batch, so
+    # only a stream that stops moving hits the worker timeout
+    api.heartbeat = worker.notify
+    # PDF jobs left unfinished by the worker this one replaces start again here
+    api.pdf_jobs.recover()
+
+
+def worker_exit(server, worker):
+    """Write the worker's final metrics so its counts outlive it"""
+    import metrics
+
+    metrics.registry.flush(force=True)
@@ -1,172 +1,256 @@
-import spacy
+import hashlib
 import re
+from model_registry import load_model, release_model, model_fingerprint
 from ner_preprocessor import LegalNERPreprocessor
+from rule_engine import RuleEngine, RuleFamily
+from gazetteer import load_gazetteer
+from entity_spans import resolve_overlaps
+from chunker import split_chunks, stitch_spans, DEFAULT_CHUNK_CHARS, DEFAULT_OVERLAP_CHARS
+from text_normalizer import NORMALIZATION_STEPS
+from metrics import STAGE_SECONDS
+
+MONTH_ABBREVIATIONS = r'(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)'
+MONTH_ANCHORS = ('jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec')
+
+# Party validation indicators
+COMPANY_INDICATORS = ('Inc', 'Corp', 'LLC', 'Ltd', 'L.P.', 'PLC', 'Group', 'Holdings', 'Company', 'Corporation', 'Trust', 'Fund')
+PERSON_INDICATORS = ('Jr', 'Sr', 'II', 'III', 'IV', 'Esq', 'Inc', 'Corp')
+TRUST_INDICATORS = ('Trust', 'Fund', 'Foundation', 'Endowment')
+
+
+def accept_party(party_name):
+    """Accept if it has clear indicators or is a proper name pattern"""
+    return (any(indicator in party_name for indicator in COMPANY_INDICATORS) or
+            any(indicator in party_name for indicator in PERSON_INDICATORS) or
+            any(indicator in party_name for indicator in TRUST_INDICATORS) or
+            'between' in party_name or 'to' in party_name or 'by' in party_name)
+
+
+# Rule families, in output order. Each gate is a lowercase regex that matches
+# at the start of every match of its family's patterns; only gate positions
+# are tried, so each family costs a single pass over the text. Anchors are
+# literals every match contains; paragraphs without one are skipped.
+RULE_FAMILIES = [
+    # Amount patterns (very high precision)
+    RuleFamily('AMOUNT', [
+        r'\$\s*\d{1,3}(?:,\d{3})*(?:\.\d{2})?(?:\s*(?:billion|million|thousand|trillion|hundred))?',
+        r'\d{1,3}(?:,\d{3})*(?:\.\d{2})?\s*(?:billion|million|thousand|trillion|hundred)?\s*(?:USD|dollars?)',
+        r'(?:USD|\$)\s*\d+(?:,\d{3})*(?:\.\d{2})?(?:\s*(?:billion|million|thousand|trillion|hundred))?',
+        r'\d+(?:\.\d+)?\s*(?:billion|million|thousand|trillion|hundred)\s+(?:USD|dollars?)',
+        r'(?:USD|\$)\s*\d+(?:,\d{3})*(?:\.\d{2})?',
+        r'\$\s*\d+(?:,\d{3})*(?:\.\d{2})?'
+    ], gate=r'\$|usd'
+            r'|\d{1,3}(?:,\d{3})*(?:\.\d{2})?\s*(?:billion|million|thousand|trillion|hundred)?\s*(?:usd|dollar)'
+            r'|\d+(?:\.\d+)?\s*(?:billion|million|thousand|trillion|hundred)\s+(?:usd|dollar)',
+       anchors=('$', 'usd', 'dollar')),
+
+    # Date patterns
+    RuleFamily('EFFECTIVE_DATE', [
+        r'\b(?:January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{1,2},?\s*\d{4}\b',
+        r'\b\d{1,2}\s+(?:January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{4}\b',
+        r'\b(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+\d{1,2},?\s*\d{4}\b',
+        r'\b\d{1,2}/\d{1,2}/\d{4}\b',
+        r'\b\d{1,2}-\d{1,2}-\d{4}\b',
+        r'\b(?:January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{1,2},?\s*\d{4}\b(?:\s+and\s+|\s+until\s+|\s+terminate[sd]?\s+|\s+effective\s+)',
+        r'\b(?:as\s+of\s+)?(?:January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{1,2},?\s*\d{4}\b'
+    ], gate=r'\b(?:' + MONTH_ABBREVIATIONS + r'[a-z]*\s+\d'
+            r'|as\s+of\s+' + MONTH_ABBREVIATIONS +
+            r'|\d{1,2}(?:\s+' + MONTH_ABBREVIATIONS + r'|/|-))',
+       anchors=MONTH_ANCHORS + (re.compile(r'\d[/-]\d'),)),
+
+    # Expiration date patterns
+    RuleFamily('EXPIRATION_DATE', [
+        r'\b(?:January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{1,2},?\s*\d{4}\b(?:\s+and\s+|\s+until\s+|\s+terminate[sd]?\s+)',
+        r'\b(?:expire[sd]?|terminate[sd]?|end[sd]?)\s+(?:on\s+)?(?:January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{1,2},?\s*\d{4}\b',
+        r'\b(?:January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{1,2},?\s*\d{4}\b(?:\s+and\s+|\s+until\s+|\s+terminate[sd]?\s+)'
+    ], gate=r'\b(?:' + MONTH_ABBREVIATIONS + r'[a-z]*\s+\d|(?:expire|terminate|end)[sd]?\s)',
+       anchors=MONTH_ANCHORS),
+
+    # Agreement type patterns (more precise)
+    RuleFamily('AGREEMENT_TYPE', [
+        r'\b[A-Z]*[a-z]*\s*agreement\b',
+        r'\b[A-Z]*[a-z]*\s*contract\b',
+        r'\b[A-Z]*[a-z]*\s*pact\b',
+        r'\b[A-Z]*[a-z]*\s*understanding\b',
+        r'\b[A-Z]*[a-z]*\s*memorandum\b',
+        r'\b[A-Z]*[a-z]*\s*letter\s+(?:agreement|contract|understanding)\b',
+        r'\b[A-Z]*[a-z]*\s*protocol\b',
+        r'\b[A-Z]*[a-z]*\s*arrangement\b',
+        r'\b[A-Z]*[a-z]*\s*commitment\b',
+        r'\b[A-Z]*[a-z]*\s*instrument\b',
+        r'\b[A-Z]*[a-z]*\s*settlement\b',
+        r'\b[A-Z]*[a-z]*\s*accord\b',
+        r'\b[A-Z]*[a-z]*\s*covenant\b',
+        r'\b[A-Z]*[a-z]*\s*deed\b',
+        r'\b[A-Z]*[a-z]*\s*indenture\b',
+        r'\b[A-Z]*[a-z]*\s*prospectus\b',
+        r'\b[A-Z]*[a-z]*\s*statement\s+(?:of\s+additional\s+information)?\b',
+        r'\b[A-Z]*[a-z]*\s*policy\b',
+        r'\b[A-Z]*[a-z]*\s*terms\s+(?:and\s+conditions)?\b'
+    ], gate=r'\b[a-z]*\s*(?:a(?:greement|rrangement|ccord)|c(?:ontract|ommitment|ovenant)|p(?:act|olicy|rospectus|rotocol)'
+            r'|understanding|memorandum|letter|instrument|s(?:ettlement|tatement)|deed|indenture|terms)',
+       anchors=('agreement', 'contract', 'pact', 'understanding', 'memorandum', 'protocol', 'arrangement',
+                'commitment', 'instrument', 'settlement', 'accord', 'covenant', 'deed', 'indenture',
+                'prospectus', 'statement', 'policy', 'terms')),
+
+    # Location patterns (more precise)
+    RuleFamily('LOCATION', [
+        r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)?,\s*[A-Z][A-Z]+\b',
+        r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)?,\s*[A-Z][a-z]+\s+[A-Z][a-z]+\b'
+    ], gate=r'\b[a-z]{2,}(?:\s+[a-z]{2,})?,',
+       # City and country names live in data/gazetteers so the lists can grow
+       # without slowing the scan down
+       gazetteers=[load_gazetteer('us_cities'), load_gazetteer('countries')]),
+
+    # Duration patterns (more precise)
+    RuleFamily('DURATION', [
+        r'\b\d+(?:\.\d+)?\s*(?:years?|yrs?)\b(?!\s+of\s+age)',
+        r'\b\d+(?:\.\d+)?\s*(?:months?|mos?)\b(?!\s+of\s+age)',
+        r'\b\d+(?:\.\d+)?\s*(?:weeks?|wks?)\b(?!\s+of\s+age)',
+        r'\b\d+(?:\.\d+)?\s*(?:days?)\b(?!\s+of\s+age)',
+        r'\b(?:one|two|three|four|five|six|seven|eight|nine|ten|eleven|twelve|thirteen|fourteen|fifteen|sixteen|seventeen|eighteen|nineteen|twenty|thirty|forty|fifty|sixty|seventy|eighty|ninety|hundred)\s+(?:years?|yrs?)\b',
+        r'\b(?:per\s+annum|annually|yearly|monthly|quarterly|weekly|daily)\b(?!\s+of\s+age)'
+    ], gate=r'\b(?:\d+(?:\.\d+)?\s*(?:y|mo|w|d)'
+            r'|(?:one|two|three|four|five|six|seven|eight|nine|ten|eleven|twelve|thirteen|fourteen|fifteen|sixteen|seventeen'
+            r'|eighteen|nineteen|twenty|thirty|forty|fifty|sixty|seventy|eighty|ninety|hundred)\s+y'
+            r'|per\s+annum|annually|yearly|monthly|quarterly|weekly|daily)',
+       anchors=('yr', 'year', 'mo', 'wk', 'week', 'day', 'daily', 'annu', 'quarterly')),
+
+    # Percentage patterns
+    RuleFamily('PERCENTAGE', [
+        r'\b\d+(?:\.\d+)?\s*%\b',
+        r'\b\d+(?:\.\d+)?\s*percent\b',
+        r'\b\d+(?:\.\d+)?\s*percentage\b'
+    ], gate=r'\b\d+(?:\.\d+)?\s*(?:%|percent)',
+       anchors=('%', 'percent')),
+
+    # PARTY patterns - comprehensive
+    RuleFamily('PARTY', [
+        # Company names with indicators
+        r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)?\s+(?:Inc\.?|Corp\.?|LLC|Ltd\.?|L\.P\.?|PLC|Group|Holdings|Company|Corporation|Trust|Fund)\b',
+        r'\b[A-Z][a-z]+\s+(?:Management|Advisors|Investments|Financial|Capital|Global|International|National|American|First|Second|Third)\s+(?:Inc\.?|Corp\.?|LLC|Ltd\.?)\b',
+        # Person names (legal documents)
+        r'\b[A-Z][a-z]+\s+[A-Z][a-z]+(?:\s+[A-Z][a-z]+)?\s+(?:Jr\.?|Sr\.?|II|III|IV|Esq\.?)\b',
+        r'\b[A-Z][a-z]+\s+[A-Z]\.\s+[A-Z][a-z]+\b',
+        # Trust and Fund names
+        r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)?\s+(?:Trust|Fund|Foundation|Endowment)\b',
+        # Clear party indicators
+        r'\bbetween\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)\s+and\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)',
+        r'\bto\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)',
+        r'\bby\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)'
+    ], gate=r'\b(?:between\s|to\s|by\s|[a-z]{2,}\s+[a-z]\.\s'
+            r'|[a-z]{2,}\s+(?:[a-z]{2,}\s+){0,2}(?:inc|corp|llc|ltd|l\.p|plc|group|holdings|company|trust|fund|foundation|endowment'
+            r'|management|advisors|investments|financial|capital|global|international|national|american|first|second|third'
+            r'|jr|sr|ii|iv|esq))',
+       accept=accept_party),
+]
+
 
 class HybridLegalNER:
     def __init__(self, model_path="training_output/best_model"):
-        self.nlp = spacy.load(model_path)
+        # Both share the one pipeline held by the model registry
+        self.model_path = model_path
+        self.nlp = load_model(model_path)
         self.preprocessor = LegalNERPreprocessor(model_path)
+        self.rule_engine = RuleEngine(RULE_FAMILIES)
+        self._fingerprint = None
+
+    @property
+    def fingerprint(self):
+        """Hash of the model files, rule set and normalization steps.
+
+        Results for the same text are only reusable while this is unchanged.
+        """
+        if self._fingerprint is None:
+            steps = repr([(pattern.pattern, replacement) for pattern, replacement in NORMALIZATION_STEPS])
+            digest = hashlib.sha256()
+            for part in (model_fingerprint(self.model_path), self.rule_engine.version, steps):
+                digest.update(part.encode('utf-8') + b'\0')
+            self._fingerprint = digest.hexdigest()[:16]
+        return self._fingerprint
+
+    def close(self):
+        """Release the shared model"""
+        if self.nlp is not None:
+            release_model(self.model_path)
+            self.nlp = None
+        self.preprocessor.close()
     
     def extract_with_rules(self, text):
         """Rule-based extraction for high-precision patterns"""
-        entities = []
-        
-        # Amount patterns (very high precision)
-        amount_patterns = [
-            r'\$\s*\d{1,3}(?:,\d{3})*(?:\.\d{2})?(?:\s*(?:billion|million|thousand|trillion|hundred))?',
-            r'\d{1,3}(?:,\d{3})*(?:\.\d{2})?\s*(?:billion|million|thousand|trillion|hundred)?\s*(?:USD|dollars?)',
-            r'(?:USD|\$)\s*\d+(?:,\d{3})*(?:\.\d{2})?(?:\s*(?:billion|million|thousand|trillion|hundred))?',
-            r'\d+(?:\.\d+)?\s*(?:billion|million|thousand|trillion|hundred)\s+(?:USD|dollars?)',
-            r'(?:USD|\$)\s*\d+(?:,\d{3})*(?:\.\d{2})?',
-            r'\$\s*\d+(?:,\d{3})*(?:\.\d{2})?'
-        ]
-        
-        for pattern in amount_patterns:
-            matches = re.finditer(pattern, text, re.IGNORECASE)
-            for match in matches:
-                entities.append((match.group().strip(), 'AMOUNT'))
-        
-        # Date patterns
-        date_patterns = [
-            r'\b(?:January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{1,2},?\s*\d{4}\b',
-            r'\b\d{1,2}\s+(?:January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{4}\b',
-            r'\b(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+\d{1,2},?\s*\d{4}\b',
-            r'\b\d{1,2}/\d{1,2}/\d{4}\b',
-            r'\b\d{1,2}-\d{1,2}-\d{4}\b',
-            r'\b(?:January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{1,2},?\s*\d{4}\b(?:\s+and\s+|\s+until\s+|\s+terminate[sd]?\s+|\s+effective\s+)',
-            r'\b(?:as\s+of\s+)?(?:January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{1,2},?\s*\d{4}\b'
-        ]
-        
-        for pattern in date_patterns:
-            matches = re.finditer(pattern, text, re.IGNORECASE)
-            for match in matches:
-                entities.append((match.group().strip(), 'EFFECTIVE_DATE'))
-        
-        # Expiration date patterns
-        expiration_patterns = [
-            r'\b(?:January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{1,2},?\s*\d{4}\b(?:\s+and\s+|\s+until\s+|\s+terminate[sd]?\s+)',
-            r'\b(?:expire[sd]?|terminate[sd]?|end[sd]?)\s+(?:on\s+)?(?:January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{1,2},?\s*\d{4}\b',
-            r'\b(?:January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{1,2},?\s*\d{4}\b(?:\s+and\s+|\s+until\s+|\s+terminate[sd]?\s+)'
-        ]
-        
-        for pattern in expiration_patterns:
-            matches = re.finditer(pattern, text, re.IGNORECASE)
-            for match in matches:
-                entities.append((match.group().strip(), 'EXPIRATION_DATE'))
-        
-        # Agreement type patterns (more precise)
-        agreement_patterns = [
-            r'\b[A-Z]*[a-z]*\s*agreement\b',
-            r'\b[A-Z]*[a-z]*\s*contract\b',
-            r'\b[A-Z]*[a-z]*\s*pact\b',
-            r'\b[A-Z]*[a-z]*\s*understanding\b',
-            r'\b[A-Z]*[a-z]*\s*memorandum\b',
-            r'\b[A-Z]*[a-z]*\s*letter\s+(?:agreement|contract|understanding)\b',
-            r'\b[A-Z]*[a-z]*\s*protocol\b',
-            r'\b[A-Z]*[a-z]*\s*arrangement\b',
-            r'\b[A-Z]*[a-z]*\s*commitment\b',
-            r'\b[A-Z]*[a-z]*\s*instrument\b',
-            r'\b[A-Z]*[a-z]*\s*settlement\b',
-            r'\b[A-Z]*[a-z]*\s*accord\b',
-            r'\b[A-Z]*[a-z]*\s*covenant\b',
-            r'\b[A-Z]*[a-z]*\s*deed\b',
-            r'\b[A-Z]*[a-z]*\s*indenture\b',
-            r'\b[A-Z]*[a-z]*\s*prospectus\b',
-            r'\b[A-Z]*[a-z]*\s*statement\s+(?:of\s+additional\s+information)?\b',
-            r'\b[A-Z]*[a-z]*\s*policy\b',
-            r'\b[A-Z]*[a-z]*\s*terms\s+(?:and\s+conditions)?\b'
-        ]
-        
-        for pattern in agreement_patterns:
-            matches = re.finditer(pattern, text, re.IGNORECASE)
-            for match in matches:
-                entities.append((match.group().strip(), 'AGREEMENT_TYPE'))
-        
-        # Location patterns (more precise)
-        location_patterns = [
-            r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)?,\s*[A-Z][A-Z]+\b',
-            r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)?,\s*[A-Z][a-z]+\s+[A-Z][a-z]+\b',
-            r'\b(?:New\s+York|Los\s+Angeles|Chicago|Houston|Phoenix|Philadelphia|San\s+Antonio|San\s+Diego|Dallas|San\s+Jose|Austin|Jacksonville|Fort\s+Worth|Columbus|Charlotte|San\s+Francisco|Indianapolis|Seattle|Denver|Washington|Boston|El\s+Paso|Nashville|Detroit|Oklahoma\s+City|Portland|Las\s+Vegas|Baltimore|Memphis|Milwaukee|Tucson|Fresno|Sacramento|Kansas\s+City|Mesa|Atlanta|Omaha|Colorado\s+Springs|Raleigh|Long\s+Beach|Virginia\s+Beach|Miami|Oakland|Minneapolis|Tampa|Tulsa|Arlington|Wichita|New\s+Orleans|Bakersfield|Honolulu|Anaheim|Santa\s+Ana|Riverside|Corona|Lexington|Stockton|Cincinnati|Irvine|Greensboro|Lincoln|Toledo|St.\s+Louis|Rochester|Newark|Plano|Durham|St.\s+Paul|Orlando|Laredo|Chula\s+Vista|Madison|Gilbert|Buffalo|Chandler|Glendale|North\s+Las\s+Vegas|Scottsdale|Reno|Henderson|Jersey\s+City|Chesapeake|Garland|Irving|Fremont|Norfolk|Boise|Richmond|Spokane|Baton\s+Rouge)\b',
-            r'\b(?:United\s+States|U\.S\.A\.|USA|Canada|UK|United\s+Kingdom|Germany|France|Japan|China|India|Australia|Mexico|Brazil|Argentina|Spain|Italy|Netherlands|Switzerland|Sweden|Norway|Denmark|Finland|Belgium|Austria|Poland|Czech\s+Republic|Hungary|Romania|Bulgaria|Greece|Portugal|Turkey|Russia|Ukraine|Belarus|Estonia|Latvia|Lithuania|Moldova|Slovakia|Slovenia|Croatia|Bosnia|Serbia|Montenegro|Albania|Macedonia|Kosovo|Cyprus|Malta|Luxembourg|Monaco|Andorra|Liechtenstein|Vatican\s+City|San\s+Marino|Iceland|Ireland|Northern\s+Ireland|Scotland|Wales|England|Great\s+Britain)\b'
-        ]
-        
-        for pattern in location_patterns:
-            matches = re.finditer(pattern, text, re.IGNORECASE)
-            for match in matches:
-                entities.append((match.group().strip(), 'LOCATION'))
-        
-        # Duration patterns (more precise)
-        duration_patterns = [
-            r'\b\d+(?:\.\d+)?\s*(?:years?|yrs?)\b(?!\s+of\s+age)',
-            r'\b\d+(?:\.\d+)?\s*(?:months?|mos?)\b(?!\s+of\s+age)',
-            r'\b\d+(?:\.\d+)?\s*(?:weeks?|wks?)\b(?!\s+of\s+age)',
-            r'\b\d+(?:\.\d+)?\s*(?:days?)\b(?!\s+of\s+age)',
-            r'\b(?:one|two|three|four|five|six|seven|eight|nine|ten|eleven|twelve|thirteen|fourteen|fifteen|sixteen|seventeen|eighteen|nineteen|twenty|thirty|forty|fifty|sixty|seventy|eighty|ninety|hundred)\s+(?:years?|yrs?)\b',
-            r'\b(?:per\s+annum|annually|yearly|monthly|quarterly|weekly|daily)\b(?!\s+of\s+age)'
-        ]
-        
-        for pattern in duration_patterns:
-            matches = re.finditer(pattern, text, re.IGNORECASE)
-            for match in matches:
-                entities.append((match.group().strip(), 'DURATION'))
-        
-        # Percentage patterns
-        percentage_patterns = [
-            r'\b\d+(?:\.\d+)?\s*%\b',
-            r'\b\d+(?:\.\d+)?\s*percent\b',
-            r'\b\d+(?:\.\d+)?\s*percentage\b'
-        ]
-        
-        for pattern in percentage_patterns:
-            matches = re.finditer(pattern, text, re.IGNORECASE)
-            for match in matches:
-                entities.append((match.group().strip(), 'PERCENTAGE'))
-        
-        # PARTY patterns - comprehensive
-        party_patterns = [
-            # Company names with indicators
-            r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)?\s+(?:Inc\.?|Corp\.?|LLC|Ltd\.?|L\.P\.?|PLC|Group|Holdings|Company|Corporation|Trust|Fund)\b',
-            r'\b[A-Z][a-z]+\s+(?:Management|Advisors|Investments|Financial|Capital|Global|International|National|American|First|Second|Third)\s+(?:Inc\.?|Corp\.?|LLC|Ltd\.?)\b',
-            # Person names (legal documents)
-            r'\b[A-Z][a-z]+\s+[A-Z][a-z]+(?:\s+[A-Z][a-z]+)?\s+(?:Jr\.?|Sr\.?|II|III|IV|Esq\.?)\b',
-            r'\b[A-Z][a-z]+\s+[A-Z]\.\s+[A-Z][a-z]+\b',
-            # Trust and Fund names
-            r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)?\s+(?:Trust|Fund|Foundation|Endowment)\b',
-            # Clear party indicators
-            r'\bbetween\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)\s+and\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)',
-            r'\bto\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)',
-            r'\bby\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)'
-        ]
-        
-        for pattern in party_patterns:
-            matches = re.finditer(pattern, text, re.IGNORECASE)
-            for match in matches:
-                party_name = match.group().strip()
-                
-                # Enhanced validation for different party types
-                company_indicators = ['Inc', 'Corp', 'LLC', 'Ltd', 'L.P.', 'PLC', 'Group', 'Holdings', 'Company', 'Corporation', 'Trust', 'Fund']
-                person_indicators = ['Jr', 'Sr', 'II', 'III', 'IV', 'Esq', 'Inc', 'Corp']
-                trust_indicators = ['Trust', 'Fund', 'Foundation', 'Endowment']
-                
-                # Accept if it has clear indicators or is a proper name pattern
-                if (any(indicator in party_name for indicator in company_indicators) or
-                    any(indicator in party_name for indicator in person_indicators) or
-                    any(indicator in party_name for indicator in trust_indicators) or
-                    'between' in party_name or 'to' in party_name or 'by' in party_name):
-                    entities.append((party_name, 'PARTY'))
-        
-        return entities
+        return self.rule_engine.extract(text)
     
     def extract_entities(self, text, use_hybrid=True):
         """Hybrid extraction combining ML and rules"""
         if use_hybrid:
-            # Get ML predictions
-            ml_result = self.preprocessor.extract_entities(text)
-            ml_entities = ml_result['entities']
-            
-            # Get rule-based predictions
-            rule_entities = self.extract_with_rules(text)
-            
+            return self._combine(text, self.preprocessor.extract_entities(text))
+        else:
+            # ML only
+            return self.preprocessor.extract_entities(text)
+
+    def extract_many(self, texts, use_hybrid=True, batch_size=32, n_process=1):
+        """extract_entities over many texts, batching the model with nlp.pipe.
+
+        Results are in the same order as ``texts``.
+        """
+        ml_results = self.preprocessor.extract_many(texts, batch_size=batch_size, n_process=n_process)
+        if not use_hybrid:
+            return ml_results
+        return self.combine_many(texts, ml_results)
+
+    def extract_document(self, text, max_chars=DEFAULT_CHUNK_CHARS, overlap=DEFAULT_OVERLAP_CHARS,
+                         batch_size=32, n_process=1):
+        """Hybrid extraction over a text of any length.
+
+        The text is split on paragraph and sentence boundaries into
+        overlapping chunks, which run as one batch; their spans are moved
+        back to document offsets and duplicates from the overlaps dropped.
+        """
+        with STAGE_SECONDS.time(stage='chunk'):
+            chunks = split_chunks(text, max_chars=max_chars, overlap=overlap)
+        results = self.extract_many([text[start:end] for start, end in chunks],
+                                    batch_size=batch_size, n_process=n_process)
+        return self.stitch_document(text, chunks, results)
+
+    def combine_many(self, texts, ml_results):
+        """Hybrid results from ML results, as extract_many gives with use_hybrid"""
+        return [self._combine(text, ml_result) for text, ml_result in zip(texts, ml_results)]
+
+    def stitch_document(self, text, chunks, results):
+        """One document's result from the hybrid results of its chunks"""
+        with STAGE_SECONDS.time(stage='stitch'):
+            spans = resolve_overlaps(stitch_spans([result['spans'] for result in results], chunks))
+
+            # Same text-level deduplication as extract_entities, in document order
+            seen_texts = set()
+            final_entities = []
+            for result in results:
+                for entity_text, label in result['combined_entities']:
+                    normalized_text = entity_text.lower().strip()
+                    if normalized_text not in seen_texts:
+                        seen_texts.add(normalized_text)
+                        final_entities.append((entity_text, label))
+
+        return {
+            'original_text': text,
+            'chunks': chunks,
+            'ml_entities': [entity for result in results for entity in result['ml_entities']],
+            'rule_entities': [entity for result in results for entity in result['rule_entities']],
+            'combined_entities': final_entities,
+            'total_entities': len(final_entities),
+            'spans': spans
+        }
+
+    def _combine(self, text, ml_result):
+        """Merge ML predictions for one text with the rule matches"""
+        ml_entities = ml_result['entities']
+        
+        # Get rule-based predictions, keeping their offsets
+        with STAGE_SECONDS.time(stage='rules'):
+            rule_spans = self.rule_engine.extract_spans(text)
+            rule_entities = [(text[span.start:span.end], span.label) for span in rule_spans]
+        
+        with STAGE_SECONDS.time(stage='merge'):
             # Combine and deduplicate
             all_entities = ml_entities + rule_entities
             
@@ -181,17 +265,18 @@ class HybridLegalNER:
                     seen_texts.add(normalized_text)
                     final_entities.append((entity_text, label))
             
-            return {
-                'original_text': text,
-                'normalized_text': ml_result['normalized_text'],
-                'ml_entities': ml_entities,
-                'rule_entities': rule_entities,
-                'combined_entities': final_entities,
-                'total_entities': len(final_entities)
-            }
-        else:
-            # ML only
-            return self.preprocessor.extract_entities(text)
+            # Every mention with its offsets, overlaps resolved in favour of ML
+            spans = resolve_overlaps(ml_result['spans'] + rule_spans)
+        
+        return {
+            'original_text': text,
+            'normalized_text': ml_result['normalized_text'],
+            'ml_entities': ml_entities,
+            'rule_entities': rule_entities,
+            'combined_entities': final_entities,
+            'total_entities': len(final_entities),
+            'spans': spans
+        }
 
 # Demo the hybrid approach
 if __name__ == "__main__":
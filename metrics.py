@@ -0,0 +1,323 @@
+import fcntl
+import glob
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Seconds, from half a millisecond to half a minute
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Characters, from a sentence to the long-document limit
+SIZE_BUCKETS = (100, 500, 1000, 2500, 5000, 10000, 25000, 50000, 100000, 250000, 500000, 1000000, 2000000)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels) + '}'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """A monotonically increasing count per label set"""
+
+    kind = 'counter'
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = tuple((name, str(labels[name])) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def snapshot(self):
+        with self._lock:
+            return [[list(map(list, key)), value] for key, value in self._values.items()]
+
+    @staticmethod
+    def merge(into, entries):
+        for labels, value in entries:
+            key = tuple(map(tuple, labels))
+            into[key] = into.get(key, 0) + value
+
+    def render(self, values):
+        for key, value in sorted(values.items()):
+            yield f"{self.name}{_format_labels(key)} {_format_value(value)}"
+
+
+class Histogram:
+    """Observations counted into cumulative buckets per label set"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def observe(self, value, **labels):
+        key = tuple((name, str(labels[name])) for name in self.labelnames)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][index] += 1
+                    break
+            entry[1] += value
+            entry[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the wall time of a with block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def snapshot(self):
+        with self._lock:
+            return [[list(map(list, key)), list(counts), total, count]
+                    for key, (counts, total, count) in self._values.items()]
+
+    @staticmethod
+    def merge(into, entries):
+        for labels, counts, total, count in entries:
+            key = tuple(map(tuple, labels))
+            entry = into.get(key)
+            if entry is None:
+                into[key] = [list(counts), total, count]
+            else:
+                entry[0] = [a + b for a, b in zip(entry[0], counts)]
+                entry[1] += total
+                entry[2] += count
+
+    def render(self, values):
+        for key, (counts, total, count) in sorted(values.items()):
+            cumulative = 0
+            for bound, bucket in zip(self.buckets, counts):
+                cumulative += bucket
+                yield f"{self.name}_bucket{_format_labels(key + (('le', _format_value(float(bound))),))} {cumulative}"
+            yield f"{self.name}_bucket{_format_labels(key + (('le', '+Inf'),))} {count}"
+            yield f"{self.name}_sum{_format_labels(key)} {_format_value(total)}"
+            yield f"{self.name}_count{_format_labels(key)} {count}"
+
+
+class Collected:
+    """A gauge or counter read from a callback when metrics are collected.
+
+    The callback returns a number, or a list of (labels dict, number). Values
+    belong to the process that reported them and carry a worker label.
+    """
+
+    def __init__(self, name, help, callback, kind='gauge'):
+        self.name = name
+        self.help = help
+        self.callback = callback
+        self.kind = kind
+
+    def snapshot(self):
+        try:
+            value = self.callback()
+        except Exception:
+            return []
+        if value is None:
+            return []
+        if not isinstance(value, list):
+            value = [({}, value)]
+        pid = str(os.getpid())
+        return [[[['worker', pid]] + [[name, str(label)] for name, label in sorted(labels.items())], number]
+                for labels, number in value if number is not None]
+
+    @staticmethod
+    def merge(into, entries):
+        for labels, value in entries:
+            into[tuple(map(tuple, labels))] = value
+
+    def render(self, values):
+        for key, value in sorted(values.items()):
+            yield f"{self.name}{_format_labels(key)} {_format_value(value)}"
+
+
+class MetricsRegistry:
+    """Metrics for this process, optionally merged with sibling processes.
+
+    With a ``directory``, each process writes a snapshot of its metrics
+    there (at most every ``flush_interval`` seconds, a skipped write
+    following once the interval is up, and on every render)
+    and rendering merges them all, so any worker of a pre-forked server
+    can answer a scrape for the whole server. Counts from workers that
+    have exited are folded into an archive file and kept; their collected
+    gauges are dropped.
+    """
+
+    def __init__(self, directory=None, flush_interval=1.0):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self._metrics = []
+        self._last_flush = 0.0
+        self._timer = None
+        self._timer_pid = None
+
+    def _add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self._add(Counter(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._add(Histogram(name, help, labelnames, buckets))
+
+    def collect(self, name, help, callback, kind='gauge'):
+        return self._add(Collected(name, help, callback, kind))
+
+    def snapshot(self):
+        return {metric.name: metric.snapshot() for metric in self._metrics}
+
+    def clear_directory(self):
+        """Remove every snapshot; call once before the workers start"""
+        if self.directory:
+            for path in glob.glob(os.path.join(self.directory, '*.json')):
+                os.remove(path)
+
+    def flush(self, force=False):
+        """Write this process's snapshot if the interval has passed"""
+        if not self.directory:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_flush < self.flush_interval:
+            self._flush_later(self.flush_interval - (now - self._last_flush))
+            return
+        self._last_flush = now
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f'{os.getpid()}.json')
+        temporary = f'{path}.{threading.get_ident()}.tmp'
+        with open(temporary, 'w') as f:
+            json.dump(self.snapshot(), f)
+        os.replace(temporary, path)
+
+    def _flush_later(self, delay):
+        """Write the snapshot once the interval is up, so an idle process's last updates are seen"""
+        # A forked child does not inherit the parent's timer thread
+        if self._timer is not None and self._timer.is_alive() and self._timer_pid == os.getpid():
+            return
+        self._timer = threading.Timer(delay, self.flush, kwargs={'force': True})
+        self._timer.daemon = True
+        self._timer_pid = os.getpid()
+        self._timer.start()
+
+    def _gathered(self):
+        """Snapshots to merge: this process's, plus live siblings' and the archive"""
+        if not self.directory:
+            return [self.snapshot()]
+
+        self.flush(force=True)
+        snapshots = []
+        with open(os.path.join(self.directory, 'lock'), 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            archive_path = os.path.join(self.directory, 'archive.json')
+            archive = None
+            for path in glob.glob(os.path.join(self.directory, '[0-9]*.json')):
+                pid = int(os.path.basename(path).split('.')[0])
+                try:
+                    with open(path) as f:
+                        snapshot = json.load(f)
+                except (OSError, ValueError):
+                    continue
+                if _alive(pid):
+                    snapshots.append(snapshot)
+                    continue
+
+                # Fold an exited worker's counts into the archive
+                if archive is None:
+                    archive = self._load(archive_path)
+                for metric in self._metrics:
+                    if isinstance(metric, Collected):
+                        continue
+                    merged = {}
+                    metric.merge(merged, archive.get(metric.name, []))
+                    metric.merge(merged, snapshot.get(metric.name, []))
+                    archive[metric.name] = [[list(map(list, key))] + (list(value) if isinstance(value, list) else [value])
+                                            for key, value in merged.items()]
+                os.remove(path)
+
+            if archive is not None:
+                with open(archive_path + '.tmp', 'w') as f:
+                    json.dump(archive, f)
+                os.replace(archive_path + '.tmp', archive_path)
+            else:
+                archive = self._load(archive_path)
+            snapshots.append(archive)
+        return snapshots
+
+    @staticmethod
+    def _load(path):
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        snapshots = self._gathered()
+        lines = []
+        for metric in self._metrics:
+            values = {}
+            for snapshot in snapshots:
+                metric.merge(values, snapshot.get(metric.name, []))
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render(values))
+        return '\n'.join(lines) + '\n'
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+# Shared by everything in this process. Under gunicorn NER_METRICS_DIR is
+# set so the workers' metrics are merged.
+registry = MetricsRegistry(os.environ.get('NER_METRICS_DIR') or None)
+
+STAGE_SECONDS = registry.histogram(
+    'ner_stage_seconds', 'Time spent in each extraction stage, per call', ('stage',))
+RULE_FAMILY_SECONDS = registry.histogram(
+    'ner_rule_family_seconds', 'Time spent scanning for each rule family, per text', ('family',))
+REQUEST_SECONDS = registry.histogram(
+    'ner_request_seconds', 'HTTP request latency', ('endpoint', 'status'))
+DOCUMENT_CHARS = registry.histogram(
+    'ner_document_chars', 'Length of texts submitted for extraction', ('endpoint',), buckets=SIZE_BUCKETS)
+BATCH_SIZE = registry.histogram(
+    'ner_batch_size', 'Texts per micro-batch run through the model', buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256))
+QUEUE_WAIT_SECONDS = registry.histogram(
+    'ner_batch_queue_wait_seconds', 'Time a text waited for its micro-batch to close')
@@ -0,0 +1,112 @@
+import hashlib
+import os
+import threading
+
+import spacy
+
+
+def _freeze(value):
+    """Make spacy.load options usable as part of a dict key"""
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return tuple(sorted(_freeze(item) for item in value))
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    return value
+
+
+def model_fingerprint(model_path):
+    """Short hash identifying the files of a model on disk.
+
+    Covers every file's relative path, size and modification time, and the
+    contents of meta.json, so retraining into the same directory gives a
+    new fingerprint. Package names that are not paths hash their name.
+    """
+    digest = hashlib.sha256()
+    if not os.path.isdir(model_path):
+        digest.update(str(model_path).encode('utf-8'))
+        return digest.hexdigest()[:16]
+
+    root = os.path.realpath(model_path)
+    for directory, subdirectories, files in os.walk(root):
+        subdirectories.sort()
+        for name in sorted(files):
+            path = os.path.join(directory, name)
+            info = os.stat(path)
+            digest.update(f"{os.path.relpath(path, root)}:{info.st_size}:{info.st_mtime_ns}\n".encode('utf-8'))
+    meta = os.path.join(root, 'meta.json')
+    if os.path.exists(meta):
+        with open(meta, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+class ModelRegistry:
+    """Process-wide cache of loaded spaCy pipelines.
+
+    Pipelines are keyed by their resolved path and load options, so every
+    caller asking for the same model shares one Language instance instead
+    of loading its own copy. Each acquire must be paired with a release;
+    a pipeline is dropped when its last user releases it, or at once with
+    unload.
+    """
+
+    def __init__(self, loader=spacy.load):
+        self._loader = loader
+        self._lock = threading.Lock()
+        self._models = {}
+
+    def _key(self, model_path, options):
+        # Package names like "en_core_web_sm" are not paths; keep them as given
+        path = os.path.realpath(model_path) if os.path.exists(model_path) else model_path
+        return path, _freeze(options)
+
+    def acquire(self, model_path, **options):
+        """Return the shared pipeline for model_path, loading it on first use"""
+        key = self._key(model_path, options)
+        with self._lock:
+            entry = self._models.get(key)
+            if entry is None:
+                entry = self._models[key] = {'nlp': self._loader(model_path, **options), 'refs': 0}
+            entry['refs'] += 1
+            return entry['nlp']
+
+    def release(self, model_path, **options):
+        """Drop one reference; the pipeline is unloaded after the last one"""
+        key = self._key(model_path, options)
+        with self._lock:
+            entry = self._models.get(key)
+            if entry is None:
+                return
+            entry['refs'] -= 1
+            if entry['refs'] <= 0:
+                del self._models[key]
+
+    def unload(self, model_path, **options):
+        """Forget a pipeline regardless of how many users still hold it"""
+        with self._lock:
+            return self._models.pop(self._key(model_path, options), None) is not None
+
+    def clear(self):
+        """Forget every loaded pipeline"""
+        with self._lock:
+            self._models.clear()
+
+    def stats(self):
+        """Loaded pipelines with their reference counts"""
+        with self._lock:
+            return [{'path': path, 'options': dict(options), 'references': entry['refs']}
+                    for (path, options), entry in self._models.items()]
+
+
+# The registry shared by everything in this process
+registry = ModelRegistry()
+
+
+def load_model(model_path, **options):
+    """Shared pipeline from the process registry; pair with release_model"""
+    return registry.acquire(model_path, **options)
+
+
+def release_model(model_path, **options):
+    """Release a pipeline obtained from load_model"""
+    registry.release(model_path, **options)
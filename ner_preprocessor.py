@@ -1,88 +1,88 @@
-import spacy
-import re
+from model_registry import load_model, release_model
+from entity_spans import EntitySpan, ML_SCORE, resolve_overlaps
+from text_normalizer import TextNormalizer
+from metrics import STAGE_SECONDS
 
 class LegalNERPreprocessor:
     def __init__(self, model_path="training_output/best_model"):
-        self.nlp = spacy.load(model_path)
+        self.model_path = model_path
+        self.nlp = load_model(model_path)
+        # Rewrite table compiled once; see text_normalizer.NORMALIZATION_STEPS
+        self.normalizer = TextNormalizer()
     
+    def close(self):
+        """Release the shared model"""
+        if self.nlp is not None:
+            release_model(self.model_path)
+            self.nlp = None
+
     def normalize_text(self, text):
         """Normalize text to match training patterns"""
-        # Date format normalization: "12 January 2024" -> "January 12, 2024"
-        text = re.sub(r'(\d{1,2}) (\w+) (\d{4})', r'\2 \1, \3', text)
-        
-        # Date format normalization: "Jan 15, 2024" -> "January 15, 2024"
-        month_map = {
-            'Jan': 'January', 'Feb': 'February', 'Mar': 'March', 'Apr': 'April',
-            'May': 'May', 'Jun': 'June', 'Jul': 'July', 'Aug': 'August',
-            'Sep': 'September', 'Oct': 'October', 'Nov': 'November', 'Dec': 'December'
-        }
-        for short, full in month_map.items():
-            text = re.sub(r'\b' + short + r'\b', full, text)
-        
-        # Agreement type normalization
-        text = text.replace('Agreement', 'agreement')
-        text = text.replace('Contract', 'agreement')
-        text = text.replace('Pact', 'agreement')
-        
-        # Enhanced company name normalization - match training patterns
-        text = re.sub(r'(\w+)\s+Pvt\s+Ltd', r'\1 Corp', text)
-        text = re.sub(r'(\w+)\s+Limited', r'\1 Corp', text)
-        text = re.sub(r'(\w+)\s+LLC', r'\1 Corp', text)
-        text = re.sub(r'(\w+)\s+Inc\.', r'\1 Corp', text)
-        text = re.sub(r'(\w+)\s+Inc', r'\1 Corp', text)
-        
-        # Add common patterns for party names based on training data
-        # Normalize person names to match training patterns
-        text = re.sub(r'\b([A-Z][a-z]+)\s+([A-Z][a-z]+)\b', r'\1 \2', text)
-        
-        # Add "and" between parties to match training patterns
-        text = re.sub(r'(\w+\s+Corp)\s+(?:&|and)\s+(\w+\s+Corp)', r'\1 and \2', text)
-        
-        # Remove extra spaces
-        text = re.sub(r'\s+', ' ', text).strip()
-        
-        return text
+        return self.normalizer.normalize(text)
+
+    def normalize_with_alignment(self, text):
+        """Normalize text and return it with an Alignment back to the input"""
+        return self.normalizer.normalize_with_alignment(text)
     
     def extract_with_rules(self, text):
         """Add basic rule-based extraction for missing entities"""
-        entities = []
-        
-        # TEMPORARILY DISABLED TO TEST
-        # Very conservative PARTY patterns - only clear companies
-        # party_patterns = [
-        #     r'\b[A-Z][a-z]+\s+Inc\.?\b',
-        #     r'\b[A-Z][a-z]+\s+Corp\.?\b', 
-        #     r'\b[A-Z][a-z]+\s+LLC\b',
-        #     r'\b[A-Z][a-z]+\s+Ltd\.?\b',
-        #     r'\b[A-Z][a-z]+\s+[A-Z][a-z]+\s+Inc\.?\b',
-        #     r'\b[A-Z][a-z]+\s+[A-Z][a-z]+\s+Corp\.?\b',
-        #     r'\b[A-Z][a-z]+\s+[A-Z][a-z]+\s+LLC\b',
-        #     r'\b[A-Z][a-z]+\s+[A-Z][a-z]+\s+Ltd\.?\b',
-        # ]
-        
-        # for pattern in party_patterns:
-        #     matches = re.finditer(pattern, text, re.IGNORECASE)
-        #     for match in matches:
-        #         party_name = match.group().strip()
-                
-        #         # Must contain clear company indicator
-        #         company_indicators = ['Inc', 'Corp', 'LLC', 'Ltd']
-                
-        #         if any(indicator in party_name for indicator in company_indicators):
-        #             entities.append((party_name, 'PARTY'))
-        
-        return entities
+        # None at present: the rule engine in HybridLegalNER covers these
+        return []
     
     def extract_entities(self, text):
         """Extract entities with preprocessing and basic rules"""
-        # Normalize the text
-        normalized_text = self.normalize_text(text)
+        # Normalize the text, remembering where each part came from
+        with STAGE_SECONDS.time(stage='normalize'):
+            normalized_text, alignment = self.normalize_with_alignment(text)
         
         # Run NER on normalized text
-        doc = self.nlp(normalized_text)
+        with STAGE_SECONDS.time(stage='spacy'):
+            doc = self.nlp(normalized_text)
         
-        # Get ML entities
+        with STAGE_SECONDS.time(stage='ml_entities'):
+            result = self._build_result(text, normalized_text, alignment, doc)
+        return result
+
+    def extract_many(self, texts, batch_size=32, n_process=1):
+        """Extract entities from many texts with batched inference.
+
+        Texts are normalized, sorted by length so each batch holds
+        similar-sized documents, and run through nlp.pipe; results come
+        back in the order of ``texts``.
+        """
+        normalized = self.normalize_many(texts)
+        docs = self.parse_many([normalized_text for normalized_text, _ in normalized],
+                               batch_size=batch_size, n_process=n_process)
+        return self.build_results(texts, normalized, docs)
+
+    def normalize_many(self, texts):
+        """(normalized text, alignment) for each text"""
+        with STAGE_SECONDS.time(stage='normalize'):
+            return [self.normalize_with_alignment(text) for text in texts]
+
+    def parse_many(self, normalized_texts, batch_size=32, n_process=1):
+        """spaCy docs for normalized texts, batched by length, in input order"""
+        order = sorted(range(len(normalized_texts)), key=lambda index: len(normalized_texts[index]))
+        with STAGE_SECONDS.time(stage='spacy'):
+            parsed = self.nlp.pipe((normalized_texts[index] for index in order),
+                                   batch_size=batch_size, n_process=n_process)
+            docs = [None] * len(normalized_texts)
+            for index, doc in zip(order, parsed):
+                docs[index] = doc
+        return docs
+
+    def build_results(self, texts, normalized, docs):
+        """Result dicts from the output of normalize_many and parse_many"""
+        with STAGE_SECONDS.time(stage='ml_entities'):
+            return [self._build_result(text, normalized_text, alignment, doc)
+                    for text, (normalized_text, alignment), doc in zip(texts, normalized, docs)]
+
+    def _build_result(self, text, normalized_text, alignment, doc):
+        """Assemble the result dict for one processed document"""
+        # Get ML entities, with their offsets mapped back to the input
         ml_entities = [(ent.text, ent.label_) for ent in doc.ents]
+        ml_spans = [EntitySpan(*alignment.map_span(ent.start_char, ent.end_char), ent.label_, 'ml', ML_SCORE)
+                    for ent in doc.ents]
         
         # Get rule-based entities for missing types
         rule_entities = self.extract_with_rules(text)
@@ -103,7 +103,8 @@ class LegalNERPreprocessor:
             'normalized_text': normalized_text,
             'entities': final_entities,
             'ml_entities': ml_entities,
-            'rule_entities': rule_entities
+            'rule_entities': rule_entities,
+            'spans': resolve_overlaps(ml_spans)
         }
 
 # Usage example
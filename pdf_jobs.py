@@ -0,0 +1,300 @@
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from clean_pdf_entities import postprocess_entities
+from src.ocr.sqlite_connections import ThreadConnections
+
+# Pipeline stages in order, with the share of the overall progress each
+# one has reached when it starts
+STAGE_PROGRESS = {
+    'queued': 0.0,
+    'text_layer': 0.0,
+    'ocr': 0.2,
+    'ner': 0.6,
+    'postprocess': 0.9,
+    'done': 1.0
+}
+
+
+class QueueFull(Exception):
+    """Raised when the job queue is at its limit"""
+
+
+def extract_pdf_text(pdf_path, report=None):
+    """Text of a PDF, read from the text layer or OCRed page by page.
+
+    Returns the dict from src.ocr.page_routing.extract_text: the text,
+    the source type ('digital', 'scanned' or 'mixed'), the page count and
+    how many pages took each path.
+    """
+    from src.ocr.page_routing import extract_text
+
+    progress = report and (lambda stage, done, count: report(stage, pages_done=done, page_count=count))
+    return extract_text(pdf_path, report=progress)
+
+
+def process_pdf(pdf_path, ner_system, report=None):
+    """Text layer and OCR, long-document NER and post-processing for one PDF"""
+    start_time = time.perf_counter()
+    extracted = extract_pdf_text(pdf_path, report)
+    text = extracted['text']
+
+    if report:
+        report('ner')
+    result = ner_system.extract_document(text)
+
+    if report:
+        report('postprocess')
+    raw_entities = result['combined_entities']
+    processed = postprocess_entities(raw_entities)
+    final_entities = processed['entities']
+
+    return {
+        "source_type": extracted['source_type'],
+        "page_count": extracted['page_count'],
+        "page_methods": extracted['page_methods'],
+        "text_chars": len(text),
+        "chunk_count": len(result['chunks']),
+        "total_entities": len(final_entities),
+        "raw_entities_count": len(raw_entities),
+        "removed_entities_count": len(raw_entities) - len(final_entities),
+        "expiration_dates_found": len(processed['expiration_dates']),
+        "entity_types": sorted(set(label for _, label in final_entities)),
+        "entities": final_entities,
+        "processing_method": "hybrid_with_cleaning_and_filtering",
+        "processing_time": time.perf_counter() - start_time
+    }
+
+
+class JobManager:
+    """Runs PDF jobs on a bounded pool of worker threads.
+
+    ``process(path, report)`` does the work for one file and returns a
+    JSON-ready result; it calls ``report(stage, **details)`` as it moves
+    through the pipeline so progress can be polled. At most ``max_pending``
+    jobs may be queued or running; submit raises QueueFull beyond that.
+    The uploaded file is deleted once its job ends, and finished jobs are
+    forgotten ``keep_seconds`` after they end.
+
+    Job records are kept in this process unless ``path`` names a SQLite
+    database. Then every worker process using it can answer a poll for
+    any job, and the pending limit holds across all of them. A job whose
+    process died before finishing (a worker recycled after its request
+    limit, or retired over its memory limit) is taken over by the next
+    process that looks at it and run again from the start; a job that has
+    already been started ``max_attempts`` times is reported as failed.
+    """
+
+    def __init__(self, process, workers=2, max_pending=20, keep_seconds=3600, path=None, max_attempts=3):
+        self.process = process
+        self.workers = workers
+        self.max_pending = max_pending
+        self.keep_seconds = keep_seconds
+        self.path = path
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._connections = ThreadConnections(path, schema=[
+            'CREATE TABLE IF NOT EXISTS jobs '
+            '(job_id TEXT PRIMARY KEY, status TEXT NOT NULL, ended REAL, record TEXT NOT NULL)'
+        ])
+        self._executor = None
+        self._pid = None
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._connection()
+
+    def _pool(self):
+        # A forked child does not inherit the parent's worker threads
+        if self._executor is None or self._pid != os.getpid():
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='pdf-job')
+            self._pid = os.getpid()
+        return self._executor
+
+    def _connection(self):
+        """This thread's connection to the job database, reopened after a fork"""
+        return self._connections.get()
+
+    def _save(self, job):
+        if self.path:
+            self._connection().execute('INSERT OR REPLACE INTO jobs (job_id, status, ended, record) VALUES (?, ?, ?, ?)',
+                                       (job['job_id'], job['status'], job['_ended'], json.dumps(job)))
+        else:
+            self._jobs[job['job_id']] = job
+
+    def _load(self, job_id):
+        if self.path:
+            row = self._connection().execute('SELECT record FROM jobs WHERE job_id = ?', (job_id,)).fetchone()
+            return json.loads(row[0]) if row else None
+        return self._jobs.get(job_id)
+
+    def _all(self, unfinished=False):
+        if self.path:
+            query = 'SELECT record FROM jobs'
+            if unfinished:
+                query += " WHERE status IN ('queued', 'running')"
+            return [json.loads(row[0]) for row in self._connection().execute(query)]
+        return [job for job in self._jobs.values()
+                if not unfinished or job['status'] in ('queued', 'running')]
+
+    def _orphaned(self, job):
+        """True if the job is unfinished but the process running it is gone"""
+        if job['status'] not in ('queued', 'running') or job['_pid'] == os.getpid():
+            return False
+        try:
+            os.kill(job['_pid'], 0)
+        except ProcessLookupError:
+            return True
+        except PermissionError:
+            pass
+        return False
+
+    def _adopt_orphans(self):
+        """Take over the unfinished jobs of processes that died; returns [(job_id, pdf_path)] to start.
+
+        Run inside a write transaction, so only one process adopts each job.
+        """
+        adopted = []
+        for job in self._all(unfinished=True):
+            if not self._orphaned(job):
+                continue
+            pdf_path = job.get('_path')
+            attempts = job.get('_attempts', 1)
+            if attempts >= self.max_attempts or not pdf_path or not os.path.exists(pdf_path):
+                job.update(status='failed',
+                           error=f'Worker process exited before the job finished ({attempts} attempts)',
+                           finished_at=datetime.now().isoformat(), _ended=time.time())
+                self._save(job)
+                if pdf_path:
+                    try:
+                        os.remove(pdf_path)
+                    except OSError:
+                        pass
+                continue
+            job.update(status='queued', stage='queued', progress=0.0, started_at=None,
+                       _pid=os.getpid(), _attempts=attempts + 1)
+            self._save(job)
+            adopted.append((job['job_id'], pdf_path))
+        return adopted
+
+    def _pending(self):
+        return sum(1 for job in self._all(unfinished=True) if job['status'] in ('queued', 'running'))
+
+    def recover(self):
+        """Queue again, in this process, the jobs whose processes died; returns how many"""
+        if not self.path:
+            return 0
+        with self._lock:
+            self._connection().execute('BEGIN IMMEDIATE')
+            try:
+                adopted = self._adopt_orphans()
+            finally:
+                self._connection().execute('COMMIT')
+            for job_id, pdf_path in adopted:
+                self._pool().submit(self._run, job_id, pdf_path)
+        return len(adopted)
+
+    def _forget_expired(self):
+        cutoff = time.time() - self.keep_seconds
+        if self.path:
+            self._connection().execute("DELETE FROM jobs WHERE status IN ('done', 'failed') AND ended < ?", (cutoff,))
+            return
+        for job_id in [job_id for job_id, job in self._jobs.items()
+                       if job['status'] in ('done', 'failed') and job['_ended'] < cutoff]:
+            del self._jobs[job_id]
+
+    def submit(self, pdf_path, filename=None):
+        """Queue a PDF already saved at pdf_path and return its job id"""
+        with self._lock:
+            # Count and insert in one write transaction, so workers sharing
+            # the database cannot overshoot the limit together
+            if self.path:
+                self._connection().execute('BEGIN IMMEDIATE')
+            adopted = []
+            try:
+                self._forget_expired()
+                if self.path:
+                    adopted = self._adopt_orphans()
+                if self._pending() >= self.max_pending:
+                    raise QueueFull(f"{self.max_pending} jobs already queued or running")
+                job_id = uuid.uuid4().hex
+                self._save({
+                    'job_id': job_id,
+                    'filename': filename or os.path.basename(pdf_path),
+                    'status': 'queued',
+                    'stage': 'queued',
+                    'progress': 0.0,
+                    'submitted_at': datetime.now().isoformat(),
+                    'started_at': None,
+                    'finished_at': None,
+                    'result': None,
+                    'error': None,
+                    '_pid': os.getpid(),
+                    '_path': pdf_path,
+                    '_attempts': 1,
+                    '_ended': None
+                })
+            finally:
+                if self.path:
+                    self._connection().execute('COMMIT')
+                for adopted_id, adopted_path in adopted:
+                    self._pool().submit(self._run, adopted_id, adopted_path)
+            self._pool().submit(self._run, job_id, pdf_path)
+        return job_id
+
+    def _update(self, job_id, **fields):
+        with self._lock:
+            job = self._load(job_id)
+            job.update(fields)
+            self._save(job)
+
+    def _run(self, job_id, pdf_path):
+        self._update(job_id, status='running', started_at=datetime.now().isoformat())
+
+        def report(stage, **details):
+            progress = STAGE_PROGRESS.get(stage, 0.0)
+            if details.get('page_count'):
+                # Move through the stage's share as pages complete
+                following = min(value for value in STAGE_PROGRESS.values() if value > progress)
+                progress += (following - progress) * details['pages_done'] / details['page_count']
+            self._update(job_id, stage=stage, progress=round(progress, 3), **details)
+
+        try:
+            result = self.process(pdf_path, report)
+            self._update(job_id, status='done', stage='done', progress=1.0, result=result)
+        except Exception as e:
+            self._update(job_id, status='failed', error=str(e))
+        finally:
+            self._update(job_id, finished_at=datetime.now().isoformat(), _ended=time.time())
+            try:
+                os.remove(pdf_path)
+            except OSError:
+                pass
+
+    def get(self, job_id):
+        """Snapshot of a job, or None if it is unknown or expired"""
+        with self._lock:
+            job = self._load(job_id)
+            orphaned = job is not None and self._orphaned(job)
+        if orphaned:
+            self.recover()
+            with self._lock:
+                job = self._load(job_id)
+        if job is None:
+            return None
+        return {key: value for key, value in job.items() if not key.startswith('_')}
+
+    def stats(self):
+        """Job counts by status"""
+        with self._lock:
+            counts = {}
+            for job in self._all():
+                counts[job['status']] = counts.get(job['status'], 0) + 1
+        return {'workers': self.workers, 'max_pending': self.max_pending, 'jobs': counts}
@@ -0,0 +1,77 @@
+import os
+
+from chunker import DEFAULT_CHUNK_CHARS, DEFAULT_OVERLAP_CHARS, split_chunks
+from stage_pipeline import DEFAULT_QUEUE_SIZE, Stage, StagePipeline
+
+# Threads per stage; extraction threads each wait on one file in the
+# extraction pool, so they match its worker count
+PIPELINE_NORMALIZE_WORKERS = int(os.environ.get('PIPELINE_NORMALIZE_WORKERS', 1))
+PIPELINE_RULES_WORKERS = int(os.environ.get('PIPELINE_RULES_WORKERS', 2))
+PIPELINE_POSTPROCESS_WORKERS = int(os.environ.get('PIPELINE_POSTPROCESS_WORKERS', 1))
+# Documents whose chunks share one nlp.pipe call
+PIPELINE_SPACY_BATCH = int(os.environ.get('PIPELINE_SPACY_BATCH', 4))
+
+
+def build_pdf_pipeline(ner_system, extraction_pool, postprocess=None,
+                       max_chars=DEFAULT_CHUNK_CHARS, overlap=DEFAULT_OVERLAP_CHARS,
+                       normalize_workers=PIPELINE_NORMALIZE_WORKERS, spacy_batch=PIPELINE_SPACY_BATCH,
+                       rules_workers=PIPELINE_RULES_WORKERS, postprocess_workers=PIPELINE_POSTPROCESS_WORKERS,
+                       queue_size=DEFAULT_QUEUE_SIZE):
+    """A StagePipeline taking PDF paths to hybrid entity results.
+
+    Stages: extract (text layer or OCR, in ``extraction_pool``'s
+    processes), normalize (chunking and normalization), spacy (the chunks
+    of up to ``spacy_batch`` documents through one nlp.pipe call, in a
+    single thread since the model is shared), rules (ML entities, rule
+    matches, merging and stitching the chunks back together) and
+    postprocess (``postprocess(combined_entities)``, when given).
+
+    Each result is a dict with the extraction result, the
+    extract_document-style NER result and, if there was a postprocess
+    function, its output. Documents with no text fail in extraction.
+    """
+    preprocessor = ner_system.preprocessor
+
+    def extract(pdf_path):
+        extracted = extraction_pool.extract(pdf_path)
+        if not extracted['text'].strip():
+            raise ValueError(f"No text found in {pdf_path}")
+        return {'pdf_path': pdf_path, 'extracted': extracted}
+
+    def normalize(document):
+        text = document['extracted']['text']
+        chunks = split_chunks(text, max_chars=max_chars, overlap=overlap)
+        document['chunks'] = chunks
+        document['chunk_texts'] = [text[start:end] for start, end in chunks]
+        document['normalized'] = preprocessor.normalize_many(document['chunk_texts'])
+        return document
+
+    def parse(documents):
+        docs = iter(preprocessor.parse_many([normalized_text for document in documents
+                                             for normalized_text, _ in document['normalized']]))
+        for document in documents:
+            document['docs'] = [next(docs) for _ in document['normalized']]
+        return documents
+
+    def rules(document):
+        ml_results = preprocessor.build_results(document['chunk_texts'], document['normalized'], document['docs'])
+        results = ner_system.combine_many(document['chunk_texts'], ml_results)
+        # Only the result goes further; the spaCy docs are the bulk of what a document holds
+        return {
+            'pdf_path': document['pdf_path'],
+            'extracted': document['extracted'],
+            'result': ner_system.stitch_document(document['extracted']['text'], document['chunks'], results)
+        }
+
+    stages = [
+        Stage('extract', extract, workers=extraction_pool.workers),
+        Stage('normalize', normalize, workers=normalize_workers),
+        Stage('spacy', parse, batch_size=spacy_batch),
+        Stage('rules', rules, workers=rules_workers)
+    ]
+    if postprocess is not None:
+        def postprocess_document(document):
+            document['postprocessed'] = postprocess(document['result']['combined_entities'])
+            return document
+        stages.append(Stage('postprocess', postprocess_document, workers=postprocess_workers))
+    return StagePipeline(stages, queue_size=queue_size)
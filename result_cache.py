@@ -0,0 +1,192 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from src.ocr.sqlite_connections import ThreadConnections
+
+# How often (in writes) the disk tier checks whether it needs pruning
+PRUNE_EVERY = 256
+
+# A result bigger than this share of the memory tier's byte budget, such
+# as a long document's, is only kept on disk
+MAX_MEMORY_SHARE = 8
+
+
+def cache_key(*parts):
+    """Content hash of the JSON-serializable parts that determine a result"""
+    payload = json.dumps(parts, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ResultCache:
+    """Two-tier cache of JSON-serializable extraction results.
+
+    The memory tier is an LRU of at most ``max_entries`` results, and at
+    most ``max_memory_bytes`` of them measured as JSON, private to this
+    process. The optional disk tier is a SQLite database at ``path``,
+    which survives restarts and is shared by every worker process pointing
+    at it; it keeps at most ``max_disk_entries`` results, dropping the
+    oldest written first. A disk hit is promoted into the memory tier.
+
+    Values are shared between callers, so they must not be modified.
+    Disk errors are reported and otherwise ignored: the cache is never
+    allowed to fail a request.
+    """
+
+    def __init__(self, max_entries=1024, path=None, max_disk_entries=100000, max_memory_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_memory_bytes = max_memory_bytes
+        self.path = path
+        self.max_disk_entries = max_disk_entries
+        self._lock = threading.Lock()
+        # key -> (value, approximate size in bytes)
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._connections = ThreadConnections(path, synchronous='NORMAL', schema=[
+            'CREATE TABLE IF NOT EXISTS results '
+            '(key TEXT PRIMARY KEY, value TEXT NOT NULL, written REAL NOT NULL)',
+            'CREATE INDEX IF NOT EXISTS results_written ON results (written)'
+        ])
+        self._writes = 0
+        self._counters = {
+            'memory_hits': 0, 'disk_hits': 0, 'misses': 0,
+            'stores': 0, 'memory_evictions': 0, 'disk_evictions': 0, 'disk_errors': 0
+        }
+        if path:
+            try:
+                directory = os.path.dirname(path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                self._connection()
+            except (OSError, sqlite3.Error) as e:
+                self._disk_error('open', e)
+                self.path = None
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def _connection(self):
+        """This thread's connection to the disk tier, reopened after a fork"""
+        return self._connections.get()
+
+    def _disk_error(self, action, error):
+        self._count('disk_errors')
+        print(f"⚠️ Result cache could not {action} {self.path}: {error}")
+
+    def _remember(self, key, value, size):
+        """Put a value of ``size`` bytes in the memory tier, evicting the least recently used"""
+        if self.max_entries <= 0 or size > self.max_memory_bytes // MAX_MEMORY_SHARE:
+            return
+        with self._lock:
+            previous = self._memory.pop(key, None)
+            if previous is not None:
+                self._memory_bytes -= previous[1]
+            self._memory[key] = (value, size)
+            self._memory_bytes += size
+            while len(self._memory) > self.max_entries or self._memory_bytes > self.max_memory_bytes:
+                self._memory_bytes -= self._memory.popitem(last=False)[1][1]
+                self._counters['memory_evictions'] += 1
+
+    def get(self, key):
+        """Cached value for key, or None"""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self._counters['memory_hits'] += 1
+                return entry[0]
+
+        if self.path:
+            try:
+                row = self._connection().execute('SELECT value FROM results WHERE key = ?', (key,)).fetchone()
+            except sqlite3.Error as e:
+                self._disk_error('read', e)
+                row = None
+            if row is not None:
+                try:
+                    value = json.loads(row[0])
+                except (TypeError, ValueError) as e:
+                    # A damaged row is a miss; drop it so the result is stored afresh
+                    self._disk_error('decode an entry in', e)
+                    try:
+                        self._connection().execute('DELETE FROM results WHERE key = ?', (key,))
+                    except sqlite3.Error as e:
+                        self._disk_error('delete from', e)
+                else:
+                    self._remember(key, value, len(row[0]))
+                    self._count('disk_hits')
+                    return value
+
+        self._count('misses')
+        return None
+
+    def put(self, key, value):
+        """Store a value in both tiers"""
+        encoded = json.dumps(value, ensure_ascii=False)
+        self._remember(key, value, len(encoded))
+        self._count('stores')
+        if not self.path:
+            return
+
+        try:
+            connection = self._connection()
+            connection.execute('INSERT OR REPLACE INTO results (key, value, written) VALUES (?, ?, ?)',
+                               (key, encoded, time.time()))
+        except sqlite3.Error as e:
+            self._disk_error('write to', e)
+            return
+
+        with self._lock:
+            self._writes += 1
+            prune = self._writes % PRUNE_EVERY == 0
+        if prune:
+            self._prune(connection)
+
+    def _prune(self, connection):
+        """Drop the oldest disk entries beyond max_disk_entries"""
+        try:
+            count = connection.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+            excess = count - self.max_disk_entries
+            if excess > 0:
+                connection.execute('DELETE FROM results WHERE key IN '
+                                   '(SELECT key FROM results ORDER BY written LIMIT ?)', (excess,))
+                self._count('disk_evictions', excess)
+        except sqlite3.Error as e:
+            self._disk_error('prune', e)
+
+    def clear(self):
+        """Empty both tiers; the counters are kept"""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+        if self.path:
+            try:
+                self._connection().execute('DELETE FROM results')
+            except sqlite3.Error as e:
+                self._disk_error('clear', e)
+
+    def stats(self):
+        """Sizes, hit and miss counters, and the overall hit rate"""
+        with self._lock:
+            report = dict(self._counters)
+            report['memory_entries'] = len(self._memory)
+            report['memory_bytes'] = self._memory_bytes
+        report['max_entries'] = self.max_entries
+        report['max_memory_bytes'] = self.max_memory_bytes
+        lookups = report['memory_hits'] + report['disk_hits'] + report['misses']
+        report['hit_rate'] = (report['memory_hits'] + report['disk_hits']) / lookups if lookups else 0.0
+
+        report['disk_path'] = self.path
+        if self.path:
+            report['max_disk_entries'] = self.max_disk_entries
+            try:
+                report['disk_entries'] = self._connection().execute('SELECT COUNT(*) FROM results').fetchone()[0]
+            except sqlite3.Error as e:
+                self._disk_error('count', e)
+                report['disk_entries'] = None
+        return report
@@ -0,0 +1,268 @@
+import hashlib
+import inspect
+import re
+import threading
+import time
+
+from entity_spans import EntitySpan, RULE_SCORE
+from gazetteer import tokenize
+from metrics import STAGE_SECONDS, RULE_FAMILY_SECONDS
+
+# Blank lines separate the paragraphs the anchor prefilter works on
+PARAGRAPH_BREAK = re.compile(r'\n[^\S\n]*\n\s*')
+# Longer paragraphs are split into blocks of about this size
+BLOCK_SIZE = 2000
+
+
+class RuleFamily:
+    """A labelled group of regex rules scanned together in one pass.
+
+    ``patterns`` are the individual rules, kept verbatim so each one still
+    reports its own (possibly overlapping) matches. ``gate`` is a lowercase
+    regex that must match at the start of every match of every pattern in
+    the family; it is the only expression run over the whole text, and the
+    patterns are only tried at the positions it accepts. ``gazetteers`` are
+    phrase lists matched after the patterns, sharing one tokenization.
+
+    ``anchors`` are lowercase literals (or compiled regexes) of which every
+    match of the patterns contains at least one. Paragraphs containing none
+    of them are not scanned; an empty tuple means the patterns always run.
+    Gazetteers always run over the whole text.
+    """
+
+    def __init__(self, label, patterns, gate, accept=None, flags=re.IGNORECASE, gazetteers=(), anchors=()):
+        self.label = label
+        self.patterns = list(patterns)
+        self.gate = gate
+        self.accept = accept
+        self.flags = flags
+        self.gazetteers = list(gazetteers)
+        self.anchors = tuple(anchors)
+
+
+class _CompiledFamily:
+    """Compiled form of a RuleFamily, built once per engine"""
+
+    def __init__(self, family):
+        self.label = family.label
+        self.accept = family.accept
+        self.gazetteers = family.gazetteers
+        self.patterns = [re.compile(p, family.flags) for p in family.patterns]
+        # ASCII text is gated on its lowercased copy without IGNORECASE,
+        # which is several times faster than a case-insensitive scan.
+        self.gate_fast = re.compile('(?=' + family.gate + ')')
+        self.gate_unicode = re.compile('(?=' + family.gate + ')', family.flags)
+        self.literal_anchors = tuple(a for a in family.anchors if isinstance(a, str))
+        self.pattern_anchors = tuple(a for a in family.anchors if not isinstance(a, str))
+
+    @property
+    def prefiltered(self):
+        return bool(self.literal_anchors or self.pattern_anchors)
+
+    def has_anchor(self, lowered_block):
+        """Cheap presence check run once per paragraph"""
+        for anchor in self.literal_anchors:
+            if anchor in lowered_block:
+                return True
+        for anchor in self.pattern_anchors:
+            if anchor.search(lowered_block):
+                return True
+        return False
+
+    def scan(self, text, lowered, ranges):
+        """Return per-pattern match lists, identical to one finditer per pattern.
+
+        Only matches starting inside ``ranges`` are looked for; a match may
+        still run past the end of its range.
+        """
+        hits = [[] for _ in self.patterns]
+        if not self.patterns:
+            return hits
+
+        if lowered is not None:
+            gate, source = self.gate_fast, lowered
+        else:
+            gate, source = self.gate_unicode, text
+
+        patterns = self.patterns
+        next_allowed = [0] * len(patterns)
+        for range_start, range_end in ranges:
+            for candidate in gate.finditer(source, range_start):
+                start = candidate.start()
+                if start >= range_end:
+                    break
+                for index, pattern in enumerate(patterns):
+                    # finditer never reports a match overlapping the previous
+                    # one of the same pattern, so skip until that one has ended.
+                    if start < next_allowed[index]:
+                        continue
+                    match = pattern.match(text, start)
+                    if match:
+                        hits[index].append(match)
+                        next_allowed[index] = match.end() if match.end() > start else start + 1
+        return hits
+
+
+def _family_signature(family):
+    """Everything about a family that can change what it matches"""
+    anchors = [a if isinstance(a, str) else (a.pattern, a.flags) for a in family.anchors]
+    accept = None
+    if family.accept is not None:
+        try:
+            accept = inspect.getsource(family.accept)
+        except (OSError, TypeError):
+            accept = getattr(family.accept, '__qualname__', repr(family.accept))
+    gazetteers = [(gazetteer.name, sorted(gazetteer)) for gazetteer in family.gazetteers]
+    return repr((family.label, family.patterns, family.gate, family.flags, anchors, accept, gazetteers))
+
+
+def ruleset_version(families):
+    """Short hash of the rule families, for keying cached results"""
+    digest = hashlib.sha256()
+    for family in families:
+        digest.update(_family_signature(family).encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+class RuleEngine:
+    """Compiles rule families once and extracts (text, label) pairs.
+
+    Before scanning, each paragraph is checked for the families' anchor
+    literals and a family only scans the paragraphs where one appears, plus
+    one paragraph either side so matches crossing a single paragraph break
+    are still found.
+    """
+
+    def __init__(self, families, prefilter=True):
+        self.families = [_CompiledFamily(family) for family in families]
+        self.prefilter = prefilter
+        self.version = ruleset_version(families)
+        self._stats_lock = threading.Lock()
+        self._stats = {family.label: {'paragraphs': 0, 'skipped': 0, 'chars': 0, 'skipped_chars': 0}
+                       for family in self.families}
+
+    def _lowered(self, text):
+        if text.isascii():
+            return text.lower()
+        return None
+
+    def _paragraphs(self, text):
+        """Split the text into contiguous (start, end) paragraph spans.
+
+        Extracted PDF text often has no blank lines at all, so paragraphs
+        longer than BLOCK_SIZE are cut further at the next line break, or
+        at the next space when the text has no line breaks either.
+        """
+        cuts = []
+        start = 0
+        breaks = [match.end() for match in PARAGRAPH_BREAK.finditer(text)]
+        for end in breaks + [len(text)]:
+            while end - start > BLOCK_SIZE:
+                cut = text.find('\n', start + BLOCK_SIZE, end)
+                if cut < 0:
+                    cut = text.find(' ', start + BLOCK_SIZE, end - 1)
+                if cut < 0:
+                    break
+                start = cut + 1
+                cuts.append(start)
+            if end < len(text):
+                cuts.append(end)
+            start = end
+        return list(zip([0] + cuts, cuts + [len(text)]))
+
+    def _presence(self, text, lowered, paragraphs):
+        """Bitmap per paragraph of which families have an anchor in it"""
+        masks = []
+        for start, end in paragraphs:
+            block = lowered[start:end] if lowered is not None else text[start:end].casefold()
+            mask = 0
+            for bit, family in enumerate(self.families):
+                if not family.prefiltered or family.has_anchor(block):
+                    mask |= 1 << bit
+            masks.append(mask)
+        return masks
+
+    def _active_ranges(self, paragraphs, masks, bit):
+        """Merge the paragraphs a family must scan, padded by one on each side"""
+        flag = 1 << bit
+        count = len(paragraphs)
+        active = [False] * count
+        for index, mask in enumerate(masks):
+            if mask & flag:
+                for neighbour in (index - 1, index, index + 1):
+                    if 0 <= neighbour < count:
+                        active[neighbour] = True
+
+        ranges = []
+        for index, is_active in enumerate(active):
+            if not is_active:
+                continue
+            start, end = paragraphs[index]
+            if ranges and ranges[-1][1] == start:
+                ranges[-1] = (ranges[-1][0], end)
+            else:
+                ranges.append((start, end))
+        return ranges, active.count(False)
+
+    def _record(self, family, paragraphs, skipped, ranges, length):
+        scanned_chars = sum(end - start for start, end in ranges)
+        with self._stats_lock:
+            stats = self._stats[family.label]
+            stats['paragraphs'] += paragraphs
+            stats['skipped'] += skipped
+            stats['chars'] += length
+            stats['skipped_chars'] += length - scanned_chars
+
+    def prefilter_stats(self):
+        """Per-family counts and skip rates accumulated since startup"""
+        report = {}
+        with self._stats_lock:
+            for label, stats in self._stats.items():
+                report[label] = dict(stats)
+                report[label]['skip_rate'] = stats['skipped'] / stats['paragraphs'] if stats['paragraphs'] else 0.0
+        return report
+
+    def extract_spans(self, text):
+        """Run every family over the paragraphs that can contain its matches.
+
+        Returns EntitySpans in family order, each trimmed of surrounding
+        whitespace exactly as the (text, label) form is.
+        """
+        spans = []
+        lowered = self._lowered(text)
+        tokens = None
+
+        if self.prefilter:
+            with STAGE_SECONDS.time(stage='rule_prefilter'):
+                paragraphs = self._paragraphs(text)
+                masks = self._presence(text, lowered, paragraphs)
+
+        for bit, family in enumerate(self.families):
+            started = time.perf_counter()
+            if self.prefilter and family.prefiltered:
+                ranges, skipped = self._active_ranges(paragraphs, masks, bit)
+                self._record(family, len(paragraphs), skipped, ranges, len(text))
+            else:
+                ranges = [(0, len(text))]
+
+            for matches in family.scan(text, lowered, ranges):
+                for match in matches:
+                    matched = match.group()
+                    entity_text = matched.strip()
+                    if family.accept is None or family.accept(entity_text):
+                        start = match.start() + len(matched) - len(matched.lstrip())
+                        spans.append(EntitySpan(start, start + len(entity_text), family.label, 'rule', RULE_SCORE))
+
+            for gazetteer in family.gazetteers:
+                if tokens is None:
+                    tokens = tokenize(text)
+                for start, end, _ in gazetteer.find_tokens(tokens):
+                    if family.accept is None or family.accept(text[start:end]):
+                        spans.append(EntitySpan(start, end, family.label, 'rule', RULE_SCORE))
+            RULE_FAMILY_SECONDS.observe(time.perf_counter() - started, family=family.label)
+
+        return spans
+
+    def extract(self, text):
+        """Return (text, label) pairs for every rule match"""
+        return [(text[span.start:span.end], span.label) for span in self.extract_spans(text)]
@@ -1,12 +1,12 @@
-import spacy
 from hybrid_ner import HybridLegalNER
+from model_registry import load_model
 import json
 from collections import defaultdict, Counter
 
 class ModelSanityChecker:
     def __init__(self, model_path="training_output/best_model"):
         self.hybrid_ner = HybridLegalNER(model_path)
-        self.nlp = spacy.load(model_path)
+        self.nlp = load_model(model_path)
     
     def check_model_weights(self):
         """Check model weights and pipeline status"""
@@ -104,12 +104,14 @@ class ModelSanityChecker:
             "test_results": []
         }
         
+        # Get hybrid results for every test case in one batch
+        batch_results = self.hybrid_ner.extract_many([test_case['text'] for test_case in test_cases])
+        
         for i, test_case in enumerate(test_cases, 1):
             print(f"\n📝 Test {i}: {test_case['name']}")
             print(f"Text: {test_case['text']}")
             
-            # Get hybrid results
-            result = self.hybrid_ner.extract_entities(test_case['text'])
+            result = batch_results[i - 1]
             
             ml_entities = result['ml_entities']
             rule_entities = result['rule_entities']
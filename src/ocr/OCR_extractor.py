@@ -1,9 +1,6 @@
-from pdf2image import convert_from_path
-import pytesseract
+from .page_ocr import ocr_pages
 
-def scannedPdf_textExtraction(pdf_path):
-    images = convert_from_path(pdf_path)
-    text = ""
-    for img in images:
-        text += pytesseract.image_to_string(img)
-    return text
+def scannedPdf_textExtraction(pdf_path, workers=None, report=None):
+    """OCR every page, several at a time, and join the text in page order"""
+    pages = ocr_pages(pdf_path, workers=workers, report=report)
+    return "".join(page['text'] for page in pages)
@@ -0,0 +1,84 @@
+import json
+import os
+import sqlite3
+import time
+
+from .text_cache import file_sha256
+
+
+class CorpusManifest:
+    """Record of every file a corpus run has extracted, in SQLite.
+
+    Each file is keyed by its path relative to the corpus, with its size,
+    modification time and SHA-256, the settings it was extracted with, its
+    output file, status ('running', 'done' or 'failed'), error and timings.
+    A file is marked running before its work starts and done once its
+    output is written, so after a crash the next run redoes only the
+    files that never finished.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('CREATE TABLE IF NOT EXISTS files '
+                                 '(path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, sha256 TEXT, '
+                                 'settings TEXT, output TEXT, status TEXT, error TEXT, '
+                                 'started REAL, finished REAL, seconds REAL, details TEXT)')
+
+    def entry(self, path):
+        cursor = self._connection.execute('SELECT * FROM files WHERE path = ?', (path,))
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        return dict(zip([column[0] for column in cursor.description], row))
+
+    def check(self, path, full_path, settings, output_path):
+        """(up to date, sha256) for a file; the hash is only computed when the stat changed.
+
+        A file is up to date if it finished with these settings, its output
+        still exists, and it has the same size and modification time as
+        then, or failing that the same content.
+        """
+        stat = os.stat(full_path)
+        entry = self.entry(path)
+        usable = (entry is not None and entry['status'] == 'done' and entry['settings'] == settings
+                  and entry['output'] == output_path and os.path.exists(output_path))
+        if usable and (entry['size'], entry['mtime_ns']) == (stat.st_size, stat.st_mtime_ns):
+            return True, entry['sha256']
+
+        sha256 = file_sha256(full_path)
+        if usable and entry['sha256'] == sha256:
+            # Touched or copied, not changed
+            self._connection.execute('UPDATE files SET size = ?, mtime_ns = ? WHERE path = ?',
+                                     (stat.st_size, stat.st_mtime_ns, path))
+            return True, sha256
+        return False, sha256
+
+    def start(self, path, full_path, sha256, settings, output_path):
+        stat = os.stat(full_path)
+        self._connection.execute(
+            'INSERT OR REPLACE INTO files (path, size, mtime_ns, sha256, settings, output, status, started) '
+            "VALUES (?, ?, ?, ?, ?, ?, 'running', ?)",
+            (path, stat.st_size, stat.st_mtime_ns, sha256, settings, output_path, time.time()))
+
+    def finish(self, path, error=None, seconds=None, **details):
+        self._connection.execute(
+            'UPDATE files SET status = ?, error = ?, finished = ?, seconds = ?, details = ? WHERE path = ?',
+            ('failed' if error else 'done', str(error) if error else None, time.time(), seconds,
+             json.dumps(details), path))
+
+    def counts(self):
+        """Files by status"""
+        return dict(self._connection.execute('SELECT status, COUNT(*) FROM files GROUP BY status'))
+
+    def close(self):
+        self._connection.close()
+
+
+def settings_fingerprint(*settings):
+    """The settings a run extracts with, as a string stored with every file"""
+    return json.dumps(settings, sort_keys=True, separators=(',', ':'))
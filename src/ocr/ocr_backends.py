@@ -0,0 +1,99 @@
+import os
+
+# Which engine reads the page images: 'tesserocr', 'pytesseract', or
+# 'auto' for tesserocr when it is installed. pytesseract stays the default
+# until benchmark_ocr.py results on the scanned corpus are in the README.
+OCR_BACKEND = os.environ.get('OCR_BACKEND', 'pytesseract')
+OCR_LANG = os.environ.get('OCR_LANG', 'eng')
+
+
+class PytesseractBackend:
+    """Runs the tesseract command once per page.
+
+    Each call writes the image to a temporary file and starts a tesseract
+    process, which loads the language data again. Needs only the
+    tesseract binary, so it is the fallback.
+    """
+
+    name = 'pytesseract'
+
+    def __init__(self, lang=OCR_LANG):
+        import pytesseract
+        self._pytesseract = pytesseract
+        self.lang = lang
+
+    def image_to_string(self, image, dpi=None):
+        config = f'--dpi {dpi}' if dpi else ''
+        return self._pytesseract.image_to_string(image, lang=self.lang, config=config)
+
+    def close(self):
+        pass
+
+
+class TesserocrBackend:
+    """Keeps one tesseract engine loaded in this process.
+
+    Pages are handed over as raw pixel buffers through the tesseract API:
+    no temporary files, no process start, and the language data is read
+    once for the life of the process. Needs the tesserocr package.
+    """
+
+    name = 'tesserocr'
+
+    def __init__(self, lang=OCR_LANG):
+        import tesserocr
+        self.lang = lang
+        self._api = tesserocr.PyTessBaseAPI(lang=lang)
+
+    def image_to_string(self, image, dpi=None):
+        if image.mode not in ('L', 'RGB'):
+            image = image.convert('RGB')
+        bytes_per_pixel = 1 if image.mode == 'L' else 3
+        self._api.SetImageBytes(image.tobytes(), image.width, image.height,
+                                bytes_per_pixel, image.width * bytes_per_pixel)
+        if dpi:
+            self._api.SetSourceResolution(dpi)
+        try:
+            return self._api.GetUTF8Text()
+        finally:
+            self._api.Clear()
+
+    def close(self):
+        self._api.End()
+
+
+BACKENDS = {
+    'tesserocr': TesserocrBackend,
+    'pytesseract': PytesseractBackend
+}
+
+
+def resolve_backend(name=None):
+    """The backend 'auto' would pick, and the tesseract version behind it"""
+    name = name or OCR_BACKEND
+    if name in ('auto', 'tesserocr'):
+        try:
+            import tesserocr
+            return 'tesserocr', tesserocr.tesseract_version().split()[1]
+        except ImportError:
+            if name == 'tesserocr':
+                raise
+    import pytesseract
+    try:
+        version = str(pytesseract.get_tesseract_version())
+    except (OSError, pytesseract.TesseractNotFoundError):
+        version = None
+    return 'pytesseract', version
+
+
+def load_backend(name=None, lang=OCR_LANG):
+    """An OCR backend by name; 'auto' falls back to pytesseract without tesserocr"""
+    name = name or OCR_BACKEND
+    if name != 'auto':
+        if name not in BACKENDS:
+            raise ValueError(f"Unknown OCR backend {name!r} (choose from {', '.join(BACKENDS)} or auto)")
+        return BACKENDS[name](lang)
+    try:
+        return TesserocrBackend(lang)
+    except (ImportError, RuntimeError):
+        return PytesseractBackend(lang)
@@ -0,0 +1,206 @@
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+from pdf2image import convert_from_path, pdfinfo_from_path
+
+from .ocr_backends import OCR_BACKEND, load_backend
+
+# Resolution pages are rasterized at before OCR
+DEFAULT_DPI = 200
+
+# Most pages rendered at once by one process. A 200 dpi letter page is
+# about 11 MB as an image, so this bounds memory however long the PDF.
+RASTER_WINDOW = int(os.environ.get('OCR_RASTER_WINDOW', 4))
+
+# OCR worker processes; defaults to one per core. Servers running several
+# processes should divide the cores between them (gunicorn.conf.py does).
+OCR_WORKERS = int(os.environ.get('OCR_WORKERS', 0)) or os.cpu_count() or 1
+
+# The pool is shut down after this long without a document to OCR; 0 keeps it
+OCR_POOL_IDLE_SECONDS = float(os.environ.get('OCR_POOL_IDLE_SECONDS', 300))
+
+
+# This process's OCR engine, loaded once and kept: (backend name, pid, backend)
+_backend = None
+
+# The worker pool, kept between documents so the workers' engines stay loaded
+_pool = None
+_pool_key = None
+_pool_lock = threading.Lock()
+# Documents using the pool right now, and the timer that stops it when idle
+_pool_users = 0
+_idle_timer = None
+
+
+def worker_backend(name=OCR_BACKEND):
+    """This process's OCR backend, loaded on first use"""
+    global _backend
+    if _backend is None or _backend[:2] != (name, os.getpid()):
+        _backend = (name, os.getpid(), load_backend(name))
+    return _backend[2]
+
+
+def _start_worker(backend_name):
+    # Tesseract spreads each page over every core with OpenMP. With a page
+    # per process that only makes the processes fight over the cores.
+    os.environ['OMP_THREAD_LIMIT'] = '1'
+    worker_backend(backend_name)
+
+
+def ocr_pool(workers, backend_name=OCR_BACKEND):
+    """The shared pool of OCR processes, started or resized as needed"""
+    global _pool, _pool_key
+    key = (workers, backend_name, os.getpid())
+    with _pool_lock:
+        if _pool is None or _pool_key != key:
+            if _pool is not None and _pool_key[2] == os.getpid():
+                _pool.shutdown(wait=False)
+            # Spawned rather than forked: the caller may be a threaded server
+            # holding a loaded model, none of which the workers need
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                        initializer=_start_worker, initargs=(backend_name,))
+            _pool_key = key
+        return _pool
+
+
+def shutdown_pool():
+    """Stop the OCR worker processes; the next document starts new ones"""
+    global _pool, _pool_key
+    with _pool_lock:
+        if _pool is not None and _pool_key[2] == os.getpid():
+            _pool.shutdown()
+        _pool = _pool_key = None
+
+
+def _use_pool():
+    global _pool_users
+    with _pool_lock:
+        _pool_users += 1
+        if _idle_timer is not None:
+            _idle_timer.cancel()
+
+
+def _release_pool():
+    """Done with the pool; once nothing uses it for a while, it is shut down"""
+    global _pool_users, _idle_timer
+    with _pool_lock:
+        _pool_users -= 1
+        if _pool_users == 0 and _pool is not None and OCR_POOL_IDLE_SECONDS > 0:
+            _idle_timer = threading.Timer(OCR_POOL_IDLE_SECONDS, _shutdown_idle, args=(_pool,))
+            _idle_timer.daemon = True
+            _idle_timer.start()
+
+
+def _shutdown_idle(pool):
+    global _pool, _pool_key
+    with _pool_lock:
+        if _pool is not pool or _pool_users or _pool_key[2] != os.getpid():
+            return
+        _pool = _pool_key = None
+    pool.shutdown()
+
+
+def page_runs(pages, size):
+    """Split page numbers into runs of at most size consecutive pages"""
+    runs = []
+    for page_number in sorted(pages):
+        if runs and len(runs[-1]) < size and runs[-1][-1] == page_number - 1:
+            runs[-1].append(page_number)
+        else:
+            runs.append([page_number])
+    return runs
+
+
+def rasterize(pdf_path, pages, dpi=DEFAULT_DPI, window=RASTER_WINDOW):
+    """Yield (page number, image, seconds) for the pages, rendering a window at a time.
+
+    Only one window of images exists at once: the next is rendered when
+    the consumer has moved past the last one.
+    """
+    for run in page_runs(pages, window):
+        start = time.perf_counter()
+        images = convert_from_path(pdf_path, dpi=dpi, first_page=run[0], last_page=run[-1])
+        seconds = (time.perf_counter() - start) / len(run)
+        images.reverse()
+        for page_number in run:
+            # Drop our reference as each page is handed out
+            yield page_number, images.pop(), seconds
+
+
+def ocr_run(pdf_path, pages, dpi=DEFAULT_DPI, window=RASTER_WINDOW, backend_name=OCR_BACKEND):
+    """Rasterize and OCR some pages (numbered from 1), with timings per page"""
+    backend = worker_backend(backend_name)
+    results = []
+    for page_number, image, rasterize_seconds in rasterize(pdf_path, pages, dpi, window):
+        start = time.perf_counter()
+        text = backend.image_to_string(image, dpi)
+        del image
+        results.append({
+            'page': page_number,
+            'text': text,
+            'rasterize_seconds': rasterize_seconds,
+            'ocr_seconds': time.perf_counter() - start
+        })
+    return results
+
+
+def page_count(pdf_path):
+    return int(pdfinfo_from_path(pdf_path)['Pages'])
+
+
+def ocr_pages(pdf_path, workers=None, dpi=DEFAULT_DPI, pages=None, report=None, window=RASTER_WINDOW,
+              backend=OCR_BACKEND):
+    """OCR a PDF's pages in parallel; returns one result per page, in page order.
+
+    The pages are split into runs of consecutive pages, at most ``window``
+    long and short enough to keep every worker busy. Each worker process
+    renders and reads its own runs a window at a time, so images never
+    cross processes and peak memory is set by the window, not the page
+    count. The workers, and the OCR engine each has loaded, are kept for
+    the next document, until OCR_POOL_IDLE_SECONDS pass without one.
+    ``pages`` limits the work to those page numbers, and
+    ``report(pages_done, page_count, result)`` is called as each page
+    finishes, in completion order.
+    """
+    if pages is None:
+        pages = range(1, page_count(pdf_path) + 1)
+    pages = list(pages)
+    workers = workers or OCR_WORKERS
+
+    results = {}
+
+    def collect(run_results):
+        for result in run_results:
+            results[result['page']] = result
+            if report:
+                report(len(results), len(pages), result)
+
+    if min(workers, len(pages)) <= 1:
+        for run in page_runs(pages, window):
+            collect(ocr_run(pdf_path, run, dpi, window, backend))
+    else:
+        run_size = max(1, min(window, -(-len(pages) // workers)))
+        _use_pool()
+        try:
+            # Sized for the setting, not this document, so it is kept for the next
+            pool = ocr_pool(workers, backend)
+            futures = [pool.submit(ocr_run, pdf_path, run, dpi, window, backend)
+                       for run in page_runs(pages, run_size)]
+            try:
+                for future in as_completed(futures):
+                    collect(future.result())
+            except BaseException as e:
+                # Don't OCR the rest of a document that has failed
+                for future in futures:
+                    future.cancel()
+                if isinstance(e, BrokenProcessPool):
+                    shutdown_pool()
+                raise
+        finally:
+            _release_pool()
+
+    return [results[page_number] for page_number in pages]
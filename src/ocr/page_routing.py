@@ -0,0 +1,151 @@
+import functools
+
+import fitz  # PyMuPDF
+
+from .ocr_backends import OCR_BACKEND, OCR_LANG, resolve_backend
+from .page_ocr import DEFAULT_DPI, ocr_pages
+from .text_cache import default_cache, file_sha256, page_fingerprint, settings_key
+
+# A page with this much text layer is digital whatever else is on it
+DENSE_TEXT_CHARS = 200
+# Below this, a text layer is a stamp or page number, not the page's content
+MIN_TEXT_CHARS = 20
+# Share of the page covered by images above which thin text means a scan
+SCAN_IMAGE_COVERAGE = 0.5
+
+# Part of every cache key, so changing a threshold re-reads the pages
+ROUTING_SETTINGS = {'dense': DENSE_TEXT_CHARS, 'min': MIN_TEXT_CHARS, 'coverage': SCAN_IMAGE_COVERAGE}
+# Bumped when the shape of a cached document result changes
+RESULT_FORMAT = 2
+
+
+def image_coverage(page):
+    """Share of the page's area covered by images, at most 1"""
+    area = abs(page.rect)
+    if not area:
+        return 0.0
+    covered = 0.0
+    for info in page.get_image_info():
+        covered += abs(fitz.Rect(info['bbox']) & page.rect)
+    return min(covered / area, 1.0)
+
+
+def classify_page(text, coverage):
+    """'digital', 'scanned' or 'blank' from a page's text layer and image coverage"""
+    chars = len(text.strip())
+    if chars >= DENSE_TEXT_CHARS:
+        return 'digital'
+    if coverage >= SCAN_IMAGE_COVERAGE:
+        return 'scanned'
+    if chars >= MIN_TEXT_CHARS:
+        return 'digital'
+    # Little or no text: worth reading only if there is an image to read
+    return 'scanned' if coverage > 0 else 'blank'
+
+
+def source_type(counts):
+    """Overall 'digital', 'scanned' or 'mixed' from per-page counts"""
+    if counts['scanned'] and counts['digital']:
+        return 'mixed'
+    return 'scanned' if counts['scanned'] else 'digital'
+
+
+@functools.lru_cache(maxsize=None)
+def ocr_settings(dpi=DEFAULT_DPI, backend=OCR_BACKEND):
+    """Everything besides the page itself that decides its OCR text"""
+    name, version = resolve_backend(backend)
+    return {'dpi': dpi, 'backend': name, 'tesseract': version, 'lang': OCR_LANG}
+
+
+def extract_text(pdf_path, workers=None, report=None, cache=True, dpi=DEFAULT_DPI, backend=OCR_BACKEND):
+    """Text of a PDF, from its text layer where it has one and OCR where it doesn't.
+
+    Every page is classified on its own, so a digital contract with
+    scanned signature pages or exhibits only pays for OCR on those pages.
+    Returns the text in page order, the overall source type, per-page
+    methods and text offsets, and how many pages went each way. ``report(stage, pages_done,
+    page_count)`` is called per page, with stage 'text_layer' then 'ocr'.
+
+    Results are looked up in ``cache`` (the shared TextCache by default,
+    False for none) before the PDF is opened, and failing that page by
+    page, so only pages not seen before under these settings are read.
+    """
+    if cache is True:
+        cache = default_cache()
+    cache = cache if cache and cache.path else None
+    if cache:
+        settings = ocr_settings(dpi, backend)
+        document_key = settings_key('document', file_sha256(pdf_path), [RESULT_FORMAT, ROUTING_SETTINGS, settings])
+        stored = cache.get(document_key)
+        if stored is not None:
+            stored['cached_pages'] = stored['page_count']
+            return stored
+
+    pages = []
+    fresh = {}
+    with fitz.open(pdf_path) as doc:
+        page_count = len(doc)
+        fingerprints = [page_fingerprint(doc, page) for page in doc] if cache else []
+        page_keys = [settings_key('page', fingerprint, ROUTING_SETTINGS) for fingerprint in fingerprints]
+        known = cache.get_many(page_keys) if cache else {}
+        for number, page in enumerate(doc, 1):
+            record = known.get(page_keys[number - 1]) if cache else None
+            cached = record is not None
+            if record is None:
+                text = page.get_text()
+                coverage = image_coverage(page)
+                record = {
+                    'method': classify_page(text, coverage),
+                    'text_chars': len(text.strip()),
+                    'image_coverage': round(coverage, 3),
+                    'text': text
+                }
+                if cache:
+                    fresh[page_keys[number - 1]] = record
+            pages.append(dict(record, page=number, cached=cached))
+            if report:
+                report('text_layer', number, page_count)
+
+    scanned = [page['page'] for page in pages if page['method'] == 'scanned']
+    if scanned and cache:
+        ocr_keys = {number: settings_key('ocr', fingerprints[number - 1], settings) for number in scanned}
+        known = cache.get_many(list(ocr_keys.values()))
+        for number in scanned:
+            record = known.get(ocr_keys[number])
+            if record is not None:
+                pages[number - 1]['text'] = record['text']
+            else:
+                pages[number - 1]['cached'] = False
+        scanned = [number for number in scanned if ocr_keys[number] not in known]
+
+    if scanned:
+        if report:
+            report('ocr', 0, len(scanned))
+        progress = report and (lambda done, count, result: report('ocr', done, count))
+        for result in ocr_pages(pdf_path, workers=workers, pages=scanned, report=progress,
+                                dpi=dpi, backend=backend):
+            page = pages[result['page'] - 1]
+            page['text'] = result['text']
+            page['ocr_seconds'] = result['ocr_seconds'] + result['rasterize_seconds']
+            if cache:
+                fresh[ocr_keys[result['page']]] = {'text': result['text']}
+
+    counts = {'digital': 0, 'scanned': 0, 'blank': 0}
+    offset = 0
+    for page in pages:
+        counts[page['method']] += 1
+        # Where the page sits in the joined text
+        page['start'] = offset
+        offset = page['end'] = offset + len(page['text'])
+    extracted = {
+        'text': ''.join(page['text'] for page in pages),
+        'source_type': source_type(counts),
+        'page_count': page_count,
+        'page_methods': counts,
+        'cached_pages': sum(1 for page in pages if page['cached']),
+        'pages': [{key: value for key, value in page.items() if key not in ('text', 'cached')} for page in pages]
+    }
+    if cache:
+        fresh[document_key] = dict(extracted, cached_pages=0)
+        cache.put_many(fresh)
+    return extracted
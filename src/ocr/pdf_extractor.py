@@ -0,0 +1,135 @@
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from .page_routing import extract_text
+
+
+def extract_pdf(pdf_path, workers=None, cache=True, report=None):
+    """Text of one PDF, extracted in this process.
+
+    Returns the dict from page_routing.extract_text: the full text, the
+    source type, per-page methods and counts, and per-page results whose
+    start and end give the page's slice of the text. ``workers`` is the
+    number of OCR processes for scanned pages.
+    """
+    return extract_text(pdf_path, workers=workers, report=report, cache=cache)
+
+
+def page_text(extracted, page_number):
+    """The text of one page (numbered from 1) of an extract_pdf result"""
+    page = extracted['pages'][page_number - 1]
+    return extracted['text'][page['start']:page['end']]
+
+
+def _extract_isolated(pdf_path, ocr_workers, cache):
+    start = time.perf_counter()
+    extracted = extract_pdf(pdf_path, workers=ocr_workers, cache=cache)
+    # Time in the worker, not counting the wait for a free one
+    extracted['seconds'] = time.perf_counter() - start
+    return extracted
+
+
+class ExtractionPool:
+    """Extracts PDFs in a pool of warm worker processes.
+
+    For batches, and for files that should not be able to take the
+    caller down: a PDF that crashes MuPDF or exhausts memory kills a
+    worker, not the caller. Workers start once and are reused for every
+    file, and each one OCRs its own document with ``ocr_workers``
+    processes (inline by default, since the files already run in
+    parallel).
+    """
+
+    def __init__(self, workers=2, ocr_workers=1, cache=True):
+        self.workers = workers
+        self.ocr_workers = ocr_workers
+        self.cache = cache
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                     mp_context=multiprocessing.get_context('spawn'))
+            return self._executor
+
+    def _restart(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def submit(self, pdf_path):
+        """Future for one PDF's extract_pdf result"""
+        return self._pool().submit(_extract_isolated, pdf_path, self.ocr_workers, self.cache)
+
+    def extract(self, pdf_path):
+        """One PDF's extract_pdf result, waiting for it; callable from several threads.
+
+        If the pool dies under the file, it is restarted and the file
+        tried once more, so a file that kills it every time raises.
+        """
+        executor = self._pool()
+        try:
+            return executor.submit(_extract_isolated, pdf_path, self.ocr_workers, self.cache).result()
+        except BrokenProcessPool:
+            with self._lock:
+                # Only the first thread to see the broken pool replaces it
+                if self._executor is executor:
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    self._executor = None
+        try:
+            return self.submit(pdf_path).result()
+        except BrokenProcessPool as e:
+            raise RuntimeError(f"Extraction worker died on {pdf_path}: {e}")
+
+    def extract_many(self, pdf_paths, ahead=None):
+        """Yield (pdf_path, result, error) for every PDF, in order, as each is ready.
+
+        Files are queued ``ahead`` at a time (default four per worker), so
+        the workers stay busy while the caller works on the results
+        already yielded, without a whole corpus queued or held at once.
+        If a worker dies, the file being waited on is retried alone to
+        find the one that killed it, and the rest are queued again.
+        """
+        pdf_paths = list(pdf_paths)
+        ahead = ahead or self.workers * 4
+        futures = {}
+        for index, pdf_path in enumerate(pdf_paths):
+            for queued in range(index, min(index + ahead, len(pdf_paths))):
+                if queued not in futures:
+                    futures[queued] = self.submit(pdf_paths[queued])
+            try:
+                result, error = futures.pop(index).result(), None
+            except BrokenProcessPool:
+                result, error = self._retry_alone(pdf_path)
+                for queued in futures:
+                    futures[queued] = self.submit(pdf_paths[queued])
+            except Exception as e:
+                result, error = None, e
+            yield pdf_path, result, error
+
+    def _retry_alone(self, pdf_path):
+        """(result, error) for a file whose pool died, run on a fresh pool by itself"""
+        self._restart()
+        try:
+            return self.submit(pdf_path).result(), None
+        except BrokenProcessPool as e:
+            self._restart()
+            return None, RuntimeError(f"Extraction worker died on {pdf_path}: {e}")
+        except Exception as e:
+            return None, e
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
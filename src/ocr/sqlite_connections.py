@@ -0,0 +1,35 @@
+import os
+import sqlite3
+import threading
+
+
+class ThreadConnections:
+    """One SQLite connection per thread to a database shared between processes.
+
+    Connections are opened on first use in autocommit mode with WAL
+    journaling, so readers in other processes carry on while one writes,
+    and ``schema`` statements (CREATE ... IF NOT EXISTS) run on each. A
+    connection must not cross a fork, so a child process opens its own.
+    """
+
+    def __init__(self, path, schema=(), synchronous=None, timeout=30):
+        self.path = path
+        self.schema = list(schema)
+        self.synchronous = synchronous
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def get(self):
+        """This thread's connection, reopened after a fork"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None and self._local.pid == os.getpid():
+            return connection
+        connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+        connection.execute('PRAGMA journal_mode=WAL')
+        if self.synchronous:
+            connection.execute(f'PRAGMA synchronous={self.synchronous}')
+        for statement in self.schema:
+            connection.execute(statement)
+        self._local.connection = connection
+        self._local.pid = os.getpid()
+        return connection
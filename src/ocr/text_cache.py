@@ -0,0 +1,180 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from .sqlite_connections import ThreadConnections
+
+# Shared by every entry point, wherever it is run from
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                            'data', 'cache', 'pdf_text.sqlite3')
+PDF_TEXT_CACHE = os.environ.get('PDF_TEXT_CACHE', DEFAULT_PATH)
+PDF_TEXT_CACHE_MB = int(os.environ.get('PDF_TEXT_CACHE_MB', 512))
+
+# How often (in writes) the cache checks whether it is over its size
+PRUNE_EVERY = 64
+
+
+def file_sha256(path):
+    """Hex SHA-256 of a file's bytes"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def page_fingerprint(doc, page):
+    """Hash of what a page draws: its content stream, images and form objects.
+
+    Unchanged pages of an edited PDF keep their fingerprint even though the
+    file's hash changes, so only the edited pages are extracted again.
+    """
+    digest = hashlib.sha256()
+    digest.update(repr((tuple(page.rect), page.rotation)).encode())
+    digest.update(page.read_contents())
+    xrefs = {image[0] for image in page.get_images(full=True)}
+    xrefs.update(xobject[0] for xobject in page.get_xobjects())
+    for xref in sorted(xrefs):
+        if xref > 0:
+            digest.update(doc.xref_stream_raw(xref) or b'')
+    return digest.hexdigest()
+
+
+def settings_key(kind, content_hash, settings):
+    """Cache key for a document or page hash under the extraction settings"""
+    payload = json.dumps([kind, content_hash, settings], sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class TextCache:
+    """Extracted PDF text in SQLite, keyed by content hash and settings.
+
+    Whole documents are stored under the file's SHA-256, so a PDF seen
+    before, under any file name, is answered without opening it. Pages
+    are stored under their own fingerprint, so a document that changed in
+    places only has its changed pages extracted again. The database keeps
+    to about ``max_mb`` of stored text, dropping the least recently used
+    entries first. Errors are reported and otherwise ignored: the cache
+    never stops an extraction.
+    """
+
+    def __init__(self, path=PDF_TEXT_CACHE, max_mb=PDF_TEXT_CACHE_MB):
+        self.path = path
+        self.max_bytes = max_mb * 1024 * 1024
+        self._connections = ThreadConnections(path, synchronous='NORMAL', schema=[
+            'CREATE TABLE IF NOT EXISTS entries '
+            '(key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, used REAL NOT NULL)',
+            'CREATE INDEX IF NOT EXISTS entries_used ON entries (used)'
+        ])
+        self._lock = threading.Lock()
+        self._writes = 0
+        if path:
+            try:
+                directory = os.path.dirname(path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                self._connection()
+            except (OSError, sqlite3.Error) as e:
+                self._error('open', e)
+                self.path = None
+
+    def _connection(self):
+        """This thread's connection, reopened after a fork"""
+        return self._connections.get()
+
+    def _error(self, action, error):
+        print(f"⚠️ PDF text cache could not {action} {self.path}: {error}")
+
+    def get_many(self, keys):
+        """The cached values among keys, as a dict; marks them recently used"""
+        if not self.path or not keys:
+            return {}
+        try:
+            connection = self._connection()
+            found = {}
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                marks = ','.join('?' * len(chunk))
+                for key, value in connection.execute(f'SELECT key, value FROM entries WHERE key IN ({marks})', chunk):
+                    found[key] = json.loads(value)
+            if found:
+                connection.executemany('UPDATE entries SET used = ? WHERE key = ?',
+                                       [(time.time(), key) for key in found])
+            return found
+        except (sqlite3.Error, ValueError) as e:
+            self._error('read', e)
+            return {}
+
+    def get(self, key):
+        return self.get_many([key]).get(key)
+
+    def put_many(self, items):
+        """Store a dict of key -> JSON-serializable value"""
+        if not self.path or not items:
+            return
+        now = time.time()
+        rows = []
+        for key, value in items.items():
+            value = json.dumps(value, ensure_ascii=False)
+            rows.append((key, value, len(value), now))
+        try:
+            connection = self._connection()
+            connection.executemany('INSERT OR REPLACE INTO entries (key, value, size, used) VALUES (?, ?, ?, ?)', rows)
+            with self._lock:
+                self._writes += len(rows)
+                prune = self._writes >= PRUNE_EVERY
+                if prune:
+                    self._writes = 0
+            if prune:
+                self.prune()
+        except sqlite3.Error as e:
+            self._error('write', e)
+
+    def put(self, key, value):
+        self.put_many({key: value})
+
+    def prune(self):
+        """Drop the least recently used entries until under the size limit"""
+        connection = self._connection()
+        total = connection.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+        if total <= self.max_bytes:
+            return 0
+        # Go a little under so the next few writes don't prune again
+        excess = total - int(self.max_bytes * 0.9)
+        doomed = []
+        freed = 0
+        for key, size in connection.execute('SELECT key, size FROM entries ORDER BY used'):
+            if freed >= excess:
+                break
+            doomed.append((key,))
+            freed += size
+        connection.execute('BEGIN')
+        try:
+            connection.executemany('DELETE FROM entries WHERE key = ?', doomed)
+            connection.execute('COMMIT')
+        except BaseException:
+            # Never leave this thread's shared connection inside a transaction
+            connection.execute('ROLLBACK')
+            raise
+        return len(doomed)
+
+    def stats(self):
+        if not self.path:
+            return {'path': None}
+        count, size = self._connection().execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries').fetchone()
+        return {'path': self.path, 'entries': count, 'mb': round(size / (1024 * 1024), 2),
+                'max_mb': self.max_bytes // (1024 * 1024)}
+
+
+_default = None
+
+
+def default_cache():
+    """The cache every extraction shares unless told otherwise"""
+    global _default
+    if _default is None:
+        _default = TextCache()
+    return _default
@@ -1,34 +1,42 @@
 import os
 import glob
+import sys
+import time
 
-from ocr.pdf_text import pdf_textExtraction
-from ocr.OCR_extractor import scannedPdf_textExtraction
+from ocr.corpus_manifest import CorpusManifest, settings_fingerprint
+from ocr.page_routing import RESULT_FORMAT, ROUTING_SETTINGS, extract_text, ocr_settings
+from ocr.pdf_extractor import ExtractionPool
 from ocr.text_cleaning import clean_text
 
+# Corpus layout, relative to the repository rather than the working directory
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_INPUT = os.path.join(REPO_ROOT, "data", "raw pdfs")
+DEFAULT_OUTPUT = os.path.join(REPO_ROOT, "data", "extracted_text")
+PDF_FOLDERS = ["Digital", "Scanned"]
+
+# Bumped when what save_extracted_text writes changes, so outputs are redone
+OUTPUT_FORMAT = 1
+
 
 def process_pdf(pdf_path):
     """
-    Decide whether the PDF is digital or scanned,
+    Classify each page as digital or scanned,
     extract text accordingly, then clean it.
     """
 
-    
-    if "scanned" in pdf_path.lower():
-        text = scannedPdf_textExtraction(pdf_path)
-        source_type = "scanned"
-    else:
-        text = pdf_textExtraction(pdf_path)
-        source_type = "digital"
+    extracted = extract_text(pdf_path)
 
-   
-    if len(text.strip()) < 50:
-        text = scannedPdf_textExtraction(pdf_path)
-        source_type = "scanned"
+    counts = extracted["page_methods"]
+    print(f"  {extracted['page_count']} pages: {counts['digital']} text layer, "
+          f"{counts['scanned']} OCR, {counts['blank']} blank")
+    for page in extracted["pages"]:
+        if page["method"] == "scanned":
+            seconds = page.get("ocr_seconds")
+            print(f"  OCR page {page['page']}: " + (f"{seconds:.1f}s" if seconds is not None else "cached"))
 
-   
-    cleaned_text = clean_text(text)
+    cleaned_text = clean_text(extracted["text"])
 
-    return cleaned_text, source_type
+    return cleaned_text, extracted["source_type"]
 
 
 def save_extracted_text(text, output_path, source_type):
@@ -37,23 +45,20 @@ def save_extracted_text(text, output_path, source_type):
     """
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
 
-    with open(output_path, "w", encoding="utf-8") as f:
+    # Written aside and moved into place, so a crash never leaves half a file
+    temporary = f"{output_path}.{os.getpid()}.tmp"
+    with open(temporary, "w", encoding="utf-8") as f:
         f.write(f"SOURCE_TYPE: {source_type}\n\n")
         f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary, output_path)
 
 
-def process_all_pdfs():
-    """
-    Batch process all PDFs from data/raw_pdfs
-    and save outputs to data/extracted_text
-    """
-
-    base_data_path = "../data/raw pdfs"
-    output_base_path = "../data/extracted_text"
-
-    pdf_folders = ["Digital", "Scanned"]
-
-    for folder in pdf_folders:
+def find_pdfs(base_data_path, output_base_path):
+    """(corpus-relative path, full path, output path) for every PDF in the corpus folders"""
+    files = []
+    for folder in PDF_FOLDERS:
         input_folder = os.path.join(base_data_path, folder)
         output_folder = os.path.join(output_base_path, folder.lower())
 
@@ -61,24 +66,80 @@ def process_all_pdfs():
             print(f"Folder not found: {input_folder}")
             continue
 
-        pdf_files = glob.glob(os.path.join(input_folder, "*.pdf"))
-
-        for pdf_path in pdf_files:
-            print(f"Processing: {pdf_path}")
+        for pdf_path in sorted(glob.glob(os.path.join(input_folder, "*.pdf"))):
+            txt_name = os.path.splitext(os.path.basename(pdf_path))[0] + ".txt"
+            files.append((os.path.relpath(pdf_path, base_data_path), pdf_path,
+                          os.path.join(output_folder, txt_name)))
+    return files
 
-            try:
-                extracted_text, source_type = process_pdf(pdf_path)
 
-                pdf_name = os.path.basename(pdf_path)
-                txt_name = os.path.splitext(pdf_name)[0] + ".txt"
-                output_path = os.path.join(output_folder, txt_name)
+def process_all_pdfs(base_data_path=DEFAULT_INPUT, output_base_path=DEFAULT_OUTPUT, workers=None, force=False):
+    """
+    Batch process all PDFs from data/raw pdfs
+    and save outputs to data/extracted_text.
+
+    A manifest next to the outputs records every file's size, mtime,
+    hash, settings, status and timings. Files already done with the same
+    content and settings are skipped, so a re-run only processes new or
+    changed files, and one after a crash picks up where it stopped.
+    The rest are extracted on a pool of worker processes.
+    """
 
-                save_extracted_text(extracted_text, output_path, source_type)
-                print(f"Saved → {output_path}")
+    start_time = time.perf_counter()
+    manifest = CorpusManifest(os.path.join(output_base_path, "manifest.sqlite3"))
+    settings = settings_fingerprint(RESULT_FORMAT, OUTPUT_FORMAT, ROUTING_SETTINGS, ocr_settings())
 
-            except Exception as e:
-                print(f"Error processing {pdf_path}: {e}")
+    todo = []
+    skipped = 0
+    for path, pdf_path, output_path in find_pdfs(base_data_path, output_base_path):
+        current, sha256 = manifest.check(path, pdf_path, settings, output_path)
+        if current and not force:
+            skipped += 1
+            continue
+        todo.append((path, pdf_path, output_path, sha256))
+
+    print(f"📄 {len(todo)} PDFs to process, {skipped} unchanged")
+    done = failed = 0
+    if todo:
+        cpus = os.cpu_count() or 1
+        workers = min(workers or cpus, len(todo))
+        for path, pdf_path, output_path, sha256 in todo:
+            manifest.start(path, pdf_path, sha256, settings, output_path)
+
+        # Fewer files than cores: the spare cores OCR each file's pages
+        with ExtractionPool(workers=workers, ocr_workers=max(1, cpus // workers)) as pool:
+            outputs = {pdf_path: (path, output_path) for path, pdf_path, output_path, _ in todo}
+            for number, (pdf_path, extracted, error) in enumerate(pool.extract_many(outputs), 1):
+                path, output_path = outputs[pdf_path]
+                if error is None:
+                    try:
+                        save_extracted_text(clean_text(extracted["text"]), output_path, extracted["source_type"])
+                    except OSError as e:
+                        error = e
+
+                if error is not None:
+                    failed += 1
+                    manifest.finish(path, error=error)
+                    print(f"❌ [{number}/{len(todo)}] {path}: {error}")
+                    continue
+
+                done += 1
+                manifest.finish(path, seconds=extracted["seconds"], source_type=extracted["source_type"],
+                                page_count=extracted["page_count"], page_methods=extracted["page_methods"],
+                                cached_pages=extracted["cached_pages"])
+                print(f"✅ [{number}/{len(todo)}] {path} → {output_path} "
+                      f"({extracted['source_type']}, {extracted['seconds']:.1f}s)")
+
+    manifest.close()
+    print(f"\n📊 {done} processed, {failed} failed, {skipped} skipped "
+          f"in {time.perf_counter() - start_time:.1f}s")
+    return failed == 0
 
 
 if __name__ == "__main__":
-    process_all_pdfs()
+    workers = None
+    for arg in sys.argv[1:]:
+        if arg.startswith("--workers="):
+            workers = int(arg.split("=", 1)[1])
+    ok = process_all_pdfs(workers=workers, force="--force" in sys.argv[1:])
+    sys.exit(0 if ok else 1)
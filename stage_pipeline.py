@@ -0,0 +1,293 @@
+import queue
+import threading
+import time
+
+# Items a queue between two stages holds before the stage feeding it waits
+DEFAULT_QUEUE_SIZE = 8
+
+# How often blocked threads look up to see whether the run was abandoned
+_POLL_SECONDS = 0.1
+
+_DONE = object()
+
+
+class Stage:
+    """One step of a StagePipeline.
+
+    ``function`` takes the previous stage's output for one item and
+    returns this stage's. With ``batch_size`` above 1 it instead takes a
+    list of up to that many outputs, whatever is waiting when a worker
+    comes free, and returns a list of results in the same order; if a
+    batch fails its items are retried one at a time so only the failing
+    item gets the error. ``workers`` threads run the stage.
+    """
+
+    def __init__(self, name, function, workers=1, batch_size=1):
+        self.name = name
+        self.function = function
+        self.workers = max(1, workers)
+        self.batch_size = max(1, batch_size)
+
+
+class _Item:
+    __slots__ = ('index', 'item', 'value', 'error')
+
+    def __init__(self, index, item):
+        self.index = index
+        self.item = item
+        self.value = item
+        self.error = None
+
+
+class _StageState:
+    """A stage's input queue and what its workers have done"""
+
+    def __init__(self, stage, queue_size):
+        self.stage = stage
+        self.inbox = queue.Queue(maxsize=queue_size)
+        self.lock = threading.Lock()
+        self.running = stage.workers
+        self.items = 0
+        self.errors = 0
+        self.batches = 0
+        self.busy = 0.0
+        self.blocked = 0.0
+        self.depth_total = 0
+        self.depth_samples = 0
+        self.depth_max = 0
+
+
+class StagePipeline:
+    """Runs items through a chain of stages that all work at once.
+
+    Each stage has its own threads and a bounded queue in front of it, so
+    while one item is in a late stage the next ones are already in the
+    earlier ones, and a slow stage makes the ones before it wait instead
+    of piling up work. Threads suit stages that spend their time outside
+    the interpreter: waiting on worker processes, in the tokenizer and
+    model's compiled code, or on the network.
+
+    ``stats`` shows where the time goes: a stage that is busy nearly all
+    the time, with a full queue in front of it and the stages after it
+    idle, is the one to give more workers.
+    """
+
+    def __init__(self, stages, queue_size=DEFAULT_QUEUE_SIZE):
+        self.stages = list(stages)
+        self.queue_size = queue_size
+        self._states = []
+        self._started = None
+        self._finished = None
+        self._feed_error = None
+
+    def run(self, items):
+        """Yield (item, result, error) for every item, in order, as each is ready.
+
+        An item whose stage raised skips the remaining stages and comes out
+        with the error. At most about as many items as the queues and
+        workers hold are in the pipeline at once, however far ahead of the
+        slowest one the others get.
+        """
+        states = [_StageState(stage, self.queue_size) for stage in self.stages]
+        sink = queue.Queue()
+        stop = threading.Event()
+        in_flight = threading.Semaphore(sum(state.inbox.maxsize + state.stage.workers * state.stage.batch_size
+                                            for state in states))
+        self._states = states
+        self._started = time.perf_counter()
+        self._finished = None
+        self._feed_error = None
+
+        threads = [threading.Thread(target=self._feed, args=(items, states[0], in_flight, stop),
+                                    name='pipeline-feed', daemon=True)]
+        for position, state in enumerate(states):
+            following = states[position + 1] if position + 1 < len(states) else None
+            for number in range(state.stage.workers):
+                threads.append(threading.Thread(target=self._work, args=(state, following, sink, stop),
+                                                name=f'pipeline-{state.stage.name}-{number}', daemon=True))
+        for thread in threads:
+            thread.start()
+
+        waiting = {}
+        next_index = 0
+        try:
+            while True:
+                entry = sink.get()
+                if entry is _DONE:
+                    if self._feed_error is not None:
+                        raise self._feed_error
+                    break
+                waiting[entry.index] = entry
+                while next_index in waiting:
+                    entry = waiting.pop(next_index)
+                    next_index += 1
+                    in_flight.release()
+                    yield entry.item, (entry.value if entry.error is None else None), entry.error
+        finally:
+            # Also reached when the caller stops early: let every thread go
+            stop.set()
+            for thread in threads:
+                thread.join()
+            self._finished = time.perf_counter()
+
+    def _put(self, state, entry, stop):
+        """Queue an entry for a stage, waiting for room; False if the run was abandoned"""
+        while not stop.is_set():
+            try:
+                state.inbox.put(entry, timeout=_POLL_SECONDS)
+            except queue.Full:
+                continue
+            depth = state.inbox.qsize()
+            with state.lock:
+                state.depth_total += depth
+                state.depth_samples += 1
+                state.depth_max = max(state.depth_max, depth)
+            return True
+        return False
+
+    def _get(self, state, stop, block=True):
+        """Next entry for a stage, None if the run was abandoned or (not blocking) nothing waits"""
+        while not stop.is_set():
+            try:
+                return state.inbox.get(timeout=_POLL_SECONDS) if block else state.inbox.get_nowait()
+            except queue.Empty:
+                if not block:
+                    return None
+        return None
+
+    def _feed(self, items, first, in_flight, stop):
+        try:
+            for index, item in enumerate(items):
+                while not in_flight.acquire(timeout=_POLL_SECONDS):
+                    if stop.is_set():
+                        return
+                if not self._put(first, _Item(index, item), stop):
+                    return
+        except Exception as e:
+            # Raised to the caller once the items before it are out
+            self._feed_error = e
+        finally:
+            for _ in range(first.stage.workers):
+                if not self._put(first, _DONE, stop):
+                    break
+
+    def _work(self, state, following, sink, stop):
+        stage = state.stage
+        finished = False
+        while not finished and not stop.is_set():
+            entry = self._get(state, stop)
+            if entry is None:
+                return
+            if entry is _DONE:
+                break
+            batch = [entry]
+            while len(batch) < stage.batch_size:
+                entry = self._get(state, stop, block=False)
+                if entry is None:
+                    break
+                if entry is _DONE:
+                    finished = True
+                    break
+                batch.append(entry)
+
+            started = time.perf_counter()
+            live = [entry for entry in batch if entry.error is None]
+            self._process(stage, live)
+            busy = time.perf_counter() - started
+
+            started = time.perf_counter()
+            for entry in batch:
+                if following is not None:
+                    if not self._put(following, entry, stop):
+                        return
+                else:
+                    sink.put(entry)
+            with state.lock:
+                state.items += len(batch)
+                state.errors += sum(1 for entry in live if entry.error is not None)
+                state.batches += 1
+                state.busy += busy
+                state.blocked += time.perf_counter() - started
+
+        # The last worker out tells the next stage, or the sink, that the input has ended
+        with state.lock:
+            state.running -= 1
+            last = state.running == 0
+        if last:
+            if following is None:
+                sink.put(_DONE)
+            else:
+                for _ in range(following.stage.workers):
+                    if not self._put(following, _DONE, stop):
+                        break
+
+    def _process(self, stage, entries):
+        """Replace each entry's value by the stage's output, or record its error"""
+        if not entries:
+            return
+        if stage.batch_size == 1:
+            for entry in entries:
+                try:
+                    entry.value = stage.function(entry.value)
+                except Exception as e:
+                    entry.error = e
+            return
+        try:
+            values = stage.function([entry.value for entry in entries])
+        except Exception:
+            values = None
+        if values is not None:
+            for entry, value in zip(entries, values):
+                entry.value = value
+            return
+        for entry in entries:
+            try:
+                entry.value = stage.function([entry.value])[0]
+            except Exception as e:
+                entry.error = e
+
+    def stats(self):
+        """Per stage: items, errors, mean batch size, utilisation and queue depth.
+
+        Utilisation is the share of the stage's worker time spent in its
+        function; ``blocked`` is the share spent waiting for room in the
+        next stage's queue. Queue depths are sampled as items arrive.
+        """
+        if self._started is None:
+            return []
+        elapsed = (self._finished or time.perf_counter()) - self._started
+        stats = []
+        for state in self._states:
+            with state.lock:
+                capacity = elapsed * state.stage.workers
+                stats.append({
+                    'stage': state.stage.name,
+                    'workers': state.stage.workers,
+                    'items': state.items,
+                    'errors': state.errors,
+                    'mean_batch_size': state.items / state.batches if state.batches else 0.0,
+                    'busy_seconds': state.busy,
+                    'utilisation': state.busy / capacity if capacity else 0.0,
+                    'blocked': state.blocked / capacity if capacity else 0.0,
+                    'queue_size': state.inbox.maxsize,
+                    'mean_queue_depth': state.depth_total / state.depth_samples if state.depth_samples else 0.0,
+                    'max_queue_depth': state.depth_max
+                })
+        return stats
+
+    def format_stats(self):
+        """stats as a table, the busiest stage marked"""
+        stats = self.stats()
+        if not stats:
+            return ''
+        busiest = max(stats, key=lambda stage: stage['utilisation'])['stage']
+        lines = [f"{'Stage':<14}{'Workers':>8}{'Items':>7}{'Errors':>7}{'Busy s':>9}{'Util':>7}"
+                 f"{'Blocked':>9}{'Queue':>12}",
+                 '-' * 73]
+        for stage in stats:
+            queue_depth = f"{stage['mean_queue_depth']:.1f}/{stage['queue_size']}"
+            marker = '  ⬅ bottleneck' if stage['stage'] == busiest and len(stats) > 1 else ''
+            lines.append(f"{stage['stage']:<14}{stage['workers']:>8}{stage['items']:>7}{stage['errors']:>7}"
+                         f"{stage['busy_seconds']:>9.2f}{stage['utilisation']:>7.0%}{stage['blocked']:>9.0%}"
+                         f"{queue_depth:>12}{marker}")
+        return '\n'.join(lines)
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Test that normalized text maps back to the right place in the source
+"""
+
+import re
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from entity_spans import EntitySpan, ML_SCORE, resolve_overlaps
+from text_alignment import sub_with_alignment
+from text_normalizer import TextNormalizer, normalize_chained_with_alignment
+
+
+def source_of(text, normalized, alignment, entity):
+    """Source text behind the first occurrence of entity in the normalized text"""
+    start = normalized.index(entity)
+    source_start, source_end = alignment.map_span(start, start + len(entity))
+    return text[source_start:source_end]
+
+
+def test_group_text_keeps_its_offsets():
+    """Text carried over by \\1 maps back character for character"""
+    text = "Acme   Pvt  Ltd"
+    normalized, alignment = sub_with_alignment(re.compile(r'(\w+)\s+Pvt\s+Ltd'), r'\1 Corp', text)
+    assert normalized == "Acme Corp"
+    assert alignment.map_span(0, 4) == (0, 4)
+    assert alignment.map_span(1, 3) == (1, 3)
+    # The literal stands for everything the match dropped
+    assert alignment.map_span(5, 9) == (4, 15)
+
+
+def test_reordered_groups_map_to_the_whole_match():
+    text = "on 12 January 2024."
+    normalized, alignment = sub_with_alignment(re.compile(r'(\d{1,2}) (\w+) (\d{4})'), r'\2 \1, \3', text)
+    assert normalized == "on January 12, 2024."
+    assert alignment.map_span(3, 10) == (3, 18)
+    assert alignment.map_span(19, 20) == (18, 19)
+
+
+def test_two_entities_in_one_rewritten_region():
+    """Each company keeps its own source range through several chained rules"""
+    text = "x  Jan  Acme Pvt Ltd & Foo Limited"
+    for normalize in (normalize_chained_with_alignment, TextNormalizer().normalize_with_alignment):
+        normalized, alignment = normalize(text)
+        assert normalized == "x January Acme Corp and Foo Corp"
+        assert source_of(text, normalized, alignment, "January") == "Jan"
+        assert source_of(text, normalized, alignment, "Acme Corp") == "Acme Pvt Ltd"
+        assert source_of(text, normalized, alignment, "Foo Corp") == "Foo Limited"
+        assert source_of(text, normalized, alignment, " and ") == " & "
+
+        # Neither is dropped as an overlap of the other
+        spans = []
+        for entity in ("Acme Corp", "Foo Corp"):
+            start = normalized.index(entity)
+            spans.append(EntitySpan(*alignment.map_span(start, start + len(entity)), 'PARTY', 'ml', ML_SCORE))
+        assert len(resolve_overlaps(spans)) == 2
+
+
+def test_person_names_keep_their_offsets():
+    """The name rule only squeezes the space between the two words"""
+    text = "Signed by John    Smith today"
+    normalized, alignment = normalize_chained_with_alignment(text)
+    assert normalized == "Signed by John Smith today"
+    assert source_of(text, normalized, alignment, "John") == "John"
+    assert source_of(text, normalized, alignment, "Smith") == "Smith"
+    assert source_of(text, normalized, alignment, "John Smith") == "John    Smith"
+
+
+if __name__ == "__main__":
+    for name, function in list(globals().items()):
+        if name.startswith('test_'):
+            function()
+            print(f"✅ {name}")
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Test that a long document's chunked, stitched spans are the ones a
+single pass over the whole text finds
+"""
+
+import random
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from chunker import split_chunks, stitch_spans
+from entity_spans import resolve_overlaps
+from hybrid_ner import RULE_FAMILIES
+from rule_engine import RuleEngine
+
+SENTENCES = [
+    "This Master Services Agreement is made as of January 15, 2024 between Acme Holdings and Foo Bar Trust.",
+    "The Licensee shall pay USD 1,250,000.00 within 30 days to John A. Smith Jr. in New York, NY.",
+    "The term is five years and interest accrues at 4.5 percent per annum until December 31, 2029 and",
+    "Notices go to Global Capital Partners LLC, San Francisco, California, United States of America.",
+]
+
+
+def long_document(sentences=200, seed=1):
+    generator = random.Random(seed)
+    return ' '.join(generator.choice(SENTENCES) for _ in range(sentences))
+
+
+def chunked_spans(engine, text, chunks):
+    """Spans found chunk by chunk, stitched back into document offsets"""
+    return stitch_spans([engine.extract_spans(text[start:end]) for start, end in chunks], chunks)
+
+
+def test_stitched_spans_match_single_pass():
+    engine = RuleEngine(RULE_FAMILIES)
+    text = long_document()
+    whole = engine.extract_spans(text)
+    for max_chars, overlap in [(250, 120), (300, 100), (500, 150), (1000, 200)]:
+        chunks = split_chunks(text, max_chars=max_chars, overlap=overlap)
+        stitched = chunked_spans(engine, text, chunks)
+        assert set(stitched) == set(whole), (max_chars, overlap)
+        assert resolve_overlaps(stitched) == resolve_overlaps(whole), (max_chars, overlap)
+
+
+def test_entities_straddle_chunk_edges():
+    """The document above really does cut entities at chunk ends"""
+    engine = RuleEngine(RULE_FAMILIES)
+    text = long_document()
+    chunks = split_chunks(text, max_chars=250, overlap=120)
+    cut = [span for span in engine.extract_spans(text)
+           if any(span.start < end < span.end for _, end in chunks[:-1])]
+    assert len(cut) > 10
+    # Each of them comes back whole
+    assert set(cut) <= set(chunked_spans(engine, text, chunks))
+
+
+if __name__ == "__main__":
+    for name, function in list(globals().items()):
+        if name.startswith('test_'):
+            function()
+            print(f"✅ {name}")
@@ -63,13 +63,16 @@ def test_unseen_data():
         "detailed_results": []
     }
     
+    # Run every test text through the model in one batch
+    batch_results = ner.extract_many([test['text'] for test in unseen_tests])
+    
     for i, test in enumerate(unseen_tests, 1):
         print(f"\n📝 Test {i}: {test['name']}")
         print(f"Text: {test['text']}")
         print("-" * 60)
         
         # Extract entities
-        result = ner.extract_entities(test['text'])
+        result = batch_results[i - 1]
         detected_entities = result['combined_entities']
         
         # Analyze results
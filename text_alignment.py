@@ -0,0 +1,208 @@
+import re
+from array import array
+from bisect import bisect_right
+
+
+class Alignment:
+    """Maps character offsets of a rewritten text back to its source.
+
+    The rewritten text is described as runs. An identity run copies a
+    stretch of the source unchanged, so offsets inside it shift by a
+    constant; an edit run is replacement text standing for a whole source
+    range, and anything inside it maps to that range. Only the run starts
+    are stored, so the table grows with the number of edits, not with the
+    length of the text, and a lookup is one binary search.
+    """
+
+    __slots__ = ('out_starts', 'in_starts', 'in_ends', 'exact', 'length')
+
+    def __init__(self, length=0):
+        self.out_starts = array('q')
+        self.in_starts = array('q')
+        self.in_ends = array('q')
+        self.exact = array('b')
+        self.length = length
+        if length:
+            self._append(0, 0, length, True)
+
+    @classmethod
+    def identity(cls, length):
+        """Alignment of a text that was not changed"""
+        return cls(length)
+
+    @classmethod
+    def from_edits(cls, source_length, edits):
+        """Build from sorted, non-overlapping (start, end, replacement_length) source edits"""
+        alignment = cls()
+        out = 0
+        position = 0
+        for start, end, replacement_length in edits:
+            if start > position:
+                alignment._append(out, position, start, True)
+                out += start - position
+            if replacement_length:
+                alignment._append(out, start, end, False)
+                out += replacement_length
+            position = end
+        if source_length > position:
+            alignment._append(out, position, source_length, True)
+            out += source_length - position
+        alignment.length = out
+        return alignment
+
+    def __len__(self):
+        return len(self.out_starts)
+
+    def add_run(self, out_start, in_start, in_end, exact):
+        """Append a run; it must start where the previous one ended"""
+        self._append(out_start, in_start, in_end, exact)
+
+    def add_shifted(self, other, out_offset, in_offset):
+        """Append every run of ``other``, moved by the given offsets"""
+        for run in range(len(other.out_starts)):
+            self._append(other.out_starts[run] + out_offset, other.in_starts[run] + in_offset,
+                         other.in_ends[run] + in_offset, other.exact[run])
+
+    def _append(self, out_start, in_start, in_end, exact):
+        # Neighbouring runs that map the same way are merged
+        if self.out_starts:
+            last = len(self.out_starts) - 1
+            if exact and self.exact[last] and \
+                    self.in_starts[last] + out_start - self.out_starts[last] == in_start:
+                self.in_ends[last] = in_end
+                return
+            if not exact and not self.exact[last] and \
+                    self.in_starts[last] == in_start and self.in_ends[last] == in_end:
+                return
+        self.out_starts.append(out_start)
+        self.in_starts.append(in_start)
+        self.in_ends.append(in_end)
+        self.exact.append(1 if exact else 0)
+
+    def _run(self, position):
+        return bisect_right(self.out_starts, position) - 1
+
+    def map_start(self, position):
+        """Source offset of the character at ``position``"""
+        run = self._run(position)
+        if run < 0:
+            return 0
+        if self.exact[run]:
+            return self.in_starts[run] + position - self.out_starts[run]
+        return self.in_starts[run]
+
+    def map_end(self, position):
+        """Source offset just past the character before ``position``"""
+        if position <= 0:
+            return self.map_start(0) if self.out_starts else 0
+        run = self._run(position - 1)
+        if self.exact[run]:
+            return self.in_starts[run] + position - self.out_starts[run]
+        return self.in_ends[run]
+
+    def map_span(self, start, end):
+        """Source (start, end) covering the rewritten range [start, end)"""
+        if end <= start:
+            mapped = self.map_start(start) if start < self.length else self.map_end(start)
+            return mapped, mapped
+        return self.map_start(start), self.map_end(end)
+
+    def then(self, later):
+        """Compose with the alignment of a further rewrite of this output"""
+        composed = Alignment()
+        count = len(later.out_starts)
+        for run in range(count):
+            out_start = later.out_starts[run]
+            out_end = later.out_starts[run + 1] if run + 1 < count else later.length
+            mid_start, mid_end = later.in_starts[run], later.in_ends[run]
+            if not later.exact[run]:
+                composed._append(out_start, *self.map_span(mid_start, mid_end), False)
+                continue
+
+            # Identity runs are split wherever this alignment's runs change
+            position = mid_start
+            while position < mid_end:
+                inner = self._run(position)
+                inner_end = self.out_starts[inner + 1] if inner + 1 < len(self.out_starts) else self.length
+                piece_end = min(mid_end, inner_end)
+                piece_out = out_start + position - mid_start
+                if self.exact[inner]:
+                    source = self.in_starts[inner] + position - self.out_starts[inner]
+                    composed._append(piece_out, source, source + piece_end - position, True)
+                else:
+                    composed._append(piece_out, self.in_starts[inner], self.in_ends[inner], False)
+                position = piece_end
+        composed.length = later.length
+        return composed
+
+
+# A group reference in a re.sub template, or any other escape
+_TEMPLATE_TOKEN = re.compile(r'\\(?:g<([^>]*)>|([1-9][0-9]?)|.)', re.DOTALL)
+
+
+def _split_template(pattern, replacement):
+    """The groups a re.sub template copies, in order, and the literal text around them"""
+    groups = []
+    literals = []
+    position = 0
+    for token in _TEMPLATE_TOKEN.finditer(replacement):
+        name, number = token.groups()
+        if number is None and name is None:
+            continue
+        groups.append(int(number) if number is not None else
+                      int(name) if name.isdigit() else pattern.groupindex[name])
+        literals.append(replacement[position:token.start()])
+        position = token.end()
+    literals.append(replacement[position:])
+    return groups, literals
+
+
+def _match_edits(match, new_text, groups, literals):
+    """Source edits turning one match into ``new_text``, its replacement.
+
+    Text a group carries over is left out of the edits, so it maps back
+    character for character; only the template's literal text between
+    groups stands for the source between them. A match whose groups come
+    out in a different order, or not at all, is one edit.
+    """
+    start, end = match.span()
+    spans = [match.span(group) for group in groups]
+    if not groups or any(span[0] < 0 for span in spans) or \
+            any(before[1] > after[0] for before, after in zip(spans, spans[1:])):
+        return [(start, end, len(new_text))]
+    edits = []
+    position = start
+    for literal, (group_start, group_end) in zip(literals, spans + [(end, end)]):
+        literal = match.expand(literal)
+        if literal != match.string[position:group_start]:
+            edits.append((position, group_start, len(literal)))
+        position = group_end
+    return edits
+
+
+def sub_with_alignment(pattern, replacement, text):
+    """``pattern.sub(replacement, text)`` that also returns the Alignment.
+
+    ``replacement`` is a template string as for re.sub. Matches replaced by
+    identical text are not recorded, text carried over by group references
+    keeps its exact offsets, and the alignment is None when the text did
+    not change at all.
+    """
+    groups, literals = _split_template(pattern, replacement)
+    pieces = []
+    edits = []
+    position = 0
+    for match in pattern.finditer(text):
+        start, end = match.span()
+        new_text = match.expand(replacement)
+        if new_text == text[start:end]:
+            continue
+        pieces.append(text[position:start])
+        pieces.append(new_text)
+        edits.extend(_match_edits(match, new_text, groups, literals))
+        position = end
+
+    if not edits:
+        return text, None
+    pieces.append(text[position:])
+    return ''.join(pieces), Alignment.from_edits(len(text), edits)
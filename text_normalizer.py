@@ -0,0 +1,221 @@
+import re
+
+from text_alignment import Alignment, sub_with_alignment
+
+# Date format normalization: "Jan 15, 2024" -> "January 15, 2024"
+MONTH_MAP = {
+    'Jan': 'January', 'Feb': 'February', 'Mar': 'March', 'Apr': 'April',
+    'May': 'May', 'Jun': 'June', 'Jul': 'July', 'Aug': 'August',
+    'Sep': 'September', 'Oct': 'October', 'Nov': 'November', 'Dec': 'December'
+}
+
+# Normalization rewrites, applied in order as (pattern, replacement) pairs.
+# This is the reference definition of normalization; TextNormalizer gives
+# the same result in a single scan.
+NORMALIZATION_STEPS = [
+    # Date format normalization: "12 January 2024" -> "January 12, 2024"
+    (re.compile(r'(\d{1,2}) (\w+) (\d{4})'), r'\2 \1, \3'),
+] + [
+    (re.compile(r'\b' + short + r'\b'), full) for short, full in MONTH_MAP.items()
+] + [
+    # Agreement type normalization
+    (re.compile('Agreement'), 'agreement'),
+    (re.compile('Contract'), 'agreement'),
+    (re.compile('Pact'), 'agreement'),
+
+    # Enhanced company name normalization - match training patterns
+    (re.compile(r'(\w+)\s+Pvt\s+Ltd'), r'\1 Corp'),
+    (re.compile(r'(\w+)\s+Limited'), r'\1 Corp'),
+    (re.compile(r'(\w+)\s+LLC'), r'\1 Corp'),
+    (re.compile(r'(\w+)\s+Inc\.'), r'\1 Corp'),
+    (re.compile(r'(\w+)\s+Inc'), r'\1 Corp'),
+
+    # Add common patterns for party names based on training data
+    # Normalize person names to match training patterns
+    (re.compile(r'\b([A-Z][a-z]+)\s+([A-Z][a-z]+)\b'), r'\1 \2'),
+
+    # Add "and" between parties to match training patterns
+    (re.compile(r'(\w+\s+Corp)\s+(?:&|and)\s+(\w+\s+Corp)'), r'\1 and \2'),
+
+    # Remove extra spaces, then the single space left at either end
+    (re.compile(r'\s+'), ' '),
+    (re.compile(r'\A | \Z'), ''),
+]
+
+# Everything but the final strip, for rewriting a window of a longer text
+_WINDOW_STEPS = NORMALIZATION_STEPS[:-1]
+_STRIP_STEP = NORMALIZATION_STEPS[-1]
+
+# Words that never change, kept out of the scan so they cost nothing
+_INLINE = {short: full for short, full in MONTH_MAP.items() if short != full}
+_INLINE.update({'Agreement': 'agreement', 'Contract': 'agreement', 'Pact': 'agreement'})
+
+# Chunks of context kept either side of a hot match; company and "&" rules
+# reach at most two whitespace-separated chunks away from their keyword
+CONTEXT_CHUNKS = 3
+
+
+def normalize_chained(text):
+    """Apply NORMALIZATION_STEPS one pass at a time, as a reference"""
+    for pattern, replacement in NORMALIZATION_STEPS:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+def normalize_chained_with_alignment(text):
+    """Chained normalization that also returns the Alignment to the input"""
+    alignment = Alignment.identity(len(text))
+    for pattern, replacement in NORMALIZATION_STEPS:
+        text, step = sub_with_alignment(pattern, replacement, text)
+        if step is not None:
+            alignment = alignment.then(step)
+    return text, alignment
+
+
+class TextNormalizer:
+    """Applies NORMALIZATION_STEPS in one scan of the text.
+
+    A single compiled regex finds every place a rewrite can apply. Month
+    abbreviations, agreement words and whitespace are rewritten on the
+    spot by a dispatch on the matched group. Dates, company suffixes and
+    "Corp" are hot: their rewrites depend on each other and on the words
+    around them, so a few chunks of context around them are cut out and
+    run through the original steps, which keeps the output identical to
+    the chained version.
+    """
+
+    def __init__(self, context_chunks=CONTEXT_CHUNKS):
+        self.context_chunks = context_chunks
+        months = '|'.join(short for short in MONTH_MAP if short in _INLINE)
+        literals = '|'.join(word for word in _INLINE if word not in MONTH_MAP)
+        self.scanner = re.compile(
+            r'(?P<hot>\d{1,2} \w+ \d{4}|Corp|Pvt\s+Ltd|Limited|LLC|Inc)'
+            r'|(?P<word>\b(?:' + months + r')\b|' + literals + r')'
+            r'|(?P<space>\s{2,}|[^\S ])'
+        )
+
+    def _left_edge(self, text, position):
+        """Start of the whitespace before the chunk ``context_chunks`` to the left"""
+        while position > 0 and not text[position - 1].isspace():
+            position -= 1
+        for _ in range(self.context_chunks):
+            while position > 0 and text[position - 1].isspace():
+                position -= 1
+            if position == 0:
+                return 0
+            while position > 0 and not text[position - 1].isspace():
+                position -= 1
+        while position > 0 and text[position - 1].isspace():
+            position -= 1
+        return position
+
+    def _right_edge(self, text, position):
+        """End of the chunk ``context_chunks`` to the right"""
+        length = len(text)
+        while position < length and not text[position].isspace():
+            position += 1
+        for _ in range(self.context_chunks):
+            while position < length and text[position].isspace():
+                position += 1
+            if position == length:
+                return length
+            while position < length and not text[position].isspace():
+                position += 1
+        return position
+
+    def _plan(self, text):
+        """Return (inline edits, hot windows), each sorted and non-overlapping"""
+        edits = []
+        windows = []
+        for match in self.scanner.finditer(text):
+            kind = match.lastgroup
+            if kind == 'hot':
+                start = self._left_edge(text, match.start())
+                end = self._right_edge(text, match.end())
+                if windows and start <= windows[-1][1]:
+                    windows[-1][1] = max(windows[-1][1], end)
+                else:
+                    windows.append([start, end])
+            elif kind == 'word':
+                edits.append((match.start(), match.end(), _INLINE[match.group()]))
+            else:
+                edits.append((match.start(), match.end(), ' '))
+
+        if not windows:
+            return edits, windows
+
+        # Windows reach back over edits found earlier; those are redone
+        # inside the window, so drop them here
+        kept = []
+        index = 0
+        for edit in edits:
+            while index < len(windows) and windows[index][1] <= edit[0]:
+                index += 1
+            if index < len(windows) and windows[index][0] < edit[1]:
+                continue
+            kept.append(edit)
+        return kept, windows
+
+    def _segments(self, edits, windows):
+        """Merge edits and windows into one ordered list of (start, end, replacement)"""
+        segments = [(start, end, replacement) for start, end, replacement in edits]
+        segments.extend((start, end, None) for start, end in windows)
+        segments.sort()
+        return segments
+
+    def normalize(self, text):
+        """Normalize text exactly as the chained steps would"""
+        edits, windows = self._plan(text)
+        pieces = []
+        position = 0
+        for start, end, replacement in self._segments(edits, windows):
+            pieces.append(text[position:start])
+            if replacement is None:
+                window = text[start:end]
+                for pattern, step_replacement in _WINDOW_STEPS:
+                    window = pattern.sub(step_replacement, window)
+                pieces.append(window)
+            else:
+                pieces.append(replacement)
+            position = end
+        pieces.append(text[position:])
+        return ''.join(pieces).strip()
+
+    def normalize_with_alignment(self, text):
+        """Normalize text and return it with an Alignment back to the input"""
+        edits, windows = self._plan(text)
+        pieces = []
+        alignment = Alignment()
+        out = 0
+        position = 0
+        for start, end, replacement in self._segments(edits, windows):
+            if start > position:
+                pieces.append(text[position:start])
+                alignment.add_run(out, position, start, True)
+                out += start - position
+
+            if replacement is None:
+                window, window_alignment = text[start:end], Alignment.identity(end - start)
+                for pattern, step_replacement in _WINDOW_STEPS:
+                    window, step = sub_with_alignment(pattern, step_replacement, window)
+                    if step is not None:
+                        window_alignment = window_alignment.then(step)
+                alignment.add_shifted(window_alignment, out, start)
+                pieces.append(window)
+                out += len(window)
+            else:
+                alignment.add_run(out, start, end, False)
+                pieces.append(replacement)
+                out += len(replacement)
+            position = end
+
+        if len(text) > position:
+            pieces.append(text[position:])
+            alignment.add_run(out, position, len(text), True)
+            out += len(text) - position
+        alignment.length = out
+
+        normalized, strip = sub_with_alignment(_STRIP_STEP[0], _STRIP_STEP[1], ''.join(pieces))
+        if strip is not None:
+            alignment = alignment.then(strip)
+        return normalized, alignment
@@ -0,0 +1,105 @@
+import os
+import resource
+import threading
+
+
+def resident_memory_mb():
+    """Current resident set size of this process in MB"""
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        # No /proc: fall back to the peak, which is in KB on Linux and bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if peak > 1 << 32 else peak / 1024
+
+
+class MemoryGuard:
+    """Watches a pipeline's StringStore and the process RSS between requests.
+
+    spaCy interns every new token it sees in ``nlp.vocab.strings`` and never
+    forgets them, so a long-lived process grows with every new party name,
+    amount and OCR typo. After each request, ``check`` compares the number
+    of strings added since the pipeline was loaded with ``max_new_strings``
+    and the resident memory with ``max_rss_mb`` (0 disables either). When
+    one is exceeded it calls ``on_limit(reason)`` once, which should get
+    the process back to a freshly loaded pipeline: reload the model, or
+    retire the worker so one forked from the clean master replaces it.
+
+    A reload rarely hands memory back to the system, so each load's RSS
+    becomes its baseline: after one the process may grow as far past it
+    as the first load was allowed to, instead of tripping again at once.
+    """
+
+    def __init__(self, on_limit=None, max_new_strings=200000, max_rss_mb=2048):
+        self.on_limit = on_limit
+        self.max_new_strings = max_new_strings
+        self.max_rss_mb = max_rss_mb
+        self._lock = threading.Lock()
+        self._nlp = None
+        self._baseline = 0
+        self._first_rss = None
+        self._rss_limit = max_rss_mb
+        self._tripped = False
+        self._resets = 0
+        self._last_reason = None
+
+    def watch(self, nlp):
+        """Start watching a freshly loaded pipeline; its strings are the baseline"""
+        with self._lock:
+            self._nlp = nlp
+            self._baseline = len(nlp.vocab.strings) if nlp is not None else 0
+            rss = resident_memory_mb()
+            if self._first_rss is None:
+                self._first_rss = rss
+            if self.max_rss_mb:
+                self._rss_limit = max(self.max_rss_mb, rss + max(0, self.max_rss_mb - self._first_rss))
+            self._tripped = False
+
+    def _new_strings(self):
+        return len(self._nlp.vocab.strings) - self._baseline if self._nlp is not None else 0
+
+    def over_limit(self):
+        """Why this process should be reset, or None"""
+        new_strings = self._new_strings()
+        if self.max_new_strings and new_strings > self.max_new_strings:
+            return f"{new_strings} strings interned since load (limit {self.max_new_strings})"
+        if self.max_rss_mb:
+            rss = resident_memory_mb()
+            if rss > self._rss_limit:
+                return f"resident memory {rss:.0f} MB (limit {self._rss_limit:.0f} MB)"
+        return None
+
+    def check(self):
+        """Run after a request; calls on_limit once if a limit is exceeded"""
+        reason = self.over_limit()
+        if reason is None:
+            return None
+        with self._lock:
+            if self._tripped:
+                return reason
+            self._tripped = True
+            self._resets += 1
+            self._last_reason = reason
+        print(f"⚠️ Worker {os.getpid()} over its memory limit: {reason}")
+        if self.on_limit is not None:
+            self.on_limit(reason)
+        return reason
+
+    def stats(self):
+        """This process's memory and string counts against their limits"""
+        with self._lock:
+            strings = len(self._nlp.vocab.strings) if self._nlp is not None else 0
+            return {
+                'pid': os.getpid(),
+                'rss_mb': round(resident_memory_mb(), 1),
+                'max_rss_mb': self.max_rss_mb,
+                'rss_limit_mb': round(self._rss_limit, 1),
+                'strings': strings,
+                'baseline_strings': self._baseline,
+                'new_strings': strings - self._baseline,
+                'max_new_strings': self.max_new_strings,
+                'resets': self._resets,
+                'last_reset_reason': self._last_reason
+            }